@@ -0,0 +1,95 @@
+r"""
+Benchmark of the chunking of the texts given to the NER models.
+
+Each chunker runs on the full books of ``data/books/txts``, repeated 1, 2, 4
+and 8 times, so that the duration per megabyte shows whether the chunking
+scales linearly with the size of the text.
+
+Usage:
+    python -m benchmarks.chunking
+    python -m benchmarks.chunking --repeats 1 2 --stages chunk_text
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import argparse
+import functools
+
+from benchmarks.data import read_books
+from benchmarks.utils import measure, write_results
+from vroom.chunking import chunk_text, chunk_text_by_sentence
+
+STAGES = {
+    "chunk_text": chunk_text,
+    "chunk_text[chunk_size=4000]": functools.partial(
+        chunk_text, chunk_size=4000
+    ),
+    "chunk_text_by_sentence[regex]": functools.partial(
+        chunk_text_by_sentence, tokenizer="regex"
+    ),
+    "chunk_text_by_sentence[nltk]": functools.partial(
+        chunk_text_by_sentence, tokenizer="nltk"
+    ),
+}
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--repeats",
+        nargs="+",
+        type=int,
+        default=[1, 2, 4, 8],
+        help="The number of copies of the books in the text.",
+    )
+    parser.add_argument(
+        "--stages",
+        nargs="+",
+        default=list(STAGES),
+        choices=list(STAGES),
+        help="The stages to measure.",
+    )
+    parser.add_argument(
+        "--no-memory",
+        action="store_true",
+        help="Do not run the stages a second time to measure the memory.",
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="The JSON file of the results. Defaults to "
+        "benchmarks/results/<commit>-chunking.json.",
+    )
+    args = parser.parse_args(args)
+
+    books = read_books()
+    results = []
+    for stage in args.stages:
+        # The punkt tokenizer is loaded before the measures.
+        STAGES[stage]("Une phrase. Une autre.")
+        for repeats in args.repeats:
+            text = "\n\n".join([books] * repeats)
+            megabytes = len(text.encode("utf-8")) / 2**20
+            output, result = measure(
+                STAGES[stage], text, memory=not args.no_memory
+            )
+            result.update(
+                {
+                    "benchmark": "chunking",
+                    "tier": f"books x{repeats}",
+                    "stage": stage,
+                    "megabytes": megabytes,
+                    "seconds_per_megabyte": result["seconds"] / megabytes,
+                    "n_outputs": len(output),
+                }
+            )
+            print(result)
+            results.append(result)
+
+    print("Results written to", write_results(results, args.output, "chunking"))
+
+
+if __name__ == "__main__":
+    main()
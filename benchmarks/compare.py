@@ -0,0 +1,88 @@
+r"""
+Compares the benchmark results of two commits.
+
+Usage:
+    python -m benchmarks.compare benchmarks/results/abc1234.json \
+        benchmarks/results/def5678.json
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import argparse
+
+from benchmarks.utils import read_results
+
+
+def _format(result: dict, key: str) -> str:
+    value = result.get(key)
+    if value is None:
+        for status in ("timeout", "skipped", "error"):
+            if status in result:
+                return status
+        return "-"
+    if key == "seconds":
+        return f"{value:.3f}s"
+    return f"{value / 2 ** 20:.1f}MiB"
+
+
+def compare(baseline_path: str, candidate_path: str) -> list:
+    """
+    Compares the duration and the peak memory of each stage of two runs.
+
+    Args:
+        baseline_path (str): The JSON results of the reference commit.
+        candidate_path (str): The JSON results of the new commit.
+
+    Returns:
+        list: A list of rows (benchmark, tier, stage, baseline seconds,
+            candidate seconds, speedup, baseline memory, candidate memory).
+    """
+    baseline = read_results(baseline_path)
+    candidate = read_results(candidate_path)
+    rows = []
+    keys = list(baseline) + [key for key in candidate if key not in baseline]
+    for key in keys:
+        before = baseline.get(key, {})
+        after = candidate.get(key, {})
+        speedup = "-"
+        if before.get("seconds") and after.get("seconds"):
+            speedup = f"x{before['seconds'] / after['seconds']:.2f}"
+        rows.append(
+            list(key)
+            + [
+                _format(before, "seconds"),
+                _format(after, "seconds"),
+                speedup,
+                _format(before, "peak_memory_bytes"),
+                _format(after, "peak_memory_bytes"),
+            ]
+        )
+    return rows
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("baseline", help="The JSON results of the reference.")
+    parser.add_argument("candidate", help="The JSON results to compare.")
+    args = parser.parse_args(args)
+
+    header = [
+        "benchmark",
+        "tier",
+        "stage",
+        "before",
+        "after",
+        "speedup",
+        "memory before",
+        "memory after",
+    ]
+    rows = [header] + compare(args.baseline, args.candidate)
+    widths = [max(len(str(row[i])) for row in rows) for i in range(len(header))]
+    for row in rows:
+        print("  ".join(str(cell).ljust(w) for cell, w in zip(row, widths)))
+
+
+if __name__ == "__main__":
+    main()
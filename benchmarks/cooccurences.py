@@ -0,0 +1,241 @@
+r"""
+Benchmark of the co-occurence stages of the pipeline, without any model.
+
+Each stage runs on synthetic French books of 1k to 1M character mentions, and
+on the chapters of the kaggle data with their gold entities. The duration and
+the peak memory of each stage are written in a JSON file which can be
+compared with the results of another commit with ``benchmarks.compare``.
+
+Usage:
+    python -m benchmarks.cooccurences --tiers 1k 10k kaggle
+    python -m benchmarks.cooccurences --stages get_cooccurences_sliding_window
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import argparse
+import contextlib
+import functools
+import multiprocessing
+import os
+
+from benchmarks.data import TIERS, generate_book, get_kaggle_chapters
+from benchmarks.utils import measure, write_results
+from vroom.cooccurences import (
+    get_cooccurences,
+    get_cooccurences_sliding_window,
+)
+from vroom.GraphManager import GraphManager
+
+
+def _get_cooccurences(documents):
+    return [
+        get_cooccurences(chunks, entities) for chunks, entities, _ in documents
+    ]
+
+
+def _get_cooccurences_sliding_window(documents, counted=False):
+    return [
+        get_cooccurences_sliding_window(chunks, entities, counted=counted)
+        for chunks, entities, _ in documents
+    ]
+
+
+def _find_cooccurences_aliases(documents, counted=False):
+    # The module of the baseline imports the NER and OpenAI dependencies.
+    from vroom.baseline import find_cooccurences_aliases
+
+    cooccurences = _get_cooccurences_sliding_window(documents, counted)
+
+    def run():
+        # The function prints the names without alias.
+        with open(os.devnull, "w") as devnull:
+            with contextlib.redirect_stdout(devnull):
+                return [
+                    find_cooccurences_aliases(interactions, aliases)
+                    for interactions, (_, _, aliases) in zip(
+                        cooccurences, documents
+                    )
+                ]
+
+    return run
+
+
+def _add_cooccurrences(documents, counted=False):
+    aliased_cooccurences = []
+    for interactions, (_, _, aliases) in zip(
+        _get_cooccurences_sliding_window(documents, counted), documents
+    ):
+        groups = {name: tuple(alias) for alias in aliases for name in alias}
+        if counted:
+            aliased = {}
+            for (name_1, name_2), count in interactions.items():
+                pair = (groups[name_1], groups[name_2])
+                aliased[pair] = aliased.get(pair, 0) + count
+        else:
+            aliased = [
+                (groups[name_1], groups[name_2])
+                for name_1, name_2 in interactions
+            ]
+        aliased_cooccurences.append(aliased)
+
+    def run():
+        edges = []
+        for cooccurences in aliased_cooccurences:
+            graph_manager = GraphManager(weighted=True)
+            graph_manager.add_cooccurrences(cooccurences)
+            edges.append(graph_manager.graph.edges)
+        return edges
+
+    return run
+
+
+# The stages whose function prepares its input and returns the function to
+# measure are listed with prepare=True.
+STAGES = {
+    "get_cooccurences": (_get_cooccurences, False),
+    "get_cooccurences_sliding_window": (
+        _get_cooccurences_sliding_window,
+        False,
+    ),
+    "find_cooccurences_aliases": (_find_cooccurences_aliases, True),
+    "find_cooccurences_aliases[counted]": (
+        functools.partial(_find_cooccurences_aliases, counted=True),
+        True,
+    ),
+    "GraphManager.add_cooccurrences": (_add_cooccurrences, True),
+    "GraphManager.add_cooccurrences[counted]": (
+        functools.partial(_add_cooccurrences, counted=True),
+        True,
+    ),
+}
+
+
+def _run_stage(queue, stage, documents, memory):
+    """
+    Measures a stage in a child process and puts its results in the queue.
+    """
+    function, prepare = STAGES[stage]
+    try:
+        if prepare:
+            function = function(documents)
+            output, result = measure(function, memory=memory)
+        else:
+            output, result = measure(function, documents, memory=memory)
+    except ImportError as error:
+        queue.put({"skipped": str(error)})
+        return
+    result["n_outputs"] = sum(len(document) for document in output)
+    queue.put(result)
+
+
+def run_stage(stage: str, documents: list, max_seconds: float, memory: bool):
+    """
+    Measures a stage in a child process, stopped after ``max_seconds``.
+
+    Args:
+        stage (str): The name of the stage.
+        documents (list): The list of (chunks, entities, aliases) tuples.
+        max_seconds (float): The maximum duration of the measure.
+        memory (bool): Whether to measure the peak memory.
+
+    Returns:
+        dict: The results of the stage.
+    """
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(
+        target=_run_stage, args=(queue, stage, documents, memory)
+    )
+    process.start()
+    process.join(max_seconds)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+        return {"timeout": max_seconds}
+    if queue.empty():
+        return {"error": f"exit code {process.exitcode}"}
+    return queue.get()
+
+
+def get_documents(tier: str, seed: int = 0):
+    """
+    Returns the documents of a tier, a synthetic one or "kaggle".
+    """
+    if tier == "kaggle":
+        return get_kaggle_chapters()
+    return [generate_book(TIERS[tier], seed=seed)]
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--tiers",
+        nargs="+",
+        default=list(TIERS) + ["kaggle"],
+        choices=list(TIERS) + ["kaggle"],
+        help="The sizes of the synthetic books and the kaggle chapters.",
+    )
+    parser.add_argument(
+        "--stages",
+        nargs="+",
+        default=list(STAGES),
+        choices=list(STAGES),
+        help="The stages to measure.",
+    )
+    parser.add_argument(
+        "--max-seconds",
+        type=float,
+        default=300,
+        help="A stage running for longer is stopped and skipped on the "
+        "larger tiers.",
+    )
+    parser.add_argument(
+        "--no-memory",
+        action="store_true",
+        help="Do not run the stages a second time to measure the memory.",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="The JSON file of the results. Defaults to "
+        "benchmarks/results/<commit>.json.",
+    )
+    args = parser.parse_args(args)
+
+    results = []
+    timed_out = set()
+    for tier in args.tiers:
+        documents = get_documents(tier, args.seed)
+        n_mentions = sum(
+            len(chunk_entities)
+            for _, entities, _ in documents
+            for chunk_entities in entities
+        )
+        for stage in args.stages:
+            if stage in timed_out and tier != "kaggle":
+                result = {"skipped": "timeout on a smaller tier"}
+            else:
+                result = run_stage(
+                    stage, documents, args.max_seconds, not args.no_memory
+                )
+            if "timeout" in result:
+                timed_out.add(stage)
+            result.update(
+                {
+                    "benchmark": "cooccurences",
+                    "tier": tier,
+                    "stage": stage,
+                    "n_mentions": n_mentions,
+                }
+            )
+            print(result)
+            results.append(result)
+
+    print("Results written to", write_results(results, args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+r"""
+Package for the generation of benchmark data.
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import glob
+import os
+import random
+
+from vroom.EntitySpans import EntitySpans
+
+# The number of mentions of each synthetic tier.
+TIERS = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+KAGGLE_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "kaggle")
+
+BOOKS_DIR = os.path.join(
+    os.path.dirname(__file__), "..", "data", "books", "txts"
+)
+
+_FIRST_NAMES = [
+    "Hari",
+    "Dors",
+    "Cléon",
+    "Eto",
+    "Raych",
+    "Hummin",
+    "Elijah",
+    "Jessie",
+    "Julius",
+    "Vince",
+    "Clousarr",
+    "Gladia",
+    "Rashelle",
+    "Mannix",
+    "Tisalver",
+    "Casilia",
+    "Davan",
+    "Jenarr",
+    "Lisung",
+    "Amaryl",
+]
+
+_LAST_NAMES = [
+    "Seldon",
+    "Venabili",
+    "Demerzel",
+    "Baley",
+    "Enderby",
+    "Olivaw",
+    "Randa",
+    "Leggen",
+    "Tennar",
+    "Rikaine",
+]
+
+_WORDS = (
+    "le la les un une des du de et à au aux dans sur sous avec sans pour "
+    "par vers chez il elle ils elles on nous vous lui leur se ne pas plus "
+    "jamais encore déjà alors puis ensuite enfin bien très trop peu "
+    "regarda dit demanda répondit pensa sourit hocha la tête marcha "
+    "attendit entra sortit murmura ajouta reprit soupira leva les yeux "
+    "ville palais couloir secteur empire trône jardin porte fenêtre "
+    "ciel mur table main visage voix silence temps jour nuit soir matin "
+    "grand petit vieux jeune long sombre calme étrange certain autre"
+).split()
+
+_PUNCTUATION = [",", ",", ";", ":"]
+
+
+def get_characters(n_characters: int = 60, seed: int = 0):
+    """
+    Generates the characters of a synthetic book with their aliases.
+
+    Args:
+        n_characters (int): The number of characters.
+        seed (int): The seed of the random generator.
+
+    Returns:
+        list: A list of lists of aliases, the full name first.
+    """
+    rng = random.Random(seed)
+    names = [(first, last) for first in _FIRST_NAMES for last in _LAST_NAMES]
+    rng.shuffle(names)
+    return [
+        [f"{first} {last}", first, last] for first, last in names[:n_characters]
+    ]
+
+
+def generate_book(
+    n_mentions: int,
+    seed: int = 0,
+    n_characters: int = 60,
+    words_between_mentions: int = 12,
+    chunk_size: int = 500,
+):
+    """
+    Generates a synthetic French text with its character mentions.
+
+    The mentions are separated by a random number of words, around
+    ``words_between_mentions``, and the characters follow a Zipf law as in a
+    novel, where a few main characters make most of the mentions.
+
+    Args:
+        n_mentions (int): The number of mentions.
+        seed (int): The seed of the random generator.
+        n_characters (int): The number of characters.
+        words_between_mentions (int): The mean number of words between two
+            mentions.
+        chunk_size (int): The maximum number of characters of a chunk, as in
+            ``vroom.NER.chunk_text``.
+
+    Returns:
+        tuple: The list of chunks, the list of list of entities of each chunk
+            and the list of aliases of the characters.
+    """
+    rng = random.Random(seed)
+    aliases = get_characters(n_characters, seed)
+    weights = [1 / (rank + 1) for rank in range(len(aliases))]
+    characters = rng.choices(aliases, weights=weights, k=n_mentions)
+
+    chunks = []
+    entities = []
+    chunk = []
+    chunk_entities = []
+    length = 0
+    for character in characters:
+        words = []
+        for _ in range(rng.randint(1, 2 * words_between_mentions - 1)):
+            words.append(rng.choice(_WORDS))
+            if rng.random() < 0.08:
+                words.append(rng.choice(_PUNCTUATION))
+            elif rng.random() < 0.06:
+                words.append(".")
+        name = rng.choice(character)
+        words.append(name)
+
+        piece = " ".join(words)
+        if length and length + len(piece) + 1 > chunk_size:
+            chunks.append(" ".join(chunk))
+            entities.append(chunk_entities)
+            chunk = []
+            chunk_entities = []
+            length = 0
+        start = length + (1 if length else 0) + len(piece) - len(name)
+        chunk_entities.append(
+            {
+                "entity_group": "PER",
+                "word": name,
+                "start": start,
+                "end": start + len(name),
+            }
+        )
+        chunk.append(piece)
+        length += len(piece) + (1 if length else 0)
+
+    if chunk:
+        chunks.append(" ".join(chunk))
+        entities.append(chunk_entities)
+    return chunks, entities, aliases
+
+
+def read_tagged_chapter(path: str):
+    """
+    Reads a chapter tagged with <PER> tags and returns its text and the gold
+    entities with their offsets in the text.
+
+    Args:
+        path (str): The path of the ``.tagged`` file.
+
+    Returns:
+        tuple: The text without tags and the list of entities.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        text, spans = EntitySpans.from_tagged(f.read())
+    return text, [
+        {"entity_group": "PER", **entity} for entity in spans.to_entities()
+    ]
+
+
+def get_kaggle_chapters(kaggle_dir: str = KAGGLE_DIR):
+    """
+    Returns the tagged chapters of the kaggle data as benchmark documents.
+
+    Args:
+        kaggle_dir (str): The directory of the kaggle data.
+
+    Returns:
+        list: A list of (chunks, entities, aliases) tuples, one per chapter,
+            with the whole chapter as a single chunk. Each name is its own
+            alias group.
+    """
+    documents = []
+    paths = glob.glob(os.path.join(kaggle_dir, "*", "*.tagged"))
+    for path in sorted(paths):
+        text, entities = read_tagged_chapter(path)
+        names = sorted({entity["word"] for entity in entities})
+        documents.append(([text], [entities], [[name] for name in names]))
+    return documents
+
+
+def read_books(books_dir: str = BOOKS_DIR) -> str:
+    """
+    Returns the full books of the data as a single text.
+
+    Args:
+        books_dir (str): The directory of the ``.txt`` books.
+
+    Returns:
+        str: The books, separated by a blank line. The bytes which are not
+            valid UTF-8 are replaced.
+    """
+    texts = []
+    for path in sorted(glob.glob(os.path.join(books_dir, "*.txt"))):
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            texts.append(f.read())
+    return "\n\n".join(texts)
@@ -0,0 +1,183 @@
+r"""
+Benchmark and accuracy check of the backends of the NER model.
+
+The chapter 1 of the test set is tagged with each backend of
+``vroom.ModelRegistry``, and the PER spans are compared to the gold
+``.labeled`` file. The spans are compared on their offsets in the text
+without whitespaces, since the tags of the gold file add spaces around the
+names. The run fails when the F1 score of a backend is lower than the one of
+the torch backend by more than ``--tolerance``.
+
+Unlike the other benchmarks, it downloads the model and needs torch,
+transformers and, for the ONNX backends, optimum[onnxruntime].
+
+Usage:
+    python -m benchmarks.ner_backends
+    python -m benchmarks.ner_backends --backends torch onnx-int8
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import argparse
+import os
+import sys
+
+from benchmarks.data import read_tagged_chapter
+from benchmarks.utils import measure, write_results
+from vroom.ModelRegistry import BACKENDS, DEFAULT_SOURCE, ModelRegistry
+from vroom.NERCache import NERCache
+
+TEST_SET_DIR = os.path.join(
+    os.path.dirname(__file__), "..", "data", "test_set", "prelude_a_fondation"
+)
+
+
+def _get_compact_offsets(text: str) -> list:
+    """
+    Returns the number of non-whitespace characters before each position of
+    the text.
+    """
+    offsets = [0]
+    for char in text:
+        offsets.append(offsets[-1] + (not char.isspace()))
+    return offsets
+
+
+def get_compact_spans(chunks: list, entities: list) -> set:
+    """
+    Returns the spans of the entities of the chunks of a text in the text
+    without whitespaces.
+
+    Args:
+        chunks (list): The chunks of the text.
+        entities (list): The list of entities of each chunk.
+
+    Returns:
+        set: The set of (start, end) spans.
+    """
+    spans = set()
+    chunk_offset = 0
+    for chunk, chunk_entities in zip(chunks, entities):
+        offsets = _get_compact_offsets(chunk)
+        for entity in chunk_entities:
+            spans.add(
+                (
+                    chunk_offset + offsets[entity["start"]],
+                    chunk_offset + offsets[entity["end"]],
+                )
+            )
+        chunk_offset += offsets[-1]
+    return spans
+
+
+def get_scores(predicted: set, expected: set) -> dict:
+    """
+    Returns the precision, the recall and the F1 score of the predicted
+    spans.
+    """
+    true_positives = len(predicted & expected)
+    precision = true_positives / len(predicted) if predicted else 0.0
+    recall = true_positives / len(expected) if expected else 0.0
+    f1_score = (
+        2 * precision * recall / (precision + recall)
+        if precision + recall
+        else 0.0
+    )
+    return {"precision": precision, "recall": recall, "f1_score": f1_score}
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        default=list(BACKENDS),
+        choices=list(BACKENDS),
+        help="The backends to compare. The first one is the reference.",
+    )
+    parser.add_argument("--source", default=DEFAULT_SOURCE)
+    parser.add_argument(
+        "--unlabeled",
+        default=os.path.join(TEST_SET_DIR, "chapter_1.unlabeled"),
+    )
+    parser.add_argument(
+        "--labeled",
+        default=os.path.join(TEST_SET_DIR, "chapter_1.labeled"),
+    )
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.01,
+        help="The maximum loss of F1 score of a backend.",
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="The JSON file of the results. Defaults to "
+        "benchmarks/results/<commit>-ner_backends.json.",
+    )
+    args = parser.parse_args(args)
+
+    # The NER module imports torch, transformers and flair.
+    from vroom.NER import get_entities_from_file
+
+    text, gold_entities = read_tagged_chapter(args.labeled)
+    expected = get_compact_spans([text], [gold_entities])
+
+    results = []
+    reference = None
+    for backend in args.backends:
+        registry = ModelRegistry(max_size=1)
+        registry.warmup(args.source, "cpu", backend=backend)
+        (entities, chunks), result = measure(
+            get_entities_from_file,
+            args.unlabeled,
+            args.source,
+            registry=registry,
+            backend=backend,
+            batch_size=args.batch_size,
+            cache=NERCache(enabled=False),
+            memory=False,
+        )
+        predicted = get_compact_spans(chunks, entities)
+        if reference is None:
+            reference = predicted
+        result.update(get_scores(predicted, expected))
+        result["agreement_f1_score"] = get_scores(predicted, reference)[
+            "f1_score"
+        ]
+        result.update(
+            {
+                "benchmark": "ner_backends",
+                "tier": os.path.basename(args.unlabeled),
+                "stage": backend,
+                "n_outputs": len(predicted),
+            }
+        )
+        print(result)
+        results.append(result)
+
+    print(
+        "Results written to",
+        write_results(results, args.output, "ner_backends"),
+    )
+
+    reference_f1_score = results[0]["f1_score"]
+    failed = [
+        result["stage"]
+        for result in results
+        if result["f1_score"] < reference_f1_score - args.tolerance
+    ]
+    if failed:
+        print(
+            f"The F1 score of {', '.join(failed)} is lower than the one of "
+            f"{results[0]['stage']} by more than {args.tolerance}."
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
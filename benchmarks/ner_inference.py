@@ -0,0 +1,177 @@
+r"""
+Benchmark of the inference settings of PyTorch for the NER on the kaggle
+chapters.
+
+The chapters of ``data/kaggle`` are tagged with each combination of the
+options of ``vroom.InferenceConfig``: the inference mode, the numbers of
+intra-op and inter-op threads and the bfloat16 autocast. Each combination
+runs in a new process, since the number of inter-op threads of torch can only
+be set once, and the model is loaded and warmed up before the measure. The entities are compared to those of the first combination,
+since the bfloat16 autocast can change them. The NER cache is disabled.
+
+Unlike the model-free benchmarks, it downloads the model and needs torch and
+transformers.
+
+Usage:
+    python -m benchmarks.ner_inference
+    python -m benchmarks.ner_inference --threads 4 8 --bf16 0 1
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import argparse
+import glob
+import itertools
+import multiprocessing
+import os
+import time
+
+from benchmarks.data import KAGGLE_DIR
+from benchmarks.ner_backends import get_scores
+from benchmarks.utils import write_results
+from vroom.InferenceConfig import InferenceConfig
+from vroom.ModelRegistry import DEFAULT_SOURCE, ModelRegistry
+from vroom.NERCache import NERCache
+
+
+def _run_config(settings: dict, paths: list, source: str, batch_size: int):
+    """
+    Tags the chapters with the given settings, in a new process.
+    """
+    # The NER module imports torch, transformers and flair.
+    from vroom.NER import get_entities_from_files
+
+    config = InferenceConfig(**settings)
+    config.apply()
+    registry = ModelRegistry(max_size=1)
+    with config.context():
+        registry.warmup(source)
+
+    start = time.perf_counter()
+    results = get_entities_from_files(
+        paths,
+        source,
+        registry=registry,
+        batch_size=batch_size,
+        cache=NERCache(enabled=False),
+        inference_config=config,
+    )
+    seconds = time.perf_counter() - start
+
+    spans = {
+        (i, j, entity["start"], entity["end"])
+        for i, (entities, _) in enumerate(results)
+        for j, chunk_entities in enumerate(entities)
+        for entity in chunk_entities
+    }
+    return seconds, spans, config.to_dict()
+
+
+def _get_label(settings: dict) -> str:
+    return ",".join(f"{name}={value}" for name, value in settings.items())
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--inference-mode",
+        nargs="+",
+        type=int,
+        choices=[0, 1],
+        default=[0, 1],
+        help="Whether to run in torch.inference_mode.",
+    )
+    parser.add_argument(
+        "--threads",
+        nargs="+",
+        type=int,
+        default=[os.cpu_count() or 1],
+        help="The numbers of intra-op threads.",
+    )
+    parser.add_argument(
+        "--interop-threads",
+        nargs="+",
+        type=int,
+        default=[1],
+        help="The numbers of inter-op threads.",
+    )
+    parser.add_argument(
+        "--bf16",
+        nargs="+",
+        type=int,
+        choices=[0, 1],
+        default=[0, 1],
+        help="Whether to enable the bfloat16 autocast.",
+    )
+    parser.add_argument("--source", default=DEFAULT_SOURCE)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument(
+        "--max-chapters",
+        type=int,
+        default=None,
+        help="The number of kaggle chapters to tag. Defaults to all.",
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="The JSON file of the results. Defaults to "
+        "benchmarks/results/<commit>-ner_inference.json.",
+    )
+    args = parser.parse_args(args)
+
+    paths = sorted(glob.glob(os.path.join(KAGGLE_DIR, "*", "*.preprocessed")))
+    paths = paths[: args.max_chapters]
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    reference = None
+    for values in itertools.product(
+        args.inference_mode,
+        args.threads,
+        args.interop_threads,
+        args.bf16,
+    ):
+        settings = dict(
+            zip(
+                (
+                    "inference_mode",
+                    "intra_op_threads",
+                    "inter_op_threads",
+                    "bf16_autocast",
+                ),
+                values,
+            )
+        )
+        for name in ("inference_mode", "bf16_autocast"):
+            settings[name] = bool(settings[name])
+        with context.Pool(1) as pool:
+            seconds, spans, config = pool.apply(
+                _run_config, (settings, paths, args.source, args.batch_size)
+            )
+        if reference is None:
+            reference = spans
+        result = {
+            "benchmark": "ner_inference",
+            "tier": f"kaggle[{len(paths)}]",
+            "stage": _get_label(settings),
+            "seconds": seconds,
+            "chapters_per_second": len(paths) / seconds,
+            "n_outputs": len(spans),
+            "agreement_f1_score": get_scores(spans, reference)["f1_score"],
+            "inference_config": config,
+        }
+        print({k: v for k, v in result.items() if k != "inference_config"})
+        results.append(result)
+
+    best = min(results, key=lambda result: result["seconds"])
+    print(f"\nFastest settings: {best['stage']} ({best['seconds']:.1f}s)")
+    print(
+        "Results written to",
+        write_results(results, args.output, "ner_inference"),
+    )
+
+
+if __name__ == "__main__":
+    main()
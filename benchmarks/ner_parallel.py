@@ -0,0 +1,140 @@
+r"""
+Benchmark of the layouts of the parallel NER runner on the kaggle chapters.
+
+The chapters of ``data/kaggle`` are tagged by ``ParallelRunner`` for each
+number of worker processes and of torch threads per worker whose product
+fits in the cores of the machine, and the fastest layout is reported. Each
+worker loads the model, so the loading time is part of the measures, as in
+a real run. The NER cache is disabled.
+
+Unlike the model-free benchmarks, it downloads the model and needs torch and
+transformers.
+
+Usage:
+    python -m benchmarks.ner_parallel
+    python -m benchmarks.ner_parallel --workers 1 2 4 --threads 1 2 4 8
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import argparse
+import functools
+import glob
+import os
+import time
+
+from benchmarks.data import KAGGLE_DIR
+from benchmarks.utils import write_results
+from vroom.ModelRegistry import DEFAULT_SOURCE
+from vroom.NERCache import NERCache
+from vroom.ParallelRunner import ParallelRunner
+
+
+def _powers_of_two(maximum: int) -> list:
+    values = [1]
+    while values[-1] * 2 <= maximum:
+        values.append(values[-1] * 2)
+    return values
+
+
+def main(args=None):
+    n_cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--workers",
+        nargs="+",
+        type=int,
+        default=_powers_of_two(n_cores),
+        help="The numbers of worker processes.",
+    )
+    parser.add_argument(
+        "--threads",
+        nargs="+",
+        type=int,
+        default=_powers_of_two(n_cores),
+        help="The numbers of torch threads per worker.",
+    )
+    parser.add_argument(
+        "--oversubscribe",
+        action="store_true",
+        help="Also measure the layouts using more threads than cores.",
+    )
+    parser.add_argument("--source", default=DEFAULT_SOURCE)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument(
+        "--max-chapters",
+        type=int,
+        default=None,
+        help="The number of kaggle chapters to tag. Defaults to all.",
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="The JSON file of the results. Defaults to "
+        "benchmarks/results/<commit>-ner_parallel.json.",
+    )
+    args = parser.parse_args(args)
+
+    # The NER module imports torch, transformers and flair.
+    from vroom.NER import get_entities_from_file
+
+    paths = sorted(glob.glob(os.path.join(KAGGLE_DIR, "*", "*.preprocessed")))
+    paths = paths[: args.max_chapters]
+    function = functools.partial(
+        get_entities_from_file,
+        source=args.source,
+        batch_size=args.batch_size,
+        cache=NERCache(enabled=False),
+    )
+
+    results = []
+    for n_workers in args.workers:
+        for n_threads in args.threads:
+            if n_workers * n_threads > n_cores and not args.oversubscribe:
+                continue
+            start = time.perf_counter()
+            n_entities = 0
+            runner = ParallelRunner(n_workers, n_threads)
+            for entities, _ in runner.imap(function, paths):
+                n_entities += sum(len(chunk) for chunk in entities)
+            seconds = time.perf_counter() - start
+            result = {
+                "benchmark": "ner_parallel",
+                "tier": f"kaggle[{len(paths)}]",
+                "stage": f"workers={n_workers},threads={n_threads}",
+                "n_workers": n_workers,
+                "n_threads": n_threads,
+                "seconds": seconds,
+                "chapters_per_second": len(paths) / seconds,
+                "n_outputs": n_entities,
+            }
+            print(result)
+            results.append(result)
+
+    print(
+        f"\n{'':>10}" + "".join(f"{f'{t} threads':>12}" for t in args.threads)
+    )
+    for n_workers in args.workers:
+        row = f"{f'{n_workers} workers':>10}"
+        for n_threads in args.threads:
+            seconds = [
+                result["seconds"]
+                for result in results
+                if (result["n_workers"], result["n_threads"])
+                == (n_workers, n_threads)
+            ]
+            row += f"{f'{seconds[0]:.1f}s' if seconds else '-':>12}"
+        print(row)
+    best = min(results, key=lambda result: result["seconds"])
+    print(f"\nFastest layout on {n_cores} cores: {best['stage']}")
+
+    print(
+        "Results written to",
+        write_results(results, args.output, "ner_parallel"),
+    )
+
+
+if __name__ == "__main__":
+    main()
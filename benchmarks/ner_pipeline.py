@@ -0,0 +1,136 @@
+r"""
+Benchmark of the overlapped stages of the NER on the kaggle chapters.
+
+The chapters of ``data/kaggle`` are tagged by ``NER.iter_entities_from_files``
+with its stages run one after the other in the main thread, and then
+overlapped by the threads of ``NERPipeline``: the reading, the chunking, the
+tokenization and the padding of the next batches, and the aggregation of the
+entities of the previous ones, run while the model runs on the current
+batch. The model is loaded and warmed up before the measures, and the
+entities of both runs must be the same. The NER cache is disabled.
+
+Unlike the model-free benchmarks, it downloads the model and needs torch and
+transformers.
+
+Usage:
+    python -m benchmarks.ner_pipeline
+    python -m benchmarks.ner_pipeline --threads 4 --repeats 3
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import argparse
+import glob
+import os
+import time
+
+from benchmarks.data import KAGGLE_DIR
+from benchmarks.utils import write_results
+from vroom.BatchScheduler import BatchScheduler
+from vroom.InferenceConfig import InferenceConfig
+from vroom.ModelRegistry import DEFAULT_SOURCE, ModelRegistry
+from vroom.NERCache import NERCache
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--source", default=DEFAULT_SOURCE)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument(
+        "--max-tokens",
+        type=int,
+        default=None,
+        help="The budget of tokens per batch, on top of --batch-size.",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="The number of intra-op threads of torch.",
+    )
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        default=1,
+        help="The number of runs of each mode, the fastest is kept.",
+    )
+    parser.add_argument(
+        "--max-chapters",
+        type=int,
+        default=None,
+        help="The number of kaggle chapters to tag. Defaults to all.",
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="The JSON file of the results. Defaults to "
+        "benchmarks/results/<commit>-ner_pipeline.json.",
+    )
+    args = parser.parse_args(args)
+
+    # The NER module imports torch, transformers and flair.
+    from vroom.NER import iter_entities_from_files
+
+    paths = sorted(glob.glob(os.path.join(KAGGLE_DIR, "*", "*.preprocessed")))
+    paths = paths[: args.max_chapters]
+    config = InferenceConfig(intra_op_threads=args.threads)
+    config.apply()
+    registry = ModelRegistry(max_size=1)
+    with config.context():
+        registry.warmup(args.source)
+
+    results = []
+    reference = None
+    for overlap in (False, True):
+        seconds = []
+        for _ in range(args.repeats):
+            scheduler = BatchScheduler(
+                max_batch_size=args.batch_size, max_tokens=args.max_tokens
+            )
+            start = time.perf_counter()
+            outputs = list(
+                iter_entities_from_files(
+                    paths,
+                    args.source,
+                    registry=registry,
+                    scheduler=scheduler,
+                    cache=NERCache(enabled=False),
+                    inference_config=config,
+                    overlap=overlap,
+                )
+            )
+            seconds.append(time.perf_counter() - start)
+        if reference is None:
+            reference = outputs
+        result = {
+            "benchmark": "ner_pipeline",
+            "tier": f"kaggle[{len(paths)}]",
+            "stage": "overlapped" if overlap else "sequential",
+            "seconds": min(seconds),
+            "chapters_per_second": len(paths) / min(seconds),
+            "n_outputs": sum(
+                len(chunk) for entities, _ in outputs for chunk in entities
+            ),
+            "same_entities": outputs == reference,
+        }
+        print(result)
+        results.append(result)
+
+    sequential, overlapped = results
+    print(
+        f"\nOverlap: {sequential['seconds']:.1f}s -> "
+        f"{overlapped['seconds']:.1f}s "
+        f"({sequential['seconds'] / overlapped['seconds']:.2f}x)"
+    )
+    print(
+        "Results written to",
+        write_results(results, args.output, "ner_pipeline"),
+    )
+    if not overlapped["same_entities"]:
+        raise SystemExit("The overlapped stages changed the entities.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+r"""
+Padding efficiency of the batches of the NER model on the kaggle chapters.
+
+The chunks of all the kaggle chapters are batched by ``BatchScheduler``
+with fixed batch sizes and with budgets of tokens per batch, and the padding
+efficiency and the number of batches of each layout are reported, to tune the
+budget of a machine. The lengths are the numbers of subwords of the model
+tokenizer with ``--tokenizer model``, which downloads it, and the numbers of
+tokens of the regex tokenizer, without any model, by default.
+
+Usage:
+    python -m benchmarks.padding
+    python -m benchmarks.padding --tokenizer model --max-tokens 2048 4096
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import argparse
+import glob
+import os
+
+from benchmarks.data import KAGGLE_DIR
+from benchmarks.utils import write_results
+from vroom.BatchScheduler import BatchScheduler
+from vroom.chunking import chunk_text
+from vroom.ModelRegistry import DEFAULT_SOURCE
+from vroom.tokenize import count_tokens
+
+
+def get_chunks(kaggle_dir: str = KAGGLE_DIR) -> list:
+    """
+    Returns the chunks of all the kaggle chapters, as chunked by
+    ``vroom.NER.get_entities_from_file``.
+    """
+    chunks = []
+    paths = glob.glob(os.path.join(kaggle_dir, "*", "*.preprocessed"))
+    for path in sorted(paths):
+        with open(path, "r", encoding="utf-8") as f:
+            chunks += chunk_text(" ".join(f.read().split()))
+    return chunks
+
+
+def get_lengths(chunks: list, tokenizer: str, source: str) -> list:
+    """
+    Returns the number of tokens of each chunk.
+    """
+    if tokenizer == "regex":
+        return [count_tokens(chunk) for chunk in chunks]
+
+    from transformers import AutoTokenizer
+
+    model_tokenizer = AutoTokenizer.from_pretrained(source)
+    return [len(ids) for ids in model_tokenizer(chunks)["input_ids"]]
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--tokenizer", default="regex", choices=["regex", "model"]
+    )
+    parser.add_argument("--source", default=DEFAULT_SOURCE)
+    parser.add_argument(
+        "--batch-sizes",
+        nargs="+",
+        type=int,
+        default=[1, 8, 16, 32],
+        help="The fixed batch sizes to compare.",
+    )
+    parser.add_argument(
+        "--max-tokens",
+        nargs="+",
+        type=int,
+        default=[1024, 2048, 4096, 8192, 16384],
+        help="The budgets of tokens per batch to compare.",
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="The JSON file of the results. Defaults to "
+        "benchmarks/results/<commit>-padding.json.",
+    )
+    args = parser.parse_args(args)
+
+    lengths = get_lengths(get_chunks(), args.tokenizer, args.source)
+    schedulers = [
+        BatchScheduler(max_batch_size=batch_size)
+        for batch_size in args.batch_sizes
+    ] + [
+        BatchScheduler(max_tokens=max_tokens) for max_tokens in args.max_tokens
+    ]
+
+    results = []
+    for scheduler in schedulers:
+        batches = scheduler.schedule(lengths)
+        result = scheduler.get_stats()
+        if scheduler.max_tokens is None:
+            stage = f"batch_size={scheduler.max_batch_size}"
+        else:
+            stage = f"max_tokens={scheduler.max_tokens}"
+        result.update(
+            {
+                "benchmark": "padding",
+                "tier": f"kaggle[{args.tokenizer}]",
+                "stage": stage,
+                "longest_batch": max(len(batch) for batch in batches),
+            }
+        )
+        print(
+            f"{stage:<18} {result['n_batches']:>5} batches, padding "
+            f"efficiency of {result['padding_efficiency']:.1%}"
+        )
+        results.append(result)
+
+    print("Results written to", write_results(results, args.output, "padding"))
+
+
+if __name__ == "__main__":
+    main()
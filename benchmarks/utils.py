@@ -0,0 +1,138 @@
+r"""
+Package for the measurement and the comparison of benchmark results.
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import datetime
+import gc
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def get_commit() -> str:
+    """
+    Returns the short hash of the current git commit, or "unknown".
+    """
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "--short", "HEAD"],
+                cwd=os.path.dirname(__file__),
+                stderr=subprocess.DEVNULL,
+            )
+            .decode()
+            .strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def measure(function, *args, memory: bool = True, **kwargs):
+    """
+    Runs a function and measures its duration and its peak memory.
+
+    The duration is measured on a first run, without tracing the memory
+    allocations which slow Python down, and the peak memory on a second run.
+
+    Args:
+        function (callable): The function to measure.
+        *args: The positional arguments of the function.
+        memory (bool): Whether to measure the peak memory.
+        **kwargs: The keyword arguments of the function.
+
+    Returns:
+        tuple: The output of the function and a dictionary with the keys
+            'seconds' and 'peak_memory_bytes'.
+    """
+    gc.collect()
+    start = time.perf_counter()
+    output = function(*args, **kwargs)
+    seconds = time.perf_counter() - start
+
+    peak = None
+    if memory:
+        del output
+        gc.collect()
+        tracemalloc.start()
+        output = function(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return output, {"seconds": seconds, "peak_memory_bytes": peak}
+
+
+def get_metadata() -> dict:
+    """
+    Returns the description of the machine and of the commit of a run.
+    """
+    return {
+        "commit": get_commit(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def write_results(
+    results: list, output_path: str = None, benchmark: str = None
+) -> str:
+    """
+    Writes the results of a run in a JSON file with the metadata of the run.
+
+    Args:
+        results (list): The list of dictionaries of results.
+        output_path (str, optional): The path of the JSON file. Defaults to
+            ``benchmarks/results/<commit>.json``, or to
+            ``benchmarks/results/<commit>-<benchmark>.json`` when the name of
+            the benchmark is given.
+        benchmark (str, optional): The name of the benchmark.
+
+    Returns:
+        str: The path of the JSON file.
+    """
+    metadata = get_metadata()
+    if output_path is None:
+        name = metadata["commit"]
+        if benchmark is not None:
+            name += f"-{benchmark}"
+        output_path = os.path.join(RESULTS_DIR, f"{name}.json")
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {"metadata": metadata, "results": results},
+            f,
+            indent=4,
+            ensure_ascii=False,
+        )
+    return output_path
+
+
+def read_results(path: str) -> dict:
+    """
+    Reads a JSON file of results and indexes them by their key.
+
+    Args:
+        path (str): The path of the JSON file.
+
+    Returns:
+        dict: The results, indexed by their (benchmark, tier, stage) key.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        results = json.load(f)["results"]
+    return {
+        (result["benchmark"], result["tier"], result["stage"]): result
+        for result in results
+    }
@@ -10,14 +10,16 @@ import json
 import os
 import re
 
-import nltk
 import pandas as pd
 from openai import OpenAI
 from tqdm import tqdm
 
+from vroom.cooccurences import TokenWindow, get_cooccurences_in_window
 from vroom.GPTTokenizer import GPTTokenizer
 from vroom.GraphManager import GraphManager
 from vroom.NER import chunk_text
+from vroom.TokenIndex import TokenIndex
+from vroom.tokenize import token_spans
 
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
 if not OPENAI_API_KEY:
@@ -31,19 +33,26 @@ model = "gpt-3.5-turbo-1106"  # gpt-4-1106-preview
 tokenizer = GPTTokenizer(model)
 
 
-def cooccurences_from_gpt_json(text, entities):
+def cooccurences_from_gpt_json(text, entities, tokenizer="nltk"):
     """
     Calculate cooccurrences from the entities generated by GPT logged in a json.
 
     Args:
         text (str): The text to analyze.
         entities (dict): The entities generated by GPT.
+        tokenizer (str): The tokenizer of ``vroom.tokenize``, "nltk" or "regex".
 
     Returns:
         list: A list of tuples of entities.
     """
     # Tokeniser le texte
-    tokens = nltk.word_tokenize(text)
+    token_index = TokenIndex(text, token_spans(text, tokenizer))
+    tokens = token_index.tokens()
+    # Positions de chaque token, pour ne comparer un alias qu'aux endroits où il peut commencer
+    token_positions = {}
+    for i, token in enumerate(tokens):
+        token_positions.setdefault(token, []).append(i)
+
     # Créer un dictionnaire pour stocker les positions de chaque alias
     alias_positions = {}
 
@@ -51,15 +60,38 @@ def cooccurences_from_gpt_json(text, entities):
     for _, info in entities.items():
         aliases = info["aliases"]
         for alias in aliases:
-            alias_words = nltk.word_tokenize(alias)
+            alias_spans = token_spans(alias, tokenizer)
+            alias_words = TokenIndex(alias, alias_spans).tokens()
+            if not alias_words:
+                continue
             alias_length = len(alias_words)
 
-            # Parcourir les tokens pour trouver les occurrences de l'alias
-            for i in range(len(tokens) - alias_length + 1):
+            # Parcourir les occurrences du premier token de l'alias
+            for i in token_positions.get(alias_words[0], []):
                 if tokens[i : i + alias_length] == alias_words:
                     # Ajouter la position de début de l'alias dans le texte
                     alias_positions.setdefault(alias, []).append(i)
 
+    # Les alias à moins de 25 tokens l'un de l'autre, en une seule passe sur leurs positions
+    mentions = sorted(
+        (position, alias)
+        for alias, positions in alias_positions.items()
+        for position in set(positions)
+    )
+    mentions = [
+        {
+            "word": alias,
+            "start": int(token_index.starts[position]),
+            "end": int(token_index.starts[position]),
+        }
+        for position, alias in mentions
+    ]
+    window = TokenWindow(25, token_index, exact=False)
+    close_aliases = set()
+    for alias1, alias2 in get_cooccurences_in_window(text, mentions, window):
+        close_aliases.add((alias1, alias2))
+        close_aliases.add((alias2, alias1))
+
     cooccurrences = []
     for entity1, aliases1 in entities.items():
         for entity2, aliases2 in entities.items():
@@ -71,10 +103,9 @@ def cooccurences_from_gpt_json(text, entities):
                             alias1 in alias_positions
                             and alias2 in alias_positions
                         ):
-                            if any(
-                                abs(pos1 - pos2) <= 25
-                                for pos1 in alias_positions[alias1]
-                                for pos2 in alias_positions[alias2]
+                            if (
+                                alias1 == alias2
+                                or (alias1, alias2) in close_aliases
                             ):
                                 # Ajouter la paire de listes d'alias à la liste de cooccurrences
                                 cooccurrences.append(
@@ -1,7 +1,7 @@
 r""" Evaluate the NER model on the Kaggle dataset.
 
 Usage:
-    python evaluate_NER.py
+    python evaluate_NER.py [--device cpu]
 
     This script will evaluate the NER model on the Kaggle dataset.
     It will compute the precision, recall, f1_score and accuracy of the model.
@@ -11,9 +11,11 @@ Authors
  * Adel MOUMEN 2023
  """
 
+import argparse
 import os
 import re
 
+from vroom.ModelRegistry import get_default_device
 from vroom.NER import (get_entities_from_file, read_file,
                        search_names_with_determinants, tag_text_with_entities)
 
@@ -24,7 +26,16 @@ labeled_chapter = os.path.join(
     "../data", "test_set", "prelude_a_fondation", "chapter_1.labeled"
 )
 
-entities, chunks = get_entities_from_file(unlabeled_chapter, device="cuda")
+parser = argparse.ArgumentParser(description="Evaluates the NER model.")
+parser.add_argument(
+    "--device",
+    default=get_default_device(),
+    help="The device of the NER model. Defaults to cuda when a GPU is "
+    "available, and to cpu otherwise.",
+)
+args = parser.parse_args()
+
+entities, chunks = get_entities_from_file(unlabeled_chapter, device=args.device)
 
 all_entities_names = []
 for chunk in entities:
@@ -4,8 +4,8 @@ import re
 
 from openai import OpenAI
 
-from vroom.NER import (chunk_text_by_sentence, get_positions_of_entities,
-                       read_file, tag_text_with_entities)
+from vroom.EntitySpans import EntitySpans
+from vroom.NER import chunk_text_by_sentence, read_file
 
 unlabeled_chapter = os.path.join(
     "data", "test_set", "prelude_a_fondation", "chapter_1.unlabeled"
@@ -132,13 +132,13 @@ print(labeled_gpt_entities)
 
 labeled_gpt_entities += ["l’Empereur"]
 
-unlabeled_text_tagged = tag_text_with_entities(
-    unlabeled_chapter, labeled_gpt_entities
+# The spans are compared in the texts without whitespaces, since the tags of
+# the labeled chapter add spaces around the names.
+positions_ner = list(
+    EntitySpans.from_names(content, labeled_gpt_entities).compact(content)
 )
-labeled_text_tagged = read_file(labeled_chapter)
-
-positions_ner = get_positions_of_entities(unlabeled_text_tagged)
-true_position = get_positions_of_entities(labeled_text_tagged)
+labeled_text, true_spans = EntitySpans.from_tagged(read_file(labeled_chapter))
+true_position = list(true_spans.compact(labeled_text))
 
 
 def evaluate_ner(positions_ner, true_position):
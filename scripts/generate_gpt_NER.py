@@ -14,13 +14,14 @@ import pandas as pd
 from openai import OpenAI
 from tqdm import tqdm
 
-from vroom.baseline import (find_cooccurences_aliases,
-                            get_aliases_fuzzy_partial_token, get_cooccurences)
+from vroom.alias import get_aliases_fuzzy_partial_token
+from vroom.baseline import find_cooccurences_aliases
+from vroom.cooccurences import get_cooccurences
+from vroom.EntitySpans import EntitySpans
 from vroom.GraphManager import GraphManager
 from vroom.loggers import JSONLogger
 from vroom.NER import (chunk_text_by_sentence, get_entities_from_file,
-                       get_positions_of_entities, read_file,
-                       tag_text_with_entities)
+                       read_file)
 
 
 def submission(
@@ -853,9 +854,9 @@ def get_coocurrences_GPT_ner_GPT(input_file, entities, logger=None):
     for key in generated_content:
         aliases.append(generated_content[key])
 
-    tagged_file = tag_text_with_entities(input_file, gpt_entities)
-    positions = [get_positions_of_entities(tagged_file)]
-    cooccurences = get_cooccurences([tagged_file], positions)
+    text = read_file(input_file)
+    positions = [EntitySpans.from_names(text, gpt_entities)]
+    cooccurences = get_cooccurences([text], positions)
     gpt_entities = [{"word": entity} for entity in gpt_entities]
     cooccurences_aliases = find_cooccurences_aliases(cooccurences, aliases)
     save = {
@@ -6,6 +6,7 @@ Authors
 """
 
 
+import argparse
 import html
 import os
 
@@ -14,12 +15,22 @@ from tqdm import tqdm
 
 from vroom.baseline import get_cooccurences_with_aliases_and_gpt
 from vroom.GraphManager import GraphManager
+from vroom.InferenceConfig import InferenceConfig
 from vroom.loggers import JSONLogger
+from vroom.ModelRegistry import default_registry, get_default_device
+from vroom.NERCache import default_cache
 
 
-def generate_submission():
+def generate_submission(
+    inference_config: InferenceConfig = None, device: str = "cpu"
+):
     """
     Generates a submission file from the texts in the data/kaggle directory.
+
+    Args:
+        inference_config (InferenceConfig, optional): The settings of PyTorch
+            for the NER, saved with the predictions of each chapter.
+        device (str): The device of the NER model.
     """
 
     books = [
@@ -28,6 +39,8 @@ def generate_submission():
     ]
 
     df_dict = {"ID": [], "graphml": []}
+    # The NER model is loaded once and shared by all the chapters.
+    default_registry.warmup(device=device)
 
     for chapters, book_code in tqdm(books):
         for chapter in tqdm(chapters):
@@ -43,7 +56,9 @@ def generate_submission():
             save_path = os.path.join(experiment_name, f"chapter_{chapter}.json")
             print("save_path : ", save_path)
             logger = JSONLogger(save_path)
-            coocurrences = get_cooccurences_with_aliases_and_gpt(path, logger)
+            coocurrences = get_cooccurences_with_aliases_and_gpt(
+                path, logger, inference_config, device
+            )
             graph_manager.add_cooccurrences(coocurrences)
             df_dict["ID"].append(f"{book_code}{chapter-1}")
             df_dict["graphml"].append(
@@ -59,4 +74,50 @@ def generate_submission():
 
 
 if __name__ == "__main__":
-    generate_submission()
+    parser = argparse.ArgumentParser(description="Generates a submission.")
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Run the NER model on every chapter instead of reading its "
+        "entities from the cache.",
+    )
+    parser.add_argument(
+        "--device",
+        default=get_default_device(),
+        help="The device of the NER model. Defaults to cuda when a GPU is "
+        "available, and to cpu otherwise.",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="The number of intra-op threads of torch.",
+    )
+    parser.add_argument(
+        "--interop-threads",
+        type=int,
+        default=None,
+        help="The number of inter-op threads of torch.",
+    )
+    parser.add_argument(
+        "--no-inference-mode",
+        action="store_true",
+        help="Run the NER model without torch.inference_mode.",
+    )
+    parser.add_argument(
+        "--bf16",
+        action="store_true",
+        help="Run the NER model in bfloat16 autocast, on CPU only.",
+    )
+    args = parser.parse_args()
+    # The cache of the NER is disabled by default in the library.
+    default_cache.enabled = not args.no_cache
+    generate_submission(
+        InferenceConfig(
+            inference_mode=not args.no_inference_mode,
+            intra_op_threads=args.threads,
+            inter_op_threads=args.interop_threads,
+            bf16_autocast=args.bf16,
+        ),
+        args.device,
+    )
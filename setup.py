@@ -24,7 +24,10 @@ setup(
         "Programming Language :: Python :: 3.9",
         "Operating System :: OS Independent",
     ],
-    install_requires=["torch", "transformers", "jinja2", "openai"],
-    extras_require={"dev": ["pytest>=7.0", "twine>=4.0.2"]},
+    install_requires=["numpy", "torch", "transformers", "jinja2", "openai"],
+    extras_require={
+        "dev": ["pytest>=7.0", "twine>=4.0.2"],
+        "onnx": ["optimum[onnxruntime]"],
+    },
     python_requires=">=3.6",
 )
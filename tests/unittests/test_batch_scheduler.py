@@ -0,0 +1,67 @@
+r"""This package contains the functions to test the BatchScheduler class.
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import pytest
+
+from vroom.BatchScheduler import BatchScheduler
+
+LENGTHS = [120, 510, 30, 480, 500, 90, 60, 510]
+
+
+class TestBatchScheduler:
+    """
+    Tests for the batching of the chunks under a budget of tokens.
+    """
+
+    def test_budget(self):
+        """
+        The padded batches fit the budget and hold every text once.
+        """
+        scheduler = BatchScheduler(max_tokens=1024)
+        batches = scheduler.schedule(LENGTHS)
+        assert sorted(i for batch in batches for i in batch) == list(
+            range(len(LENGTHS))
+        )
+        for batch in batches:
+            longest = max(LENGTHS[i] for i in batch)
+            assert len(batch) * longest <= 1024
+            # The first text of a batch is its longest one.
+            assert LENGTHS[batch[0]] == longest
+        assert batches == [[1, 7], [4, 3], [0, 5, 6, 2]]
+
+    def test_padding_efficiency(self):
+        scheduler = BatchScheduler(max_tokens=1024)
+        scheduler.schedule(LENGTHS)
+        padded = 2 * 510 + 2 * 500 + 4 * 120
+        assert scheduler.n_batches == 3
+        assert scheduler.padding_efficiency == sum(LENGTHS) / padded
+
+        # The statistics are accumulated over the runs.
+        scheduler.schedule([100, 50])
+        assert scheduler.n_tokens == sum(LENGTHS) + 150
+        assert scheduler.n_padded_tokens == padded + 200
+        scheduler.reset()
+        assert scheduler.padding_efficiency == 1.0
+
+    def test_max_batch_size(self):
+        scheduler = BatchScheduler(max_batch_size=3)
+        batches = scheduler.schedule(LENGTHS)
+        assert [len(batch) for batch in batches] == [3, 3, 2]
+
+    def test_long_text(self):
+        """
+        A text longer than the budget is a batch on its own.
+        """
+        scheduler = BatchScheduler(max_tokens=256)
+        batches = scheduler.schedule([300, 100, 100])
+        assert batches == [[0], [1, 2]]
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            BatchScheduler()
+        with pytest.raises(ValueError):
+            BatchScheduler(max_batch_size=0)
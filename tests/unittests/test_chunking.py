@@ -0,0 +1,193 @@
+r"""This package contains the functions to test the chunking by subwords.
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import re
+
+import pytest
+
+from vroom.chunking import (
+    chunk_text,
+    chunk_text_by_sentence,
+    chunk_text_by_tokens,
+    get_token_chunk_spans,
+    iter_chunk_windows,
+    merge_chunk_entities,
+)
+
+TEXT = (
+    "Hari Seldon regarda Dors Venabili. Dors Venabili sourit à Hari Seldon, "
+    "puis Raych entra dans le couloir du palais impérial avec Hummin."
+)
+
+
+class FakeTokenizer:
+    """
+    Splits the words and the punctuation signs into subwords of at most three
+    characters, as a fast tokenizer with its offset mapping.
+    """
+
+    # Ten subwords with the special tokens and the margin.
+    model_max_length = 20
+
+    def num_special_tokens_to_add(self):
+        return 2
+
+    def __call__(self, text, add_special_tokens, return_offsets_mapping):
+        offsets = [
+            (match.start() + i, min(match.start() + i + 3, match.end()))
+            for match in re.finditer(r"\w+|[^\w\s]", text)
+            for i in range(0, match.end() - match.start(), 3)
+        ]
+        return {"offset_mapping": [(0, 0)] + offsets + [(0, 0)]}
+
+
+class PrefixTokenizer(FakeTokenizer):
+    """
+    Splits the first word of a text into characters, so that a chunk tokenized
+    alone has more subwords than its slice of the whole text.
+    """
+
+    def __call__(self, text, add_special_tokens, return_offsets_mapping):
+        offsets = super().__call__(
+            text, add_special_tokens, return_offsets_mapping
+        )["offset_mapping"][1:-1]
+        first = re.match(r"\s*\w+", text)
+        if first is not None:
+            start = first.end() - len(first.group().lstrip())
+            offsets = [(i, i + 1) for i in range(start, first.end())] + [
+                span for span in offsets if span[0] >= first.end()
+            ]
+        return {"offset_mapping": [(0, 0)] + offsets + [(0, 0)]}
+
+
+def get_person_entities(text):
+    """
+    Returns the capitalized words as entities, with the two-word names
+    "Hari Seldon" and "Dors Venabili" as one entity.
+    """
+    pattern = r"Hari Seldon|Dors Venabili|[A-Z]\w+"
+    return [
+        {
+            "entity_group": "PER",
+            "word": match.group(),
+            "start": match.start(),
+            "end": match.end(),
+        }
+        for match in re.finditer(pattern, text)
+    ]
+
+
+class TestChunking:
+    def test_chunk_text(self):
+        chunks = chunk_text(TEXT, chunk_size=30)
+        assert " ".join(chunks) == TEXT
+        # The space before the last word is not counted in the chunk size.
+        assert all(0 < len(chunk) <= 31 for chunk in chunks)
+        # A chunk is only cut when the next word does not fit.
+        for chunk, next_chunk in zip(chunks, chunks[1:]):
+            assert len(chunk) + len(next_chunk.split()[0]) > 30
+
+    def test_chunk_windows(self):
+        """
+        The chunks of a text given by windows are those of the whole text.
+        """
+        text = " " + TEXT
+        # The windows are cut after a space.
+        a = text.index(" ", 20) + 1
+        b = text.index(" ", 75) + 1
+        windows = [(0, text[:a]), (a, text[a:b]), (b, text[b:])]
+        chunks = list(iter_chunk_windows(windows, chunk_size=30))
+        assert [chunk for _, chunk in chunks] == chunk_text(TEXT, 30)
+        for offset, chunk in chunks:
+            assert text[offset : offset + len(chunk)] == chunk
+        assert list(iter_chunk_windows([])) == []
+
+    def test_chunk_text_by_sentence(self):
+        chunks = chunk_text_by_sentence(TEXT, batch_size=1, tokenizer="regex")
+        assert chunks == [
+            "Hari Seldon regarda Dors Venabili.",
+            TEXT[35:],
+        ]
+        assert chunk_text_by_sentence(TEXT, tokenizer="regex") == [TEXT]
+
+    def test_chunks_fit_the_budget(self):
+        tokenizer = FakeTokenizer()
+        chunks, offsets = chunk_text_by_tokens(TEXT, tokenizer, stride=3)
+        for chunk, offset in zip(chunks, offsets):
+            assert TEXT[offset : offset + len(chunk)] == chunk
+            n_tokens = len(
+                tokenizer(chunk, False, True)["offset_mapping"][1:-1]
+            )
+            assert n_tokens <= 10
+            # The chunks start and end at a word boundary.
+            assert offset == 0 or TEXT[offset - 1] == " "
+            assert chunk == chunk.strip()
+
+        assert offsets[0] == 0
+        assert offsets[-1] + len(chunks[-1]) == len(TEXT)
+
+    def test_retokenized_chunks_fit_the_model(self):
+        """
+        The chunks of the default size still fit the model when the pipeline
+        tokenizes them again into more subwords.
+        """
+        tokenizer = PrefixTokenizer()
+        budget = tokenizer.model_max_length
+
+        def get_length(chunk):
+            return len(tokenizer(chunk, True, True)["offset_mapping"])
+
+        # Without the margin, a chunk exceeds the input size of the model.
+        chunks, _ = chunk_text_by_tokens(
+            TEXT, tokenizer, max_tokens=budget - 2, stride=3
+        )
+        assert max(map(get_length, chunks)) > budget
+
+        chunks, offsets = chunk_text_by_tokens(TEXT, tokenizer, stride=3)
+        assert len(chunks) > 1
+        assert all(get_length(chunk) <= budget for chunk in chunks)
+        assert offsets[-1] + len(chunks[-1]) == len(TEXT)
+
+    def test_overlap(self):
+        tokenizer = FakeTokenizer()
+        _, offsets = chunk_text_by_tokens(TEXT, tokenizer, stride=0)
+        chunks, overlapping_offsets = chunk_text_by_tokens(
+            TEXT, tokenizer, stride=4
+        )
+        assert len(overlapping_offsets) > len(offsets)
+        for i in range(1, len(chunks)):
+            previous_end = overlapping_offsets[i - 1] + len(chunks[i - 1])
+            assert overlapping_offsets[i] < previous_end
+
+    def test_no_boundary_loss(self):
+        expected = get_person_entities(TEXT)
+        for stride in (2, 4, 6):
+            chunks, offsets = chunk_text_by_tokens(
+                TEXT, FakeTokenizer(), max_tokens=8, stride=stride
+            )
+            entities = merge_chunk_entities(
+                [get_person_entities(chunk) for chunk in chunks], offsets
+            )
+            assert entities == expected
+
+    def test_merge_keeps_the_longest(self):
+        cut = {"word": "Hari", "start": 2, "end": 6}
+        whole = {"word": "Hari Seldon", "start": 0, "end": 11}
+        other = {"word": "Dors", "start": 3, "end": 7}
+        entities = merge_chunk_entities([[cut, other], [whole]], [10, 10])
+        assert entities == [{"word": "Hari Seldon", "start": 10, "end": 21}]
+
+    def test_long_word(self):
+        text = "a " + "b" * 20 + " c"
+        offsets = [(0, 1)] + [(i, i + 2) for i in range(2, 22, 2)] + [(23, 24)]
+        spans = get_token_chunk_spans(text, offsets, max_tokens=4, stride=1)
+        # A word longer than a chunk is split, without overlap.
+        assert spans == [(0, 1), (2, 10), (10, 18), (18, 24)]
+
+    def test_invalid_stride(self):
+        with pytest.raises(ValueError):
+            get_token_chunk_spans(TEXT, [(0, 4)], max_tokens=4, stride=4)
@@ -0,0 +1,458 @@
+r"""This package contains the functions to test the co-occurences extraction.
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import copy
+import os
+
+import nltk
+import pytest
+
+from vroom.cooccurences import (
+    CharacterWindow,
+    CooccurrenceAccumulator,
+    ParagraphWindow,
+    SentenceWindow,
+    TokenWindow,
+    count_cooccurences,
+    get_cooccurences,
+    get_cooccurences_in_window,
+    get_cooccurences_sliding_window,
+    get_cooccurences_sweep,
+    get_entities_offsets,
+)
+from vroom.CooccurrenceMatrix import CooccurrenceMatrix
+from vroom.EntitySpans import EntitySpans
+from vroom.tokenize import count_tokens
+
+
+def _has_punkt():
+    try:
+        nltk.word_tokenize("Test.")
+    except LookupError:
+        return False
+    return True
+
+
+pytestmark = pytest.mark.skipif(
+    not _has_punkt(), reason="nltk punkt data is not available"
+)
+
+
+def _entity(chunk, word, occurrence=0):
+    start = -1
+    for _ in range(occurrence + 1):
+        start = chunk.index(word, start + 1)
+    return {
+        "entity_group": "PER",
+        "word": word,
+        "start": start,
+        "end": start + len(word),
+    }
+
+
+CHUNKS = [
+    "Étouffant un léger bâillement, Cléon demanda : « Demerzel, auriez-vous, "
+    "par hasard, entendu parler d’un certain Hari Seldon ? » Cléon était "
+    "empereur depuis dix ans à peine.",
+    "Seldon l’ignorait encore. Il y avait des moments où, pourvu qu’il fût revêtu des atours et "
+    "ornements idoines, il réussissait à paraître majestueux. Il y était "
+    "arrivé, par exemple, pour son portrait. Plus tard, Seldon rencontra "
+    "Demerzel dans les jardins du palais, puis Hummin.",
+]
+
+LABELED_CHAPTER = os.path.join(
+    os.path.dirname(__file__),
+    "..",
+    "..",
+    "data",
+    "test_set",
+    "prelude_a_fondation",
+    "chapter_1.labeled",
+)
+
+
+def _entities():
+    return [
+        [
+            _entity(CHUNKS[0], "Cléon"),
+            _entity(CHUNKS[0], "Demerzel"),
+            _entity(CHUNKS[0], "Hari Seldon"),
+            _entity(CHUNKS[0], "Cléon", 1),
+        ],
+        [
+            _entity(CHUNKS[1], "Seldon"),
+            _entity(CHUNKS[1], "Seldon", 1),
+            _entity(CHUNKS[1], "Demerzel"),
+            _entity(CHUNKS[1], "Hummin"),
+        ],
+    ]
+
+
+class TestSlidingWindow:
+    """
+    Tests for the single pass co-occurences engine.
+    """
+
+    def test_same_output_as_pairwise(self):
+        """
+        The sliding window engine returns the same interactions, in the same
+        order, as the pairwise implementation.
+        """
+        expected = get_cooccurences(CHUNKS, _entities())
+        assert get_cooccurences_sliding_window(CHUNKS, _entities()) == expected
+
+    @pytest.mark.parametrize("window_size", [0, 1, 5, 10, 25, 60])
+    def test_window_sizes(self, window_size):
+        """
+        Only the entities within the window are paired.
+        """
+        text = " ".join(CHUNKS)
+        entities = [
+            entity
+            for sublist in copy.deepcopy(_entities())
+            for entity in sublist
+        ]
+        for entity in entities[4:]:
+            entity["start"] += len(CHUNKS[0]) + 1
+            entity["end"] += len(CHUNKS[0]) + 1
+        expected = []
+        for i, entity in enumerate(entities):
+            for other in entities[i + 1 :]:
+                substring = text[entity["end"] : other["start"]]
+                if entity["word"] != other["word"] and (
+                    len(nltk.word_tokenize(substring)) <= window_size
+                ):
+                    expected.append((entity["word"], other["word"]))
+
+        interactions = get_cooccurences_sliding_window(
+            CHUNKS, _entities(), window_size=window_size
+        )
+        assert interactions == expected
+
+    @pytest.mark.parametrize("window_size", [0, 5, 25])
+    def test_regex_tokenizer(self, window_size):
+        """
+        With the regex tokenizer, the tokens between the entities are counted
+        with ``vroom.tokenize``.
+        """
+        text = " ".join(CHUNKS)
+        words = [
+            entity["word"] for sublist in _entities() for entity in sublist
+        ]
+        starts, ends = get_entities_offsets(
+            [len(chunk) for chunk in CHUNKS],
+            [
+                [(entity["start"], entity["end"]) for entity in sublist]
+                for sublist in _entities()
+            ],
+        )
+        expected = []
+        for i in range(len(words)):
+            for j in range(i + 1, len(words)):
+                substring = text[ends[i] : starts[j]]
+                if words[i] != words[j] and (
+                    count_tokens(substring) <= window_size
+                ):
+                    expected.append((words[i], words[j]))
+
+        interactions = get_cooccurences_sliding_window(
+            CHUNKS, _entities(), window_size=window_size, tokenizer="regex"
+        )
+        assert interactions == expected
+        accumulator = CooccurrenceAccumulator(window_size, tokenizer="regex")
+        for chunk, chunk_entities in zip(CHUNKS, _entities()):
+            accumulator.feed(chunk, chunk_entities)
+        assert accumulator.finalize() == expected
+
+    def test_entities_untouched(self):
+        """
+        The offsets of the entities are not modified, so that the same
+        entities can be used several times.
+        """
+        entities = _entities()
+        first = get_cooccurences_sliding_window(CHUNKS, entities)
+        assert entities == _entities()
+        assert get_cooccurences_sliding_window(CHUNKS, entities) == first
+        get_cooccurences(CHUNKS, entities)
+        get_cooccurences_sweep(CHUNKS, entities, [5, 25])
+        assert entities == _entities()
+
+    def test_entities_offsets(self):
+        """
+        The offsets in the joined text are shifted by the length of the
+        previous chunks and the spaces joining them.
+        """
+        starts, ends = get_entities_offsets(
+            [len(chunk) for chunk in CHUNKS],
+            [
+                [(entity["start"], entity["end"]) for entity in sublist]
+                for sublist in _entities()
+            ],
+        )
+        text = " ".join(CHUNKS)
+        words = [
+            entity["word"] for sublist in _entities() for entity in sublist
+        ]
+        assert [text[s:e] for s, e in zip(starts, ends)] == words
+        assert starts[4] == len(CHUNKS[0]) + 1
+
+    def test_counted(self):
+        """
+        The counted mode gives the number of interactions of each pair, in
+        canonical order.
+        """
+        interactions = get_cooccurences(CHUNKS, _entities())
+        counted = get_cooccurences(CHUNKS, _entities(), counted=True)
+        assert sum(counted.values()) == len(interactions)
+        assert all(a <= b for a, b in counted)
+        assert counted[("Cléon", "Demerzel")] == interactions.count(
+            ("Cléon", "Demerzel")
+        ) + interactions.count(("Demerzel", "Cléon"))
+        assert counted == count_cooccurences(interactions)
+        assert (
+            get_cooccurences_sliding_window(CHUNKS, _entities(), counted=True)
+            == counted
+        )
+
+    def test_unsorted_entities(self):
+        """
+        Entities that are not sorted by position fall back to the pairwise
+        comparison.
+        """
+        entities = _entities()
+        entities[0].reverse()
+        expected = get_cooccurences(CHUNKS, copy.deepcopy(entities))
+        assert get_cooccurences_sliding_window(CHUNKS, entities) == expected
+
+    def test_same_output_as_pairwise_on_chapter(self):
+        """
+        The sliding window engine returns the same interactions as the
+        pairwise implementation on a real tagged chapter, whose dialogues,
+        abbreviations and elisions are re-tokenized at the window edges.
+        The chapter is cut after its 30th entity to keep the pairwise
+        implementation fast, and split into chunks at its line breaks.
+        """
+        if not os.path.exists(LABELED_CHAPTER):
+            pytest.skip("the tagged chapter is not available")
+        with open(LABELED_CHAPTER, encoding="utf-8") as f:
+            tagged = f.read()
+        end = 0
+        for _ in range(30):
+            end = tagged.index("</PER>", end) + len("</PER>")
+        lines = tagged[:end].split("\n")
+        size = len(lines) // 3
+        chunks, entities = [], []
+        for i in range(0, len(lines), size):
+            text, spans = EntitySpans.from_tagged(
+                "\n".join(lines[i : i + size])
+            )
+            chunks.append(text)
+            entities.append(spans.to_entities())
+        assert sum(len(sublist) for sublist in entities) == 30
+
+        expected = get_cooccurences(chunks, copy.deepcopy(entities))
+        assert expected
+        assert get_cooccurences_sliding_window(chunks, entities) == expected
+        assert get_cooccurences_sliding_window(
+            chunks, entities, counted=True
+        ) == count_cooccurences(expected)
+
+
+class TestSweep:
+    """
+    Tests for the extraction of several window sizes in a single pass.
+    """
+
+    def test_same_counts_as_sliding_window(self):
+        """
+        Each window size gives the same counts as a separate extraction.
+        """
+        window_sizes = [25, 0, 5, 10, 60]
+        matrices = get_cooccurences_sweep(CHUNKS, _entities(), window_sizes)
+        assert sorted(matrices) == sorted(window_sizes)
+        for window_size in window_sizes:
+            expected = CooccurrenceMatrix.from_interactions(
+                get_cooccurences_sliding_window(
+                    CHUNKS, _entities(), window_size=window_size
+                )
+            )
+            for name_a, name_b, count in expected.to_edge_list():
+                assert matrices[window_size].count(name_a, name_b) == count
+            assert len(matrices[window_size]) == len(expected)
+
+    def test_character_window(self):
+        """
+        The sweep accepts another window definition.
+        """
+        matrices = get_cooccurences_sweep(
+            [TestWindows.text],
+            [TestWindows().entities()],
+            [10, 29],
+            CharacterWindow(0),
+        )
+        assert matrices[10].to_edge_list() == [("Seldon", "Dors", 1)]
+        assert matrices[29].count("Hummin", "Cléon") == 1
+
+
+class TestCooccurrenceAccumulator:
+    """
+    Tests for the streaming co-occurences extraction.
+    """
+
+    def test_same_output_as_pairwise(self):
+        """
+        Feeding the chunks one by one gives the same interactions as the
+        pairwise implementation, including across the chunk boundary.
+        """
+        entities = _entities()
+        accumulator = CooccurrenceAccumulator()
+        for chunk, chunk_entities in zip(CHUNKS, entities):
+            accumulator.feed(chunk, chunk_entities)
+        interactions = accumulator.finalize()
+
+        assert interactions == get_cooccurences(CHUNKS, _entities())
+        assert ("Cléon", "Seldon") in interactions
+        assert accumulator.finalize(counted=True) == count_cooccurences(
+            interactions
+        )
+
+    def test_counted(self):
+        """
+        A counting accumulator gives the counts of the pairwise
+        implementation without keeping the interactions.
+        """
+        accumulator = CooccurrenceAccumulator(counted=True)
+        for chunk, chunk_entities in zip(CHUNKS, _entities()):
+            accumulator.feed(chunk, chunk_entities)
+        expected = get_cooccurences(CHUNKS, _entities(), counted=True)
+        assert accumulator.finalize() == expected
+        assert accumulator.interactions == []
+        with pytest.raises(ValueError):
+            accumulator.finalize(counted=False)
+
+    def test_sink(self):
+        """
+        The interactions passed to the sink are those of the pairwise
+        implementation, and they are not kept.
+        """
+        interactions = []
+        accumulator = CooccurrenceAccumulator(sink=interactions.append)
+        for chunk, chunk_entities in zip(CHUNKS, _entities()):
+            accumulator.feed(chunk, chunk_entities)
+        assert accumulator.finalize() == []
+        assert interactions == get_cooccurences(CHUNKS, _entities())
+
+    def test_entities_untouched(self):
+        """
+        The offsets of the entities are not modified.
+        """
+        entities = _entities()
+        accumulator = CooccurrenceAccumulator()
+        for chunk, chunk_entities in zip(CHUNKS, entities):
+            accumulator.feed(chunk, chunk_entities)
+        accumulator.finalize()
+        assert entities == _entities()
+
+    def test_bounded_state(self):
+        """
+        Only the end of the text within the window is kept between chunks.
+        """
+        chunk = " ".join(["mot"] * 200) + " Seldon"
+        accumulator = CooccurrenceAccumulator(window_size=5)
+        for _ in range(10):
+            accumulator.feed(chunk, [_entity(chunk, "Seldon")])
+        assert len(accumulator._pending) == 1
+        assert len(accumulator._text) < len(chunk)
+
+    def test_unsorted_entities(self):
+        """
+        Entities that are not sorted by position are rejected.
+        """
+        entities = _entities()[0]
+        entities.reverse()
+        with pytest.raises(ValueError):
+            CooccurrenceAccumulator().feed(CHUNKS[0], entities)
+
+
+class TestWindows:
+    """
+    Tests for the definitions of the co-occurence window.
+    """
+
+    text = (
+        "Seldon parla à Dors. Puis il se tut.\n"
+        "     Hummin arriva enfin, suivi de Cléon."
+    )
+
+    def entities(self):
+        return [
+            _entity(self.text, word)
+            for word in ("Seldon", "Dors", "Hummin", "Cléon")
+        ]
+
+    def test_token_window(self):
+        """
+        The token window without verification counts the tokens between the
+        entities.
+        """
+        window = TokenWindow(2, exact=False)
+        assert get_cooccurences_in_window(
+            self.text, self.entities(), window
+        ) == [("Seldon", "Dors")]
+
+    def test_character_window(self):
+        """
+        The character window counts the characters between the entities.
+        """
+        window = CharacterWindow(10)
+        assert get_cooccurences_in_window(
+            self.text, self.entities(), window
+        ) == [("Seldon", "Dors")]
+        window = CharacterWindow(29)
+        assert ("Hummin", "Cléon") in get_cooccurences_in_window(
+            self.text, self.entities(), window
+        )
+
+    def test_sentence_window(self):
+        """
+        A sentence window of size 0 pairs the entities of a same sentence, and
+        of size 1 those of two consecutive sentences.
+        """
+        assert get_cooccurences_in_window(
+            self.text, self.entities(), SentenceWindow(0)
+        ) == [("Seldon", "Dors"), ("Hummin", "Cléon")]
+        assert ("Dors", "Hummin") not in get_cooccurences_in_window(
+            self.text, self.entities(), SentenceWindow(1)
+        )
+        assert ("Dors", "Hummin") in get_cooccurences_in_window(
+            self.text, self.entities(), SentenceWindow(2)
+        )
+
+    def test_paragraph_window(self):
+        """
+        The paragraphs are separated by an indented line.
+        """
+        assert get_cooccurences_in_window(
+            self.text, self.entities(), ParagraphWindow(0)
+        ) == [("Seldon", "Dors"), ("Hummin", "Cléon")]
+        assert (
+            len(
+                get_cooccurences_in_window(
+                    self.text, self.entities(), ParagraphWindow(1)
+                )
+            )
+            == 6
+        )
+
+    def test_sliding_window_with_window(self):
+        """
+        The sliding window extraction accepts another window definition.
+        """
+        interactions = get_cooccurences_sliding_window(
+            [self.text], [self.entities()], window=SentenceWindow(0)
+        )
+        assert interactions == [("Seldon", "Dors"), ("Hummin", "Cléon")]
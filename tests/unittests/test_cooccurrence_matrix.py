@@ -0,0 +1,93 @@
+r"""This package contains the functions to test the CooccurrenceMatrix class.
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+from vroom.CooccurrenceMatrix import CooccurrenceMatrix
+from vroom.GraphManager import GraphManager
+
+INTERACTIONS = [
+    ("Seldon", "Cléon"),
+    ("Cléon", "Seldon"),
+    ("Seldon", "Dors"),
+    ("Hari", "Cléon"),
+    ("Seldon", "Cléon"),
+]
+
+
+class TestCooccurrenceMatrix:
+    """
+    Tests for the co-occurence count matrix.
+    """
+
+    def setup_method(self):
+        self.matrix = CooccurrenceMatrix.from_interactions(INTERACTIONS)
+
+    def test_counts(self):
+        """
+        The matrix is symmetric and counts the repeated interactions.
+        """
+        assert self.matrix.names == ["Seldon", "Cléon", "Dors", "Hari"]
+        assert len(self.matrix) == 3
+        assert self.matrix.count("Seldon", "Cléon") == 3
+        assert self.matrix.count("Cléon", "Seldon") == 3
+        assert self.matrix.count("Dors", "Cléon") == 0
+        assert self.matrix.count("Dors", "Demerzel") == 0
+        dense = self.matrix.to_dense()
+        assert (dense == dense.T).all()
+        assert dense.sum() == 2 * len(INTERACTIONS)
+
+    def test_top_k(self):
+        """
+        The pairs are returned by decreasing count.
+        """
+        assert self.matrix.top_k(1) == [("Seldon", "Cléon", 3)]
+        assert len(self.matrix.top_k(10)) == 3
+
+    def test_merge(self):
+        """
+        Merging two matrices sums their counts over the union of the names.
+        """
+        other = CooccurrenceMatrix.from_interactions(
+            [("Demerzel", "Cléon"), ("Cléon", "Seldon")]
+        )
+        self.matrix.merge(other)
+        assert self.matrix.count("Seldon", "Cléon") == 4
+        assert self.matrix.count("Demerzel", "Cléon") == 1
+        assert len(self.matrix) == 4
+
+    def test_relabel(self):
+        """
+        The names sharing a label are summed and the pairs within a label are
+        dropped.
+        """
+        groups = {"Seldon": "Hari Seldon", "Hari": "Hari Seldon"}
+        groups["Cléon"] = "Cléon"
+        relabeled = self.matrix.relabel(groups)
+        assert relabeled.to_edge_list() == [("Hari Seldon", "Cléon", 4)]
+
+    def test_to_networkx(self):
+        """
+        The graph is weighted by the counts.
+        """
+        graph = self.matrix.to_networkx()
+        assert graph["Cléon"]["Seldon"]["weight"] == 3
+        assert graph.number_of_edges() == 3
+
+    def test_graph_manager(self):
+        """
+        The GraphManager builds the same weighted graph from the matrix as
+        from the list of interactions.
+        """
+        from_list = GraphManager(weighted=True)
+        from_list.add_cooccurrences([([a], [b]) for a, b in INTERACTIONS] * 2)
+        from_matrix = GraphManager(weighted=True)
+        from_matrix.add_cooccurrence_matrix(self.matrix.merge(self.matrix))
+        for graph_manager in (from_list, from_matrix):
+            graph = graph_manager.graph
+            assert graph["Cléon"]["Seldon"]["weight"] == 6
+            assert graph["Dors"]["Seldon"]["weight"] == 2
+            assert graph["Cléon"]["Hari"]["weight"] == 2
+            assert graph.number_of_edges() == 3
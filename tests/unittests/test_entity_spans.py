@@ -0,0 +1,56 @@
+r"""This package contains the functions to test the EntitySpans class.
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import pytest
+
+from vroom.cooccurences import get_cooccurences_sliding_window
+from vroom.EntitySpans import EntitySpans, Span
+
+TEXT = "Hari Seldon rencontra Cléon. Seldon salua Dors."
+NAMES = ["Hari Seldon", "Seldon", "Cléon", "Dors"]
+
+
+class TestEntitySpans:
+    """
+    Tests for the char offsets of the named entities.
+    """
+
+    def test_from_names(self):
+        spans = EntitySpans.from_names(TEXT, NAMES)
+        assert spans.words == ["Hari Seldon", "Cléon", "Seldon", "Dors"]
+        for span in spans:
+            assert TEXT[span.start : span.end] == span.word
+            assert span["start"] == span.start
+        assert spans[1] == Span("Cléon", 22, 27)
+        assert len(EntitySpans.from_names(TEXT, [])) == 0
+
+    def test_from_tagged_round_trip(self):
+        spans = EntitySpans.from_names(TEXT, NAMES)
+        text, tagged_spans = EntitySpans.from_tagged(spans.render(TEXT))
+        assert tagged_spans.words == spans.words
+        assert list(tagged_spans.compact(text)) == list(spans.compact(TEXT))
+
+    def test_cooccurences(self):
+        """
+        The spans give the same co-occurences as the entity dictionaries.
+        """
+        spans = EntitySpans.from_names(TEXT, NAMES)
+        chunks = [TEXT, TEXT]
+        expected = get_cooccurences_sliding_window(
+            chunks, [spans.to_entities()] * 2, window_size=3
+        )
+        assert (
+            get_cooccurences_sliding_window(chunks, [spans] * 2, window_size=3)
+            == expected
+        )
+        assert expected
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            EntitySpans(["Hari"], [0, 5], [4])
+        with pytest.raises(KeyError):
+            Span("Hari", 0, 4)["entity_group"]
@@ -87,6 +87,25 @@ class TestGraphManager:
             unweighted_graph.edges == self.unweighted_graph_manager.graph.edges
         )
 
+    def test_counted_cooccurrences(self):
+        """
+        Vérifie que les cooccurrences comptées donnent le même graphe que la
+        liste des cooccurrences.
+        """
+        counted = {}
+        for group_1, group_2 in self.cooccurrences * 3:
+            pair = (tuple(group_1), tuple(group_2))
+            counted[pair] = counted.get(pair, 0) + 1
+        graph_manager = GraphManager(weighted=True)
+        graph_manager.add_cooccurrences(counted)
+        expected = GraphManager(weighted=True)
+        expected.add_cooccurrences(self.cooccurrences * 3)
+        for name_1, name_2, weight in expected.graph.edges(data="weight"):
+            assert graph_manager.graph[name_1][name_2]["weight"] == weight
+        assert graph_manager.graph.nodes(data="names") == expected.graph.nodes(
+            data="names"
+        )
+
     def teardown_method(self):
         """
         Supprime les fichiers de graphe.
@@ -0,0 +1,62 @@
+r"""This package contains the functions to test the InferenceConfig class.
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import json
+
+import pytest
+
+from vroom import InferenceConfig as inference_config_module
+from vroom.InferenceConfig import InferenceConfig
+from vroom.ModelRegistry import get_model_id
+
+
+class TestInferenceConfig:
+    """
+    Tests for the inference settings of PyTorch.
+    """
+
+    def test_to_dict(self):
+        config = InferenceConfig(intra_op_threads=2, bf16_autocast=True)
+        saved = config.to_dict("cuda")
+        assert saved["intra_op_threads"] == 2
+        assert saved["bf16_autocast"] is True
+        # The bfloat16 autocast is only used on CPU.
+        assert saved["effective"]["bf16_autocast"] is False
+        # The configuration is saved by the JSONLogger.
+        assert json.loads(json.dumps(saved)) == saved
+
+    def test_context(self):
+        config = InferenceConfig()
+        config.apply()
+        with config.context():
+            value = sum(range(4))
+        assert value == 6
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            InferenceConfig(intra_op_threads=0)
+        with pytest.raises(ValueError):
+            InferenceConfig(inter_op_threads=-1)
+
+    def test_autocast_dtype(self, monkeypatch):
+        """
+        The bfloat16 autocast is part of the model identifier of the NER
+        cache, so that its entities are not mixed with those in float32.
+        """
+        monkeypatch.setattr(
+            inference_config_module, "is_bf16_supported", lambda: True
+        )
+        config = InferenceConfig(bf16_autocast=True)
+        assert config.get_autocast_dtype("cpu") == "bfloat16"
+        assert config.get_autocast_dtype("cuda") is None
+        assert InferenceConfig().get_autocast_dtype("cpu") is None
+        assert get_model_id(
+            "camembert-ner", autocast_dtype=config.get_autocast_dtype()
+        ) != get_model_id("camembert-ner")
+        assert get_model_id("camembert-ner", autocast_dtype=None) == (
+            get_model_id("camembert-ner")
+        )
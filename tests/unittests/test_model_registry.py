@@ -0,0 +1,215 @@
+r"""This package contains the functions to test the ModelRegistry class.
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import os
+import threading
+import time
+
+import pytest
+
+from vroom.ModelRegistry import (
+    ModelRegistry,
+    get_onnx_export_dir,
+    load_ner_pipeline,
+    load_onnx_ner_pipeline,
+)
+
+
+class FakePipeline:
+    def __init__(self, key):
+        self.key = key
+        self.texts = []
+
+    def __call__(self, text):
+        self.texts.append(text)
+        return []
+
+
+class TestModelRegistry:
+    """
+    Tests for the cache of the NER pipelines.
+    """
+
+    def setup_method(self):
+        self.loaded = []
+
+        def loader(source, device, dtype, backend):
+            self.loaded.append((source, device, dtype, backend))
+            return FakePipeline((source, device, dtype, backend))
+
+        self.registry = ModelRegistry(max_size=2, loader=loader)
+
+    def test_loaded_once(self):
+        """
+        A model is loaded once and shared by the next calls.
+        """
+        nlp = self.registry.get("camembert-ner")
+        assert self.registry.get("camembert-ner") is nlp
+        assert self.registry.get("camembert-ner", "cpu", "float32") is nlp
+        assert self.loaded == [("camembert-ner", "cpu", "float32", "torch")]
+
+    def test_keys(self):
+        """
+        The device, the dtype and the backend are part of the key.
+        """
+        self.registry.get("camembert-ner", "cpu")
+        self.registry.get("camembert-ner", "cuda")
+        self.registry.get("camembert-ner", "cuda", "bfloat16")
+        self.registry.get("camembert-ner", "cpu", backend="onnx-int8")
+        assert len(self.loaded) == 4
+        with pytest.raises(ValueError):
+            self.registry.get("camembert-ner", backend="openvino")
+
+    def test_lru_eviction(self):
+        """
+        The least recently used model is evicted.
+        """
+        self.registry.get("a")
+        self.registry.get("b")
+        self.registry.get("a")
+        self.registry.get("c")
+        assert len(self.registry) == 2
+        assert ModelRegistry.key("a") in self.registry
+        assert ModelRegistry.key("b") not in self.registry
+        self.registry.get("b")
+        assert len(self.loaded) == 4
+
+    def test_warmup(self):
+        """
+        The warmup loads the model and runs it once.
+        """
+        nlp = self.registry.warmup("camembert-ner")
+        assert len(nlp.texts) == 1
+        assert self.registry.get("camembert-ner") is nlp
+        assert len(self.loaded) == 1
+
+    def test_invalid_size(self):
+        with pytest.raises(ValueError):
+            ModelRegistry(max_size=0)
+
+    def test_threads(self):
+        """
+        A model requested by several threads at once is loaded once, and its
+        loading does not block the other models.
+        """
+        loaded = []
+        loading = threading.Event()
+
+        def loader(source, device, dtype, backend):
+            loaded.append(source)
+            if source == "slow":
+                loading.set()
+                time.sleep(0.2)
+            return FakePipeline(source)
+
+        registry = ModelRegistry(max_size=2, loader=loader)
+        pipelines = []
+        threads = [
+            threading.Thread(
+                target=lambda: pipelines.append(registry.get("slow"))
+            )
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        loading.wait()
+        start = time.perf_counter()
+        registry.get("fast")
+        assert time.perf_counter() - start < 0.1
+        for thread in threads:
+            thread.join()
+        assert sorted(loaded) == ["fast", "slow"]
+        assert all(nlp is pipelines[0] for nlp in pipelines)
+
+
+def write_tiny_model(model_dir):
+    """
+    Saves a tiny token classification model with random weights.
+    """
+    import torch
+    from transformers import (
+        BertConfig,
+        BertForTokenClassification,
+        BertTokenizerFast,
+    )
+
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+    vocab += ["cleon", "demanda", "a", "hari", "seldon", "."]
+    vocab_path = os.path.join(os.path.dirname(model_dir), "vocab.txt")
+    with open(vocab_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(vocab))
+    BertTokenizerFast(vocab_file=vocab_path).save_pretrained(model_dir)
+    torch.manual_seed(0)
+    labels = ["O", "B-PER", "I-PER"]
+    config = BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=16,
+        num_hidden_layers=1,
+        num_attention_heads=2,
+        intermediate_size=32,
+        id2label=dict(enumerate(labels)),
+        label2id={label: i for i, label in enumerate(labels)},
+    )
+    BertForTokenClassification(config).save_pretrained(model_dir)
+
+
+class TestOnnxExport:
+    """
+    Tests for the ONNX exports of the NER models.
+    """
+
+    def test_export_dir(self, tmp_path):
+        """
+        The export directory changes with the revision of the model.
+        """
+        model_dir = os.path.join(tmp_path, "model")
+        os.makedirs(model_dir)
+        with open(os.path.join(model_dir, "config.json"), "w") as f:
+            f.write("{}")
+        os.utime(os.path.join(model_dir, "config.json"), (1, 1))
+        cache_dir = os.path.join(tmp_path, "onnx")
+        export_dir = get_onnx_export_dir(model_dir, cache_dir)
+        assert os.path.dirname(export_dir) == cache_dir
+        assert export_dir == get_onnx_export_dir(model_dir, cache_dir)
+        os.utime(os.path.join(model_dir, "config.json"), (2, 2))
+        assert export_dir != get_onnx_export_dir(model_dir, cache_dir)
+        # A model of the hub is keyed by its commit, or by its branch when it
+        # was never downloaded.
+        assert os.path.basename(
+            get_onnx_export_dir("Jean-Baptiste/camembert-ner", cache_dir)
+        ).startswith("Jean-Baptiste--camembert-ner@")
+
+    def test_onnx_backends(self, tmp_path):
+        """
+        The ONNX export gives the entities of the torch model, and its int8
+        quantization runs.
+        """
+        pytest.importorskip("torch")
+        pytest.importorskip("optimum.onnxruntime")
+        model_dir = os.path.join(tmp_path, "model")
+        write_tiny_model(model_dir)
+        cache_dir = os.path.join(tmp_path, "onnx")
+        text = "cleon demanda a hari seldon ."
+
+        def get_spans(entities):
+            return [
+                (entity["entity_group"], entity["start"], entity["end"])
+                for entity in entities
+            ]
+
+        expected = get_spans(load_ner_pipeline(model_dir)(text))
+        nlp = load_onnx_ner_pipeline(model_dir, cache_dir=cache_dir)
+        assert get_spans(nlp(text)) == expected
+        nlp = load_onnx_ner_pipeline(
+            model_dir, quantize=True, cache_dir=cache_dir
+        )
+        assert isinstance(nlp(text), list)
+        export_dir = get_onnx_export_dir(model_dir, cache_dir)
+        assert os.listdir(cache_dir) == [os.path.basename(export_dir)]
+        assert os.path.isfile(
+            os.path.join(export_dir, "int8", "model_quantized.onnx")
+        )
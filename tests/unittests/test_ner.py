@@ -0,0 +1,400 @@
+r"""This package contains the functions to test the NER module with a fake
+pipeline instead of a model.
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import os
+import re
+
+import pytest
+
+# vroom.NER imports flair and transformers at module level.
+pytest.importorskip("flair")
+pytest.importorskip("transformers")
+
+from vroom.BatchScheduler import BatchScheduler  # noqa: E402
+from vroom.InferenceConfig import InferenceConfig  # noqa: E402
+from vroom.ModelRegistry import ModelRegistry  # noqa: E402
+from vroom.NER import (  # noqa: E402
+    add_bio_tags,
+    chunk_text,
+    get_entities,
+    get_entities_batched,
+    get_entities_from_files,
+    iter_entities_from_files,
+    iter_pos_tags,
+    read_file,
+    tag_file,
+    tag_text,
+    write_bio_tag_file,
+    write_pos_tag_file,
+)
+from vroom.NERCache import NERCache  # noqa: E402
+from vroom.tokenize import sent_tokenize  # noqa: E402
+from flair.data import Sentence  # noqa: E402
+
+TEXT = (
+    "Étouffant un léger bâillement, Cléon demanda à Hari Seldon s'il "
+    "connaissait Demerzel. "
+) * 30
+
+
+class FakePipeline:
+    """
+    Tags the capitalized words as persons, and fails on the call numbered
+    ``fail_at``.
+    """
+
+    def __init__(self, fail_at: int = None):
+        self.fail_at = fail_at
+        self.n_calls = 0
+        self.batches = []
+
+    def _tag(self, text):
+        return [
+            {
+                "entity_group": "PER",
+                "word": match.group(),
+                "start": match.start(),
+                "end": match.end(),
+                "score": 1.0,
+            }
+            for match in re.finditer(r"\b[A-Z]\w+", text)
+        ]
+
+    def __call__(self, texts, batch_size=None):
+        self.n_calls += 1
+        if self.n_calls == self.fail_at:
+            raise RuntimeError("The run was interrupted.")
+        if isinstance(texts, str):
+            return self._tag(texts)
+        self.batches.append(list(texts))
+        return [self._tag(text) for text in texts]
+
+
+class FakeTagger:
+    """
+    Tags the capitalized tokens as proper nouns, and records the number of
+    sentences of each call.
+    """
+
+    def __init__(self):
+        self.batches = []
+
+    @staticmethod
+    def get_tag(text):
+        return "PROPN" if text[:1].isupper() else "X"
+
+    def predict(self, sentences, mini_batch_size=32):
+        assert all(sentence.tokens for sentence in sentences)
+        self.batches.append(len(sentences))
+        for sentence in sentences:
+            for token in sentence.tokens:
+                token.add_label("upos", self.get_tag(token.text))
+
+
+class RecordingConfig(InferenceConfig):
+    """
+    Records the calls to ``apply`` and the forward passes run in ``context``.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.n_apply = 0
+        self.devices = []
+
+    def apply(self):
+        self.n_apply += 1
+        super().apply()
+
+    def context(self, device="cpu"):
+        self.devices.append(device)
+        return super().context(device)
+
+
+def get_registry(nlp):
+    return ModelRegistry(loader=lambda *key: nlp)
+
+
+def write_text(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
+
+
+class TestGetEntitiesBatched:
+    """
+    Tests for the batched extraction of the entities.
+    """
+
+    def setup_method(self):
+        # Texts of mixed lengths, so that their order by length is not the
+        # text order.
+        self.texts = [
+            " ".join(["Cléon demanda à Hari Seldon."] * n)
+            for n in (5, 1, 8, 2, 2, 7, 1, 4, 3, 6)
+        ]
+
+    def test_text_order(self):
+        """
+        The entities are returned in the order of the texts, whatever the
+        batches of the scheduler.
+        """
+        nlp = FakePipeline()
+        expected = [get_entities(text, nlp=nlp) for text in self.texts]
+        scheduler = BatchScheduler(max_tokens=400)
+        entities = get_entities_batched(self.texts, nlp, scheduler=scheduler)
+        assert entities == expected
+        # The texts were sorted by length and sent in several batches.
+        assert len(nlp.batches) > 1
+        assert [text for batch in nlp.batches for text in batch] != self.texts
+        assert all(
+            len(batch) * max(map(len, batch)) <= 400 or len(batch) == 1
+            for batch in nlp.batches
+        )
+
+    def test_files_order(self, tmp_path):
+        """
+        The chunks of several files are batched together, and the entities
+        of each file are those of a file tagged alone.
+        """
+        paths = [
+            write_text(os.path.join(tmp_path, f"chapter_{i}.txt"), text * 20)
+            for i, text in enumerate(self.texts)
+        ]
+        cache = NERCache(enabled=False)
+        results = get_entities_from_files(
+            paths,
+            registry=get_registry(FakePipeline()),
+            scheduler=BatchScheduler(max_tokens=1200),
+            cache=cache,
+        )
+        nlp = FakePipeline()
+        for path, (entities, chunks) in zip(paths, results):
+            with open(path, "r", encoding="utf-8") as f:
+                expected_chunks = chunk_text(" ".join(f.read().split()))
+            assert chunks == expected_chunks
+            assert entities == [
+                get_entities(chunk, nlp=nlp) for chunk in expected_chunks
+            ]
+
+    def test_overlapped_files(self, tmp_path):
+        """
+        The overlapped stages give the entities of the files tagged one after
+        the other.
+        """
+        paths = [
+            write_text(os.path.join(tmp_path, f"chapter_{i}.txt"), text * 20)
+            for i, text in enumerate(self.texts[:4])
+        ]
+        cache = NERCache(enabled=False)
+        expected = get_entities_from_files(
+            paths, registry=get_registry(FakePipeline()), cache=cache
+        )
+        for overlap in (True, False):
+            results = iter_entities_from_files(
+                paths,
+                registry=get_registry(FakePipeline()),
+                cache=cache,
+                queue_size=1,
+                overlap=overlap,
+            )
+            assert list(results) == expected
+
+
+class TestWriteBioTagFile:
+    """
+    Tests for the writing of the BIO-tagged files.
+    """
+
+    def setup_method(self):
+        self.cache = NERCache(enabled=False)
+
+    def write_input(self, tmp_path):
+        input_path = os.path.join(tmp_path, "chapter_1.txt")
+        with open(input_path, "w", encoding="utf-8") as f:
+            f.write(TEXT)
+        return input_path
+
+    def get_expected(self):
+        # The text tagged at once, as by the former ``tag_file``.
+        nlp = FakePipeline()
+        return " ".join(
+            tag_text(chunk, add_bio_tags(get_entities(chunk, nlp=nlp)))
+            for chunk in chunk_text(" ".join(TEXT.split()))
+        )
+
+    def test_same_as_tag_file(self, tmp_path):
+        """
+        The file written chunk by chunk is the text tagged at once.
+        """
+        input_path = self.write_input(tmp_path)
+        output_path = os.path.join(tmp_path, "tagged", "chapter_1.tagged")
+        write_bio_tag_file(
+            input_path,
+            output_path,
+            registry=get_registry(FakePipeline()),
+            cache=self.cache,
+        )
+        with open(output_path, "r", encoding="utf-8") as f:
+            written = f.read()
+
+        assert written == self.get_expected()
+        assert written == tag_file(
+            input_path, registry=get_registry(FakePipeline()), cache=self.cache
+        )
+        assert os.listdir(os.path.dirname(output_path)) == ["chapter_1.tagged"]
+
+    def test_inference_config(self, tmp_path):
+        """
+        The settings are applied once, and the forward passes of the chunks
+        run in their context.
+        """
+        input_path = self.write_input(tmp_path)
+        output_path = os.path.join(tmp_path, "chapter_1.tagged")
+        config = RecordingConfig()
+        write_bio_tag_file(
+            input_path,
+            output_path,
+            registry=get_registry(FakePipeline()),
+            cache=self.cache,
+            inference_config=config,
+        )
+        with open(output_path, "r", encoding="utf-8") as f:
+            assert f.read() == self.get_expected()
+        assert config.n_apply == 1
+        assert config.devices == ["cpu"] * len(
+            chunk_text(" ".join(TEXT.split()))
+        )
+
+    def test_interrupted(self, tmp_path):
+        """
+        An interrupted run leaves neither the output file nor its temporary
+        file.
+        """
+        input_path = self.write_input(tmp_path)
+        output_path = os.path.join(tmp_path, "tagged", "chapter_1.tagged")
+        with pytest.raises(RuntimeError):
+            write_bio_tag_file(
+                input_path,
+                output_path,
+                registry=get_registry(FakePipeline(fail_at=3)),
+                cache=self.cache,
+            )
+        assert os.listdir(os.path.dirname(output_path)) == []
+
+    def test_interrupted_keeps_previous_file(self, tmp_path):
+        """
+        An interrupted run does not overwrite the file of a previous run.
+        """
+        input_path = self.write_input(tmp_path)
+        output_path = os.path.join(tmp_path, "chapter_1.tagged")
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write("previous run")
+        with pytest.raises(RuntimeError):
+            write_bio_tag_file(
+                input_path,
+                output_path,
+                registry=get_registry(FakePipeline(fail_at=2)),
+                cache=self.cache,
+            )
+        with open(output_path, "r", encoding="utf-8") as f:
+            assert f.read() == "previous run"
+        assert sorted(os.listdir(tmp_path)) == [
+            "chapter_1.tagged",
+            "chapter_1.txt",
+        ]
+
+    def test_not_atomic(self, tmp_path):
+        """
+        Without the temporary file, an interrupted run leaves the chunks
+        written so far.
+        """
+        input_path = self.write_input(tmp_path)
+        output_path = os.path.join(tmp_path, "chapter_1.tagged")
+        with pytest.raises(RuntimeError):
+            write_bio_tag_file(
+                input_path,
+                output_path,
+                registry=get_registry(FakePipeline(fail_at=3)),
+                cache=self.cache,
+                atomic=False,
+            )
+        with open(output_path, "r", encoding="utf-8") as f:
+            written = f.read()
+        assert written
+        assert self.get_expected().startswith(written)
+        assert len(written) < len(self.get_expected())
+
+
+class TestPosTags:
+    """
+    Tests for the part-of-speech tagging by mini-batches of sentences.
+    """
+
+    def setup_method(self):
+        self.sentences = [
+            "Cléon demanda à Demerzel.",
+            "Hari Seldon arriva sur Trantor.",
+            "Il était mathématicien.",
+            "Dors sourit.",
+            "Hummin le suivit.",
+            "Le ciel était gris.",
+            "Seldon se tut.",
+        ]
+        self.text = "  ".join(self.sentences) + "\n\n  "
+
+    def get_expected(self, text):
+        return [
+            (token.text, FakeTagger.get_tag(token.text))
+            for sentence in sent_tokenize(text)
+            for token in Sentence(sentence).tokens
+        ]
+
+    def test_batches(self):
+        """
+        The sentences are tagged by batches of ``batch_size`` sentences.
+        """
+        tagger = FakeTagger()
+        tags = list(iter_pos_tags(self.text, tagger, batch_size=3))
+        assert tagger.batches == [3, 3, 1]
+        assert tags == self.get_expected(self.text)
+
+    def test_windows(self):
+        """
+        The sentences cut between two windows are tagged once, whole, and the
+        whitespace-only windows are skipped.
+        """
+        text = " ".join(self.text.split())
+        # The windows of a TextReader are cut after a space.
+        first, second = text.index(" ", 10) + 1, text.index(" ", 47) + 1
+        windows = [text[:first], text[first:second], " ", text[second:], " "]
+        tagger = FakeTagger()
+        tags = list(iter_pos_tags(windows, tagger, batch_size=2))
+        assert tagger.batches == [2, 2, 2, 1]
+        assert tags == self.get_expected(text)
+
+    def test_write_pos_tag_file(self, tmp_path, monkeypatch):
+        """
+        The file read by small windows is tagged as the whole text, and a
+        path without a directory is written in the working directory.
+        """
+        input_path = write_text(os.path.join(tmp_path, "ch.txt"), self.text)
+        monkeypatch.chdir(tmp_path)
+        write_pos_tag_file(
+            input_path,
+            "ch.pos",
+            batch_size=2,
+            tagger=FakeTagger(),
+            window_size=16,
+        )
+        with open("ch.pos", "r", encoding="utf-8") as f:
+            written = f.read()
+        assert written == " ".join(
+            f"{token} <{tag}>"
+            for token, tag in self.get_expected(read_file(input_path))
+        )
+        assert sorted(os.listdir(tmp_path)) == ["ch.pos", "ch.txt"]
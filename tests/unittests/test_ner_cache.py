@@ -0,0 +1,143 @@
+r"""This package contains the functions to test the NERCache class.
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import os
+
+import pytest
+
+from vroom.NERCache import NERCache
+
+MODEL_ID = "Jean-Baptiste/camembert-ner@main:float32:torch"
+
+TEXT = "Hari Seldon regarda Dors. Dors sourit à Hari."
+
+CHUNKS = ["Hari Seldon regarda Dors.", "Dors sourit à Hari."]
+
+ENTITIES = [
+    [
+        {"entity_group": "PER", "word": "Hari Seldon", "start": 0, "end": 11},
+        {"entity_group": "PER", "word": "Dors", "start": 20, "end": 24},
+    ],
+    [
+        {"entity_group": "PER", "word": "Dors", "start": 0, "end": 4},
+        # The word of the model is not always the text of its span.
+        {"entity_group": "PER", "word": "hari", "start": 14, "end": 18},
+    ],
+]
+
+
+class TestNERCache:
+    """
+    Tests for the on-disk cache of the NER results.
+    """
+
+    def test_round_trip(self, tmp_path):
+        cache = NERCache(str(tmp_path))
+        key = cache.key(TEXT, MODEL_ID, chunk_size=500)
+        assert cache.get(key, TEXT) is None
+        cache.put(key, TEXT, CHUNKS, ENTITIES)
+        assert key in cache
+        assert cache.get(key, TEXT) == (ENTITIES, CHUNKS)
+
+    def test_keys(self):
+        """
+        The text, the model and the chunking parameters are part of the key.
+        """
+        key = NERCache.key(TEXT, MODEL_ID, chunk_size=500)
+        assert key == NERCache.key(TEXT, MODEL_ID, chunk_size=500)
+        assert key != NERCache.key(TEXT + " Fin.", MODEL_ID, chunk_size=500)
+        assert key != NERCache.key(TEXT, MODEL_ID, chunk_size=400)
+        assert key != NERCache.key(
+            TEXT, MODEL_ID.replace("main", "a1b2c3"), chunk_size=500
+        )
+
+    def test_eviction(self, tmp_path):
+        """
+        The least recently used entries are evicted beyond the maximum size.
+        """
+        cache = NERCache(str(tmp_path))
+        keys = [cache.key(TEXT, MODEL_ID, chunk_size=i) for i in range(4)]
+        for i, key in enumerate(keys):
+            cache.put(key, TEXT, CHUNKS, ENTITIES)
+            path = cache._path(key)
+            os.utime(path, (i, i))
+        entry_size = os.path.getsize(cache._path(keys[0]))
+
+        # The first entry is read, so the second one is the least recent.
+        cache.get(keys[0], TEXT)
+        small_cache = NERCache(str(tmp_path), max_bytes=3 * entry_size)
+        small_cache.evict()
+        assert small_cache.size() <= 3 * entry_size
+        assert keys[1] not in small_cache
+        assert all(key in small_cache for key in (keys[0], keys[2], keys[3]))
+
+    def test_disabled(self, tmp_path, monkeypatch):
+        cache = NERCache(str(tmp_path), enabled=False)
+        key = cache.key(TEXT, MODEL_ID)
+        cache.put(key, TEXT, CHUNKS, ENTITIES)
+        assert key not in cache
+        assert cache.get(key, TEXT) is None
+
+        monkeypatch.setenv("VROOM_NO_CACHE", "1")
+        assert not NERCache(str(tmp_path)).enabled
+
+    def test_concurrent_eviction(self, tmp_path, monkeypatch):
+        """
+        The entries removed by another process, such as a worker of a
+        ``ParallelRunner``, during a walk of the cache are skipped.
+        """
+        cache = NERCache(str(tmp_path), max_bytes=0)
+        key = cache.key(TEXT, MODEL_ID)
+        cache.put(key, TEXT, CHUNKS, ENTITIES)
+        walk = os.walk
+
+        def walk_with_removed_entry(top):
+            for root, dirs, files in walk(top):
+                yield root, dirs, files + ["removed.json"]
+
+        monkeypatch.setattr(os, "walk", walk_with_removed_entry)
+        cache.put(key, TEXT, CHUNKS, ENTITIES)
+        assert cache.size() == 0
+        cache.clear()
+        assert key not in cache
+
+    def test_running_size(self, tmp_path, monkeypatch):
+        """
+        The directory is only walked by the first write, when the cache is
+        full, and every ``sync_interval`` writes.
+        """
+        walk = os.walk
+        n_walks = []
+
+        def counted_walk(top):
+            n_walks.append(top)
+            return walk(top)
+
+        monkeypatch.setattr(os, "walk", counted_walk)
+        cache = NERCache(str(tmp_path), sync_interval=8)
+        keys = [cache.key(TEXT, MODEL_ID, chunk_size=i) for i in range(20)]
+        for key in keys:
+            cache.put(key, TEXT, CHUNKS, ENTITIES)
+        assert len(n_walks) == 3
+
+        entry_size = os.path.getsize(cache._path(keys[0]))
+        small_cache = NERCache(str(tmp_path), max_bytes=5 * entry_size)
+        for i, key in enumerate(keys):
+            small_cache.put(key, TEXT, CHUNKS, ENTITIES)
+            os.utime(small_cache._path(key), (100 + i, 100 + i))
+            assert small_cache.size() <= 5 * entry_size
+        assert all(key in small_cache for key in keys[-5:])
+
+    def test_chunk_not_in_text(self, tmp_path):
+        """
+        A chunk which is not a substring of the text is not cached.
+        """
+        cache = NERCache(str(tmp_path))
+        key = cache.key(TEXT, MODEL_ID)
+        with pytest.raises(ValueError):
+            cache.put(key, TEXT, [CHUNKS[1], CHUNKS[0]], ENTITIES)
+        assert key not in cache
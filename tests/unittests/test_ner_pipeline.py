@@ -0,0 +1,284 @@
+r"""This package contains the functions to test the NERPipeline class.
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import contextlib
+import re
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from vroom.BatchScheduler import BatchScheduler
+from vroom.NERPipeline import NERPipeline, TransformersStages
+
+WORD_PATTERN = r"\w+|[^\w\s]"
+
+
+def fake_forward(texts):
+    """
+    Returns the capitalized words of each text as its raw output.
+    """
+    time.sleep(0.001)
+    return [[word for word in text.split() if word.istitle()] for text in texts]
+
+
+def count_entities(text, raw_output):
+    return len(raw_output)
+
+
+def tag_text(text):
+    """
+    Returns the capitalized words of a text as persons.
+    """
+    return [
+        {
+            "entity_group": "PER",
+            "word": match.group(),
+            "start": match.start(),
+            "end": match.end(),
+        }
+        for match in re.finditer(WORD_PATTERN, text)
+        if match.group().istitle()
+    ]
+
+
+class FakeTensor(np.ndarray):
+    """
+    A numpy array with the methods of a torch tensor used by the stages.
+    """
+
+    def float(self):
+        return self.astype(np.float32)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.view(np.ndarray)
+
+    def new_tensor(self, data):
+        return np.asarray(data).view(FakeTensor)
+
+
+class FakeBatch(dict):
+    def to(self, device):
+        return self
+
+
+class FakeTokenizer:
+    """
+    Tokenizes the words and punctuation signs, with the id 1 for the
+    capitalized words, and records the tokenized texts.
+    """
+
+    is_fast = True
+    model_max_length = 512
+    padding_side = "right"
+    model_input_names = ["input_ids", "attention_mask"]
+
+    def __init__(self):
+        self.texts = []
+
+    def __call__(
+        self,
+        texts,
+        truncation=False,
+        return_special_tokens_mask=False,
+        return_offsets_mapping=False,
+    ):
+        self.texts.extend(texts)
+        encodings = {
+            "input_ids": [],
+            "attention_mask": [],
+            "offset_mapping": [],
+            "special_tokens_mask": [],
+        }
+        for text in texts:
+            matches = list(re.finditer(WORD_PATTERN, text))
+            ids = [1 if match.group().istitle() else 2 for match in matches]
+            encodings["input_ids"].append([0] + ids + [0])
+            encodings["attention_mask"].append([1] * (len(ids) + 2))
+            encodings["offset_mapping"].append(
+                [(0, 0)] + [match.span() for match in matches] + [(0, 0)]
+            )
+            encodings["special_tokens_mask"].append([1] + [0] * len(ids) + [1])
+        return encodings
+
+    def pad(self, features, return_tensors):
+        length = max(map(len, features["input_ids"]))
+        return FakeBatch(
+            {
+                name: np.array(
+                    [row + [0] * (length - len(row)) for row in rows]
+                ).view(FakeTensor)
+                for name, rows in features.items()
+            }
+        )
+
+
+class FakeModel:
+    """
+    Scores the class 1 for the tokens of id 1, and records its threads.
+    """
+
+    def __init__(self):
+        self.threads = []
+
+    def __call__(self, input_ids, attention_mask):
+        self.threads.append(threading.current_thread())
+        logits = np.stack([input_ids != 1, input_ids == 1], axis=-1)
+        return {"logits": logits.astype(np.float64).view(FakeTensor)}
+
+
+class FakeTransformersPipeline:
+    """
+    A token classification pipeline of transformers, whose stages are the
+    fake tokenizer, the fake model and ``postprocess``.
+    """
+
+    framework = "pt"
+    device = "cpu"
+    _postprocess_params = {"aggregation_strategy": "simple"}
+
+    def __init__(self):
+        self.tokenizer = FakeTokenizer()
+        self.model = FakeModel()
+        self.postprocess_threads = []
+
+    def get_inference_context(self):
+        return contextlib.nullcontext
+
+    def postprocess(self, all_outputs, aggregation_strategy):
+        self.postprocess_threads.append(threading.current_thread())
+        [outputs] = all_outputs
+        scores = outputs["logits"][0].numpy()
+        special_tokens_mask = outputs["special_tokens_mask"][0].numpy()
+        sentence = outputs["sentence"]
+        return [
+            {
+                "entity_group": "PER",
+                "word": sentence[start:end],
+                "start": start,
+                "end": end,
+            }
+            for (start, end), token_scores, special in zip(
+                outputs["offset_mapping"][0], scores, special_tokens_mask
+            )
+            if not special and token_scores.argmax() == 1
+        ]
+
+    def __call__(self, texts, batch_size=None):
+        return [tag_text(text) for text in texts]
+
+
+def get_stages_pipeline(nlp, **kwargs):
+    stages = TransformersStages(lambda: nlp)
+    return NERPipeline(
+        stages.forward,
+        postprocess=stages.postprocess,
+        get_lengths=stages.get_lengths,
+        preprocess=stages.preprocess,
+        collate=stages.collate,
+        **kwargs,
+    )
+
+
+class TestNERPipeline:
+    """
+    Tests for the overlapped stages of the NER.
+    """
+
+    def test_ordered_output(self):
+        documents = [
+            ("a", ["Hari Seldon parle", "à Dors", "puis Raych", "rien"]),
+            ("b", []),
+            ("c", ["Cléon Ier"]),
+        ]
+        expected = [("a", [2, 1, 1, 0]), ("b", []), ("c", [2])]
+        for overlap in (True, False):
+            pipeline = NERPipeline(
+                fake_forward,
+                postprocess=count_entities,
+                batch_size=2,
+                queue_size=1,
+                overlap=overlap,
+            )
+            assert list(pipeline.imap(iter(documents))) == expected
+
+    def test_scheduler(self):
+        """
+        The batches of the scheduler are run, and the entities are returned
+        in the order of the texts.
+        """
+        texts = ["x " * length + "Hari" for length in (5, 40, 1, 20, 3)]
+        scheduler = BatchScheduler(max_tokens=50)
+        pipeline = NERPipeline(fake_forward, scheduler=scheduler)
+        [(_, entities)] = pipeline.imap([(None, texts)])
+        assert entities == [["Hari"]] * 5
+        assert scheduler.get_stats()["n_batches"] > 1
+
+    def test_error(self):
+        def forward(texts):
+            raise RuntimeError("The model failed.")
+
+        with pytest.raises(RuntimeError):
+            list(NERPipeline(forward).imap([("a", ["Hari"])]))
+
+    def test_stop(self):
+        """
+        The threads stop when the output is not consumed to the end.
+        """
+        threads = threading.active_count()
+        documents = ((i, ["Hari Seldon"] * 4) for i in range(100))
+        results = NERPipeline(fake_forward, queue_size=1).imap(documents)
+        assert next(results)[0] == 0
+        results.close()
+        time.sleep(0.5)
+        assert threading.active_count() == threads
+
+    def test_transformers_stages(self):
+        """
+        Each text is tokenized once, only the model runs on the model thread,
+        and the entities aggregated on the post-processing thread are those
+        of the whole pipeline.
+        """
+        documents = [
+            ("a", ["Hari Seldon regarda Dors.", "Il sourit", "Raych entra."]),
+            ("b", []),
+            ("c", ["Cléon Ier, empereur, et Demerzel."] * 3),
+        ]
+        nlp = FakeTransformersPipeline()
+        pipeline = get_stages_pipeline(nlp, batch_size=2, queue_size=1)
+        assert list(pipeline.imap(documents)) == [
+            (item, nlp(texts)) for item, texts in documents
+        ]
+        assert sorted(nlp.tokenizer.texts) == sorted(
+            text for _, texts in documents for text in texts
+        )
+        model_threads = set(nlp.model.threads)
+        postprocess_threads = set(nlp.postprocess_threads)
+        assert len(nlp.model.threads) == 4
+        assert len(model_threads) == len(postprocess_threads) == 1
+        assert model_threads != postprocess_threads
+        assert threading.current_thread() not in model_threads
+
+    def test_whole_pipeline(self):
+        """
+        A pipeline without the stages of transformers is called whole.
+        """
+        texts = ["Hari Seldon regarda Dors.", "Il sourit"]
+        pipeline = get_stages_pipeline(
+            lambda texts, batch_size: [tag_text(text) for text in texts]
+        )
+        assert list(pipeline.imap([(None, texts)])) == [
+            (None, [tag_text(text) for text in texts])
+        ]
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            NERPipeline(fake_forward, queue_size=0)
@@ -0,0 +1,46 @@
+r"""This package contains the functions to test the ParallelRunner class.
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import os
+
+import pytest
+
+from vroom.ParallelRunner import ParallelRunner
+
+
+class TestParallelRunner:
+    """
+    Tests for the pool of worker processes.
+    """
+
+    def test_ordered_results(self):
+        """
+        The results are yielded in the order of the items.
+        """
+        items = ["a" * length for length in (300, 1, 50, 7, 0, 12)]
+        runner = ParallelRunner(n_workers=3, n_threads=1)
+        assert list(runner.imap(len, items)) == [300, 1, 50, 7, 0, 12]
+
+    def test_thread_pinning(self):
+        """
+        The workers are pinned to n_threads threads.
+        """
+        with ParallelRunner(n_workers=2, n_threads=3) as runner:
+            values = list(runner.imap(os.getenv, ["OMP_NUM_THREADS"] * 4))
+            # The pool is kept between two runs.
+            assert list(runner.imap(len, ["ab"])) == [2]
+        assert values == ["3"] * 4
+
+    def test_default_threads(self):
+        runner = ParallelRunner(n_workers=1)
+        assert runner.n_threads == (os.cpu_count() or 1)
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            ParallelRunner(n_workers=0)
+        with pytest.raises(ValueError):
+            ParallelRunner(n_workers=1, n_threads=0)
@@ -0,0 +1,44 @@
+r"""This package contains the functions to test the tagging of the named
+entities.
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+from vroom.tagging import find_named_entities, render_tags
+
+
+class TestTagging:
+    """
+    Tests for the single scan tagger.
+    """
+
+    def test_longest_first(self):
+        text = "Hari Seldon parle à Hari et à Seldon."
+        entities = find_named_entities(text, ["Hari", "Seldon", "Hari Seldon"])
+        assert [entity["word"] for entity in entities] == [
+            "Hari Seldon",
+            "Hari",
+            "Seldon",
+        ]
+        for entity in entities:
+            assert text[entity["start"] : entity["end"]] == entity["word"]
+
+    def test_no_nested_tags(self):
+        text = "Hari Seldon arrive."
+        tagged = render_tags(
+            text, find_named_entities(text, ["Hari", "Hari Seldon"])
+        )
+        assert tagged == " <PER> Hari Seldon </PER>  arrive."
+        assert tagged.count("<PER>") == 1
+
+    def test_word_boundaries(self):
+        text = "Dors et Dorsa, Maître-du-Soleil."
+        entities = find_named_entities(text, ["Dors", "Maître"])
+        assert [entity["word"] for entity in entities] == ["Dors", "Maître"]
+
+    def test_empty(self):
+        assert find_named_entities("Un texte.", []) == []
+        assert find_named_entities("Un texte.", ["", "  "]) == []
+        assert render_tags("Un texte.", []) == "Un texte."
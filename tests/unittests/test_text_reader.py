@@ -0,0 +1,58 @@
+r"""This package contains the functions to test the TextReader class.
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import re
+
+import pytest
+
+from vroom.TextReader import TextReader
+
+TEXT = (
+    "\n\n   Hari Seldon  regarda\tDors.\n\n« Cléon Ier » sourit à Hummin…  \n"
+)
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / "chapter.txt"
+    path.write_text(TEXT, encoding="utf-8")
+    return str(path)
+
+
+class TestTextReader:
+    """
+    Tests for the streaming of the normalized text.
+    """
+
+    @pytest.mark.parametrize("use_mmap", [False, True])
+    @pytest.mark.parametrize(
+        "window_size,block_size", [(1, 1), (8, 3), (64, 5)]
+    )
+    def test_windows(self, path, use_mmap, window_size, block_size):
+        """
+        The windows give the text of ``NER.read_file``, cut at spaces, even
+        when a block ends inside a multi-byte char.
+        """
+        reader = TextReader(path, window_size, use_mmap, block_size)
+        windows = list(reader)
+        expected = re.sub(r"\s+", " ", TEXT.rstrip())
+        assert "".join(window for _, window in windows) == expected
+        assert reader.read() == expected
+        offset = 0
+        for window_offset, window in windows:
+            assert window_offset == offset
+            offset += len(window)
+        assert all(window.endswith(" ") for _, window in windows[:-1])
+
+    def test_empty(self, tmp_path):
+        path = tmp_path / "empty.txt"
+        path.write_text(" \n ", encoding="utf-8")
+        assert list(TextReader(str(path), use_mmap=True)) == []
+
+    def test_invalid(self, path):
+        with pytest.raises(ValueError):
+            TextReader(path, window_size=0)
@@ -0,0 +1,62 @@
+r"""This package contains the functions to test the TokenIndex class.
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import numpy as np
+
+from vroom.TokenIndex import TokenIndex
+
+TEXT = "Hari Seldon rencontra Cléon , puis Demerzel ."
+
+
+class TestTokenIndex:
+    """
+    Tests for the char to token offset index.
+    """
+
+    def setup_method(self):
+        self.index = TokenIndex.from_regex(TEXT)
+
+    def test_tokens(self):
+        """
+        The tokens of the index are the whitespace separated words.
+        """
+        assert self.index.tokens() == TEXT.split()
+        assert len(self.index) == len(TEXT.split())
+        assert self.index.token(3) == "Cléon"
+        assert self.index.starts.dtype == np.int32
+
+    def test_token_at(self):
+        """
+        A char offset is mapped to the token containing it, or to the next one.
+        """
+        assert self.index.token_at(0) == 0
+        assert self.index.token_at(5) == 1
+        assert self.index.token_at(10) == 1
+        assert self.index.token_at(11) == 2
+        assert self.index.token_at(len(TEXT)) == len(self.index)
+        offsets = np.array([0, 5, 22])
+        assert self.index.token_at(offsets).tolist() == [0, 1, 3]
+
+    def test_distance(self):
+        """
+        The distance is the number of tokens between two spans.
+        """
+        hari_seldon = (0, 11)
+        cleon = (22, 27)
+        demerzel = (35, 43)
+        assert self.index.distance(hari_seldon, cleon) == 1
+        assert self.index.distance(hari_seldon, demerzel) == 4
+        assert self.index.distance(cleon, cleon) == 0
+        # A token cut by a span is counted.
+        assert self.index.distance((0, 7), cleon) == 2
+
+    def test_char_span(self):
+        """
+        The char span of a token range covers all its tokens.
+        """
+        assert self.index.char_span(0, 2) == (0, 11)
+        assert TEXT[slice(*self.index.char_span(2, 4))] == "rencontra Cléon"
@@ -0,0 +1,146 @@
+r"""This package contains the functions to test the regex tokenizer.
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import glob
+import os
+import re
+
+import nltk
+import pytest
+
+from vroom.tokenize import (
+    count_tokens,
+    get_sentence_tokenizer,
+    sent_tokenize,
+    sentence_spans,
+    token_spans,
+    word_tokenize,
+)
+
+KAGGLE_CHAPTERS = sorted(
+    glob.glob(
+        os.path.join(
+            os.path.dirname(__file__),
+            "..",
+            "..",
+            "data",
+            "kaggle",
+            "*",
+            "*.preprocessed",
+        )
+    )
+)
+
+TEXT = (
+    "Seldon l’ignorait encore. M. Seldon rencontra R. Daneel ! « Auriez-vous "
+    "entendu parler d’un certain Hari ? », dit-il.\n— Oui, fit-il. 3,5 km..."
+)
+
+
+def _has_punkt():
+    try:
+        nltk.word_tokenize("Test.")
+    except LookupError:
+        return False
+    return True
+
+
+class TestRegexTokenizer:
+    """
+    Tests for the regex tokenizer.
+    """
+
+    def test_tokens(self):
+        """
+        The French punctuation and the typographic apostrophes are split, the
+        abbreviations, numbers and hyphenated words are kept.
+        """
+        tokens = word_tokenize(TEXT)
+        assert tokens[:6] == ["Seldon", "l", "’", "ignorait", "encore", "."]
+        assert "M." in tokens
+        assert "R." in tokens
+        assert "Auriez-vous" in tokens
+        assert "3,5" in tokens
+        assert tokens[-1] == "..."
+        assert count_tokens(TEXT) == len(tokens)
+
+    def test_offsets(self):
+        """
+        The offsets of the tokens point to the tokens in the text.
+        """
+        spans = token_spans(TEXT)
+        assert [TEXT[start:end] for start, end in spans] == word_tokenize(TEXT)
+
+    def test_sentences(self):
+        """
+        The sentences end with a punctuation sign followed by a capital letter,
+        a dash or a quote, but not after an abbreviation.
+        """
+        assert sent_tokenize(TEXT) == [
+            "Seldon l’ignorait encore.",
+            "M. Seldon rencontra R. Daneel !",
+            "« Auriez-vous entendu parler d’un certain Hari ? », dit-il.",
+            "— Oui, fit-il.",
+            "3,5 km...",
+        ]
+        for start, end in sentence_spans(TEXT):
+            assert not TEXT[start:end].isspace()
+
+    def test_unknown_tokenizer(self):
+        """
+        An unknown tokenizer is rejected.
+        """
+        with pytest.raises(ValueError):
+            word_tokenize(TEXT, tokenizer="spacy")
+
+
+@pytest.mark.skipif(not _has_punkt(), reason="nltk punkt data is not available")
+@pytest.mark.skipif(not KAGGLE_CHAPTERS, reason="kaggle data is not available")
+class TestConformance:
+    """
+    Compares the token counts of the regex tokenizer and of nltk on the
+    chapters of the kaggle data.
+    """
+
+    def test_chapter_token_counts(self):
+        """
+        The number of tokens of each chapter differs by less than 2%.
+        """
+        for path in KAGGLE_CHAPTERS:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+            expected = count_tokens(text, tokenizer="nltk")
+            assert abs(count_tokens(text) - expected) <= 0.02 * expected, path
+
+    def test_window_token_counts(self):
+        """
+        The number of tokens between two words, as counted by the
+        co-occurence window, rarely differs.
+        """
+        n_windows = 0
+        n_differences = 0
+        for path in KAGGLE_CHAPTERS:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+            words = list(re.finditer(r"\S+", text))
+            for i in range(0, len(words) - 20, 50):
+                substring = text[words[i].end() : words[i + 20].start()]
+                n_windows += 1
+                n_differences += count_tokens(substring) != count_tokens(
+                    substring, tokenizer="nltk"
+                )
+        assert n_differences / n_windows < 0.1
+
+
+@pytest.mark.skipif(not _has_punkt(), reason="nltk punkt data is not available")
+def test_sentence_tokenizer_is_loaded_once():
+    """
+    The punkt tokenizer is loaded once and gives the sentences of nltk.
+    """
+    tokenizer = get_sentence_tokenizer("english")
+    assert get_sentence_tokenizer("english") is tokenizer
+    assert sent_tokenize(TEXT, tokenizer="nltk") == nltk.sent_tokenize(TEXT)
@@ -0,0 +1,125 @@
+r"""
+Package for the batching of the chunks given to the NER models.
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BatchScheduler:
+    r"""
+    Forms the batches of the NER model under a budget of tokens.
+
+    The texts are sorted by decreasing number of tokens, so that the texts
+    of a batch have close lengths, and a batch is closed when padding all its
+    texts to the longest one would exceed ``max_tokens``. The padding
+    efficiency, the share of the tokens of the batches which are not
+    padding, is accumulated over the runs of the scheduler.
+
+    Example:
+    scheduler = BatchScheduler(max_tokens=4096)
+    entities, chunks = get_entities_from_file(path, scheduler=scheduler)
+    print(scheduler.padding_efficiency)
+
+    Args:
+        max_tokens : int, optional
+            The maximum number of tokens of a batch, padding included. A text
+            longer than the budget is a batch on its own. Defaults to no
+            budget.
+        max_batch_size : int, optional
+            The maximum number of texts of a batch. Defaults to no maximum.
+    """
+
+    def __init__(self, max_tokens: int = None, max_batch_size: int = None):
+        if max_tokens is None and max_batch_size is None:
+            raise ValueError("The batches must have a budget or a size.")
+        if max_batch_size is not None and max_batch_size < 1:
+            raise ValueError("A batch must hold at least one text.")
+        self.max_tokens = max_tokens
+        self.max_batch_size = max_batch_size
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Resets the statistics of the scheduler.
+        """
+        self.n_batches = 0
+        self.n_tokens = 0
+        self.n_padded_tokens = 0
+
+    @property
+    def padding_efficiency(self) -> float:
+        """
+        The number of tokens of the texts divided by the number of tokens of
+        the padded batches.
+        """
+        if self.n_padded_tokens == 0:
+            return 1.0
+        return self.n_tokens / self.n_padded_tokens
+
+    def _is_full(self, batch: list, longest: int) -> bool:
+        if (
+            self.max_batch_size is not None
+            and len(batch) >= self.max_batch_size
+        ):
+            return True
+        return (
+            self.max_tokens is not None
+            and (len(batch) + 1) * longest > self.max_tokens
+        )
+
+    def schedule(self, lengths: list) -> list:
+        """
+        Forms the batches of texts of the given lengths.
+
+        Args:
+            lengths (list): The number of tokens of each text.
+
+        Returns:
+            list: The list of the indices of the texts of each batch. The
+                caller puts the outputs of the batches back in the order of
+                the texts with these indices.
+        """
+        order = sorted(range(len(lengths)), key=lambda i: -lengths[i])
+        batches = []
+        batch = []
+        for i in order:
+            # The first text of a batch is its longest one.
+            if batch and self._is_full(batch, lengths[batch[0]]):
+                batches.append(batch)
+                batch = []
+            batch.append(i)
+        if batch:
+            batches.append(batch)
+
+        n_tokens = sum(lengths)
+        n_padded_tokens = sum(
+            len(batch) * lengths[batch[0]] for batch in batches
+        )
+        self.n_batches += len(batches)
+        self.n_tokens += n_tokens
+        self.n_padded_tokens += n_padded_tokens
+        if n_padded_tokens:
+            logger.info(
+                f"{len(lengths)} texts in {len(batches)} batches, padding "
+                f"efficiency of {n_tokens / n_padded_tokens:.1%}"
+            )
+        return batches
+
+    def get_stats(self) -> dict:
+        """
+        Returns the statistics of the runs of the scheduler.
+        """
+        return {
+            "max_tokens": self.max_tokens,
+            "max_batch_size": self.max_batch_size,
+            "n_batches": self.n_batches,
+            "n_tokens": self.n_tokens,
+            "n_padded_tokens": self.n_padded_tokens,
+            "padding_efficiency": self.padding_efficiency,
+        }
@@ -0,0 +1,233 @@
+r"""
+Package for co-occurence count matrices.
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import networkx as nx
+import numpy as np
+
+
+class CooccurrenceMatrix:
+    r"""
+    Symmetric matrix of the number of co-occurences between names.
+
+    The names are interned in a vocabulary and the non-zero counts of the
+    upper triangle are stored as sorted NumPy arrays of (row, column, count),
+    so that a chapter takes a few kilobytes instead of one tuple per
+    interaction.
+
+    Example:
+    matrix = CooccurrenceMatrix.from_interactions(
+        [("Seldon", "Cléon"), ("Cléon", "Seldon"), ("Seldon", "Dors")]
+    )
+    matrix.count("Seldon", "Cléon")  # 2
+    matrix.top_k(1)  # [("Seldon", "Cléon", 2)]
+    graph = matrix.to_networkx()
+
+    Args:
+        names : list, optional
+            The names of the vocabulary, in order.
+    """
+
+    def __init__(self, names: list = None) -> None:
+        self.names = []
+        self.index = {}
+        for name in names or []:
+            self.intern(name)
+        self.rows = np.zeros(0, dtype=np.int32)
+        self.cols = np.zeros(0, dtype=np.int32)
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    @classmethod
+    def from_interactions(cls, interactions) -> "CooccurrenceMatrix":
+        """
+        Builds the matrix of a list of interactions.
+
+        Args:
+            interactions (list): A list of tuples of names, as returned by
+                ``get_cooccurences``.
+
+        Returns:
+            CooccurrenceMatrix: The count matrix.
+        """
+        matrix = cls()
+        matrix.add(interactions)
+        return matrix
+
+    def intern(self, name: str) -> int:
+        """
+        Returns the index of a name, adding it to the vocabulary if needed.
+        """
+        index = self.index.get(name)
+        if index is None:
+            index = len(self.names)
+            self.index[name] = index
+            self.names.append(name)
+        return index
+
+    def add(self, interactions, counts=None) -> "CooccurrenceMatrix":
+        """
+        Adds interactions to the matrix.
+
+        Args:
+            interactions (list): A list of tuples of names.
+            counts (list, optional): The number of times each interaction
+                occurs. Defaults to once.
+
+        Returns:
+            CooccurrenceMatrix: The matrix itself.
+        """
+        intern = self.intern
+        pairs = np.array(
+            [(intern(a), intern(b)) for a, b in interactions], dtype=np.int32
+        ).reshape(-1, 2)
+        if counts is None:
+            counts = np.ones(len(pairs), dtype=np.int64)
+        self._add_pairs(
+            pairs[:, 0], pairs[:, 1], np.asarray(counts, dtype=np.int64)
+        )
+        return self
+
+    def merge(self, other: "CooccurrenceMatrix") -> "CooccurrenceMatrix":
+        """
+        Adds the counts of another matrix to this one.
+
+        Args:
+            other (CooccurrenceMatrix): The matrix to merge.
+
+        Returns:
+            CooccurrenceMatrix: The matrix itself.
+        """
+        translation = np.array(
+            [self.intern(name) for name in other.names], dtype=np.int32
+        )
+        if len(other.counts):
+            self._add_pairs(
+                translation[other.rows], translation[other.cols], other.counts
+            )
+        return self
+
+    def relabel(self, mapping) -> "CooccurrenceMatrix":
+        """
+        Returns a new matrix where the names are replaced by their label.
+
+        The counts of the names sharing a label are summed. The names without
+        a label and the pairs of names sharing the same label are dropped.
+
+        Args:
+            mapping (dict or callable): Gives the label of a name, or None.
+
+        Returns:
+            CooccurrenceMatrix: The relabeled matrix.
+        """
+        get_label = mapping.get if isinstance(mapping, dict) else mapping
+        matrix = CooccurrenceMatrix()
+        translation = np.array(
+            [
+                -1 if label is None else matrix.intern(label)
+                for label in map(get_label, self.names)
+            ],
+            dtype=np.int32,
+        )
+        rows = translation[self.rows]
+        cols = translation[self.cols]
+        keep = (rows >= 0) & (cols >= 0) & (rows != cols)
+        matrix._add_pairs(rows[keep], cols[keep], self.counts[keep])
+        return matrix
+
+    def count(self, name_a: str, name_b: str) -> int:
+        """
+        Returns the number of co-occurences between two names.
+        """
+        if name_a not in self.index or name_b not in self.index:
+            return 0
+        row, col = sorted((self.index[name_a], self.index[name_b]))
+        keys = self._keys(self.rows, self.cols)
+        position = np.searchsorted(keys, self._keys(row, col))
+        if position < len(keys) and keys[position] == self._keys(row, col):
+            return int(self.counts[position])
+        return 0
+
+    def top_k(self, k: int) -> list:
+        """
+        Returns the k pairs of names which co-occur the most.
+
+        Args:
+            k (int): The number of pairs.
+
+        Returns:
+            list: A list of (name, name, count) tuples, by decreasing count.
+        """
+        order = np.argsort(-self.counts, kind="stable")[:k]
+        return [
+            (self.names[self.rows[i]], self.names[self.cols[i]], int(count))
+            for i, count in zip(order, self.counts[order])
+        ]
+
+    def to_edge_list(self) -> list:
+        """
+        Returns the list of (name, name, count) tuples of the matrix.
+        """
+        names = self.names
+        return [
+            (names[row], names[col], count)
+            for row, col, count in zip(
+                self.rows.tolist(), self.cols.tolist(), self.counts.tolist()
+            )
+        ]
+
+    def to_dense(self) -> np.ndarray:
+        """
+        Returns the full symmetric count matrix.
+        """
+        dense = np.zeros((len(self.names), len(self.names)), dtype=np.int64)
+        dense[self.rows, self.cols] = self.counts
+        dense[self.cols, self.rows] = self.counts
+        return dense
+
+    def to_networkx(self) -> nx.Graph:
+        """
+        Returns the graph of the matrix, weighted by the counts.
+        """
+        graph = nx.Graph()
+        graph.add_weighted_edges_from(self.to_edge_list())
+        return graph
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The number of bytes used by the count arrays.
+        """
+        return self.rows.nbytes + self.cols.nbytes + self.counts.nbytes
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    @staticmethod
+    def _keys(rows, cols):
+        """
+        Encodes the (row, column) pairs in a single sortable integer.
+        """
+        return (np.asarray(rows, dtype=np.int64) << 32) | np.asarray(
+            cols, dtype=np.int64
+        )
+
+    def _add_pairs(self, rows, cols, counts) -> None:
+        """
+        Adds counts to the upper triangle and sums the duplicates.
+        """
+        rows, cols = np.minimum(rows, cols), np.maximum(rows, cols)
+        keys = np.concatenate(
+            [self._keys(self.rows, self.cols), self._keys(rows, cols)]
+        )
+        keys, inverse = np.unique(keys, return_inverse=True)
+        self.counts = np.bincount(
+            inverse.ravel(),
+            weights=np.concatenate([self.counts, counts]),
+            minlength=len(keys),
+        ).astype(np.int64)
+        self.rows = (keys >> 32).astype(np.int32)
+        self.cols = (keys & 0xFFFFFFFF).astype(np.int32)
@@ -0,0 +1,223 @@
+r"""
+Package for the char offsets of the named entities of a text.
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import re
+
+import numpy as np
+
+from vroom.tagging import compile_entities_pattern, render_tags
+
+_TAG_PATTERN = re.compile(r"<PER>(.*?)</PER>", re.DOTALL)
+
+
+class Span:
+    r"""
+    A named entity and its char offsets in a text.
+
+    The attributes can also be read as the keys of the entity dictionaries
+    of the NER, so that a span can be given wherever such a dictionary is
+    expected.
+
+    Example:
+    span = Span("Hari Seldon", 10, 21)
+    span.start == span["start"]  # True
+
+    Args:
+        word : str
+            The name of the entity.
+        start : int
+            The offset of the first char of the entity.
+        end : int
+            The offset after the last char of the entity.
+    """
+
+    __slots__ = ("word", "start", "end")
+
+    def __init__(self, word: str, start: int, end: int) -> None:
+        self.word = word
+        self.start = start
+        self.end = end
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Span):
+            return NotImplemented
+        return (self.word, self.start, self.end) == (
+            other.word,
+            other.start,
+            other.end,
+        )
+
+    def __hash__(self) -> int:
+        return hash((self.word, self.start, self.end))
+
+    def __repr__(self) -> str:
+        return f"Span({self.word!r}, {self.start}, {self.end})"
+
+    def to_dict(self) -> dict:
+        """
+        Returns the span as an entity dictionary.
+        """
+        return {"word": self.word, "start": self.start, "end": self.end}
+
+
+class EntitySpans:
+    r"""
+    The named entities of a text, in text order, with their char offsets.
+
+    The offsets are stored in two integer arrays, so that they are carried
+    from the tagging to the co-occurences and the evaluation without being
+    recovered from a tagged text. The text tagged with <PER> tags is only
+    rendered by ``render``, when it is written.
+
+    Example:
+    text = "Hari Seldon rencontra Cléon."
+    spans = EntitySpans.from_names(text, ["Hari Seldon", "Cléon"])
+    spans.starts  # array([ 0, 22])
+    spans.render(text)  # ' <PER> Hari Seldon </PER>  rencontra  <PER> ...'
+
+    Args:
+        words : list
+            The names of the entities.
+        starts : list
+            The offsets of the first char of the entities.
+        ends : list
+            The offsets after the last char of the entities.
+    """
+
+    def __init__(self, words: list, starts, ends) -> None:
+        self.words = list(words)
+        self.starts = np.asarray(starts, dtype=np.int64).reshape(-1)
+        self.ends = np.asarray(ends, dtype=np.int64).reshape(-1)
+        if not len(self.words) == len(self.starts) == len(self.ends):
+            raise ValueError(
+                "The words, starts and ends must have the same length."
+            )
+
+    @classmethod
+    def from_entities(cls, entities: list) -> "EntitySpans":
+        """
+        Builds the spans of a list of entity dictionaries.
+
+        Args:
+            entities (list): The dictionaries with the keys 'word', 'start'
+                and 'end'.
+
+        Returns:
+            EntitySpans: The spans of the entities.
+        """
+        return cls(
+            [entity["word"] for entity in entities],
+            [entity["start"] for entity in entities],
+            [entity["end"] for entity in entities],
+        )
+
+    @classmethod
+    def from_names(cls, text: str, named_entities) -> "EntitySpans":
+        """
+        Finds the occurences of the named entities in the text, in a single
+        scan, the longest names first. See ``vroom.tagging``.
+
+        Args:
+            text (str): The input text.
+            named_entities (iterable): The names of the entities.
+
+        Returns:
+            EntitySpans: The spans of the occurences.
+        """
+        pattern, names = compile_entities_pattern(named_entities)
+        if pattern is None:
+            return cls([], [], [])
+        words, starts, ends = [], [], []
+        for match in pattern.finditer(text):
+            words.append(names[match.group()])
+            starts.append(match.start())
+            ends.append(match.end())
+        return cls(words, starts, ends)
+
+    @classmethod
+    def from_tagged(cls, tagged_text: str) -> tuple:
+        """
+        Removes the <PER> tags of a tagged text, such as a ``.labeled`` file.
+
+        The whitespaces inside the tags are normalized, those around the tags
+        are kept.
+
+        Args:
+            tagged_text (str): The text tagged with <PER> tags.
+
+        Returns:
+            tuple: The text without tags and the spans of the tagged
+                entities in it.
+        """
+        pieces = []
+        length = 0
+        words, starts, ends = [], [], []
+        position = 0
+        for match in _TAG_PATTERN.finditer(tagged_text):
+            before = tagged_text[position : match.start()]
+            pieces.append(before)
+            length += len(before)
+            name = " ".join(match.group(1).split())
+            if name:
+                words.append(name)
+                starts.append(length)
+                ends.append(length + len(name))
+                pieces.append(name)
+                length += len(name)
+            position = match.end()
+        pieces.append(tagged_text[position:])
+        return "".join(pieces), cls(words, starts, ends)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __getitem__(self, i: int) -> Span:
+        return Span(self.words[i], int(self.starts[i]), int(self.ends[i]))
+
+    def __iter__(self):
+        return map(Span, self.words, self.starts.tolist(), self.ends.tolist())
+
+    def to_entities(self) -> list:
+        """
+        Returns the spans as a list of entity dictionaries.
+        """
+        return [span.to_dict() for span in self]
+
+    def compact(self, text: str) -> "EntitySpans":
+        """
+        Returns the spans in the text without its whitespaces, so that the
+        spans of two texts which only differ by their whitespaces, such as a
+        tagged and an untagged chapter, can be compared.
+
+        Args:
+            text (str): The text of the spans.
+
+        Returns:
+            EntitySpans: The spans with offsets in the text without
+                whitespaces.
+        """
+        offsets = np.zeros(len(text) + 1, dtype=np.int64)
+        np.cumsum([not char.isspace() for char in text], out=offsets[1:])
+        return EntitySpans(self.words, offsets[self.starts], offsets[self.ends])
+
+    def render(self, text: str) -> str:
+        """
+        Renders the text with each entity surrounded by <PER> tags.
+
+        Args:
+            text (str): The text of the spans.
+
+        Returns:
+            str: The tagged text.
+        """
+        return render_tags(text, self)
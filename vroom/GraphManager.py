@@ -42,29 +42,54 @@ class GraphManager:
         Si weighted est True, les arêtes sont pondérées par le nombre de cooccurrences.
         Sinon, toutes les arêtes ont le même poids (non pondéré).
 
-        :param cooccurrences: Liste de tuples de listes contenant les alias des personnages impliqués dans une cooccurrence.
+        :param cooccurrences: Liste de tuples de listes contenant les alias des personnages impliqués dans une cooccurrence,
+            ou dictionnaire {(alias_1, alias_2): nombre} des cooccurrences comptées, où chaque paire n'est ajoutée qu'une fois.
         """
-        aliases = {}
-        for cooccurrence in cooccurrences:
-            group_1, group_2 = cooccurrence
-            aliases[group_1[0]] = group_1
-            aliases[group_2[0]] = group_2
-
-            cooccurrence = tuple([group_1[0], group_2[0]])
-            if self.weighted:
-                if self.graph.has_edge(*cooccurrence):
-                    # Augmenter le poids si l'arête existe déjà
-                    self.graph[cooccurrence[0]][cooccurrence[1]]["weight"] += 1
-                else:
-                    # Ajouter une nouvelle arête avec un poids initial
-                    self.graph.add_edge(*cooccurrence, weight=1)
-            else:
-                # Ajouter une arête sans poids
-                self.graph.add_edge(*cooccurrence)
+        if isinstance(cooccurrences, dict):
+            for (group_1, group_2), count in cooccurrences.items():
+                self._add_edge(group_1, group_2, count)
+            return
+        for group_1, group_2 in cooccurrences:
+            self._add_edge(group_1, group_2, 1)
+
+    def add_cooccurrence_matrix(self, matrix) -> None:
+        """
+        Ajoute les cooccurrences d'une matrice de comptes dans le graphe.
+
+        Si weighted est True, les arêtes sont pondérées par le nombre de cooccurrences de la matrice.
+
+        :param matrix: CooccurrenceMatrix dont les noms sont des personnages, ou des tuples contenant les alias des personnages.
+        """
+        for name_1, name_2, count in matrix.to_edge_list():
+            group_1 = [name_1] if isinstance(name_1, str) else list(name_1)
+            group_2 = [name_2] if isinstance(name_2, str) else list(name_2)
+            self._add_edge(group_1, group_2, count)
 
-            # Ajout des alias des personnages impliqués dans la cooccurrence
-            for alias in cooccurrence:
-                self.graph.nodes[alias]["names"] = ";".join(aliases[alias])
+    def _add_edge(
+        self, group_1: list[str], group_2: list[str], count: int
+    ) -> None:
+        """
+        Ajoute ou met à jour l'arête entre deux personnages.
+
+        :param group_1: Liste des alias du premier personnage.
+        :param group_2: Liste des alias du second personnage.
+        :param count: Nombre de cooccurrences entre les deux personnages.
+        """
+        cooccurrence = tuple([group_1[0], group_2[0]])
+        if self.weighted:
+            if self.graph.has_edge(*cooccurrence):
+                # Augmenter le poids si l'arête existe déjà
+                self.graph[cooccurrence[0]][cooccurrence[1]]["weight"] += count
+            else:
+                # Ajouter une nouvelle arête avec un poids initial
+                self.graph.add_edge(*cooccurrence, weight=count)
+        else:
+            # Ajouter une arête sans poids
+            self.graph.add_edge(*cooccurrence)
+
+        # Ajout des alias des personnages impliqués dans la cooccurrence
+        self.graph.nodes[group_1[0]]["names"] = ";".join(group_1)
+        self.graph.nodes[group_2[0]]["names"] = ";".join(group_2)
 
     def generate_graph(self) -> nx.graphml:
         """
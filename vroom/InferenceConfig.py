@@ -0,0 +1,180 @@
+r"""
+Package for the configuration of the inference of the NER models on CPU.
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import contextlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _import_torch():
+    """
+    Returns the torch module, or None when it is not installed.
+    """
+    try:
+        import torch
+    except ImportError:
+        return None
+    return torch
+
+
+def is_bf16_supported() -> bool:
+    """
+    Returns whether the CPU has native bfloat16 kernels in oneDNN, without
+    which the bfloat16 autocast is emulated and slower than float32.
+    """
+    torch = _import_torch()
+    if torch is None or not torch.backends.mkldnn.is_available():
+        return False
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+
+class InferenceConfig:
+    r"""
+    The settings of PyTorch for the inference of the NER models.
+
+    The thread counts are global to the process and are set once by
+    ``apply``. The inference mode and the bfloat16 autocast are
+    local to the thread running the model and are entered around each forward
+    pass by ``context``. The settings only apply to the "torch" backend of
+    ``vroom.ModelRegistry``, ONNX Runtime has its own thread pools.
+
+    Example:
+    config = InferenceConfig(intra_op_threads=8, bf16_autocast=True)
+    entities, chunks = get_entities_from_file(path, inference_config=config)
+    logger({"inference_config": config.to_dict(), ...})
+
+    Args:
+        inference_mode : bool
+            Whether to run the model in ``torch.inference_mode``, which
+            skips the bookkeeping of the autograd.
+        intra_op_threads : int, optional
+            The number of threads of an operator. Defaults to the setting of
+            torch, usually one per core.
+        inter_op_threads : int, optional
+            The number of threads running independent operators. It can only
+            be set before the first parallel work of the process.
+        bf16_autocast : bool
+            Whether to run the operators of the model in bfloat16 on CPU.
+            It is not enabled on CPUs without native bfloat16 kernels.
+    """
+
+    def __init__(
+        self,
+        inference_mode: bool = True,
+        intra_op_threads: int = None,
+        inter_op_threads: int = None,
+        bf16_autocast: bool = False,
+    ) -> None:
+        for name, value in (
+            ("intra_op_threads", intra_op_threads),
+            ("inter_op_threads", inter_op_threads),
+        ):
+            if value is not None and value < 1:
+                raise ValueError(f"{name} must be at least 1, got {value}.")
+        self.inference_mode = inference_mode
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.bf16_autocast = bf16_autocast
+
+    def apply(self) -> None:
+        """
+        Sets the settings global to the process.
+        """
+        torch = _import_torch()
+        if torch is None:
+            return
+        if self.intra_op_threads is not None:
+            torch.set_num_threads(self.intra_op_threads)
+        if (
+            self.inter_op_threads is not None
+            and torch.get_num_interop_threads() != self.inter_op_threads
+        ):
+            try:
+                torch.set_num_interop_threads(self.inter_op_threads)
+            except RuntimeError:
+                logger.warning(
+                    "The number of inter-op threads can not be changed once "
+                    "torch has run in parallel, it stays %d.",
+                    torch.get_num_interop_threads(),
+                )
+
+    @contextlib.contextmanager
+    def context(self, device="cpu"):
+        """
+        Enters the settings local to the thread, around a forward pass.
+
+        Args:
+            device: The device of the model. The bfloat16 autocast is only
+                entered on CPU.
+        """
+        torch = _import_torch()
+        with contextlib.ExitStack() as stack:
+            if torch is not None:
+                if self.inference_mode:
+                    stack.enter_context(torch.inference_mode())
+                if self._uses_bf16(device):
+                    stack.enter_context(
+                        torch.autocast("cpu", dtype=torch.bfloat16)
+                    )
+            yield
+
+    def _uses_bf16(self, device="cpu") -> bool:
+        return (
+            self.bf16_autocast
+            and str(device).startswith("cpu")
+            and is_bf16_supported()
+        )
+
+    def get_autocast_dtype(self, device="cpu") -> str:
+        """
+        Returns the name of the dtype of the autocast entered by ``context``
+        on the device, which changes the entities of the model, or None when
+        no autocast is entered.
+        """
+        return "bfloat16" if self._uses_bf16(device) else None
+
+    def to_dict(self, device="cpu") -> dict:
+        """
+        Returns the settings and their effective values, as saved by the
+        ``JSONLogger``.
+
+        Args:
+            device: The device of the model.
+
+        Returns:
+            dict: The requested settings, and the "effective" settings read
+                from torch, which are None when torch is not installed.
+        """
+        torch = _import_torch()
+        effective = {
+            "inference_mode": self.inference_mode,
+            "intra_op_threads": None,
+            "inter_op_threads": None,
+            "bf16_autocast": self._uses_bf16(device),
+            "torch_version": None,
+        }
+        if torch is not None:
+            effective.update(
+                {
+                    "intra_op_threads": torch.get_num_threads(),
+                    "inter_op_threads": torch.get_num_interop_threads(),
+                    "torch_version": torch.__version__,
+                }
+            )
+        return {
+            "inference_mode": self.inference_mode,
+            "intra_op_threads": self.intra_op_threads,
+            "inter_op_threads": self.inter_op_threads,
+            "bf16_autocast": self.bf16_autocast,
+            "device": str(device),
+            "effective": effective,
+        }
@@ -0,0 +1,414 @@
+r"""
+Package for the loading and the caching of the NER models.
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_SOURCE = "Jean-Baptiste/camembert-ner"
+
+# "onnx" runs the model exported to ONNX with ONNX Runtime, and "onnx-int8"
+# the same model with its weights quantized to int8.
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# The directory of the models exported to ONNX, which are exported once.
+ONNX_CACHE_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "vroom", "onnx"
+)
+
+WARMUP_TEXT = "Étouffant un léger bâillement, Cléon demanda à Hari Seldon."
+
+
+def get_default_device() -> str:
+    """
+    Returns "cuda" when a GPU is available to torch, and "cpu" otherwise or
+    when torch is not installed.
+    """
+    try:
+        import torch
+    except ImportError:
+        return "cpu"
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def _get_dtype_name(dtype) -> str:
+    """
+    Returns the name of a torch dtype, given as a name or as a torch.dtype.
+    """
+    if dtype is None:
+        return "float32"
+    return str(dtype).replace("torch.", "")
+
+
+def get_model_revision(source: str, revision: str = "main") -> str:
+    """
+    Returns the revision of a model without any network access: the commit
+    of the model in the local cache of the Hugging Face hub, or the date of
+    the last change of a local model directory.
+
+    Args:
+        source (str): The name or the path of the model.
+        revision (str): The branch or tag of the model on the hub.
+
+    Returns:
+        str: The revision, or ``revision`` itself when the model was never
+            downloaded.
+    """
+    if os.path.isdir(source):
+        mtimes = [
+            os.path.getmtime(os.path.join(root, name))
+            for root, _, names in os.walk(source)
+            for name in names
+        ]
+        return str(max(mtimes, default=0))
+
+    hub_cache = os.environ.get(
+        "HF_HUB_CACHE",
+        os.path.join(
+            os.environ.get(
+                "HF_HOME",
+                os.path.join(os.path.expanduser("~"), ".cache", "huggingface"),
+            ),
+            "hub",
+        ),
+    )
+    ref_path = os.path.join(
+        hub_cache, "models--" + source.replace("/", "--"), "refs", revision
+    )
+    if os.path.isfile(ref_path):
+        with open(ref_path, "r") as f:
+            return f.read().strip()
+    return revision
+
+
+def get_model_id(
+    source: str, dtype=None, backend: str = "torch", autocast_dtype=None
+) -> str:
+    """
+    Returns an identifier of a model, its revision and the way it is run, as
+    used by the keys of ``vroom.NERCache.NERCache``.
+
+    The dtype of the autocast, such as the bfloat16 autocast of
+    ``vroom.InferenceConfig``, is part of the identifier since it changes
+    the entities.
+    """
+    revision = get_model_revision(source)
+    model_id = f"{source}@{revision}:{_get_dtype_name(dtype)}:{backend}"
+    if autocast_dtype is not None:
+        model_id += f":autocast-{_get_dtype_name(autocast_dtype)}"
+    return model_id
+
+
+def _check_backend(backend: str) -> None:
+    if backend not in BACKENDS:
+        raise ValueError(
+            f"Unknown backend: {backend}, expected one of {BACKENDS}"
+        )
+
+
+def get_onnx_export_dir(source: str, cache_dir: str = None) -> str:
+    """
+    Returns the directory of the ONNX export of a model, keyed by its source
+    and its revision, so that a model updated on the hub or on disk is
+    exported again.
+
+    Args:
+        source (str): The name or the path of the model.
+        cache_dir (str, optional): The directory of the exported models.
+            Defaults to ``ONNX_CACHE_DIR``.
+
+    Returns:
+        str: The directory of the export.
+    """
+    cache_dir = cache_dir if cache_dir is not None else ONNX_CACHE_DIR
+    name = source.strip("/").replace("/", "--")
+    return os.path.join(cache_dir, f"{name}@{get_model_revision(source)}")
+
+
+def export_onnx_model(
+    source: str, quantize: bool = False, cache_dir: str = None
+) -> tuple:
+    """
+    Exports a token classification model to ONNX, and optionally quantizes
+    its weights to int8, unless it is already in the cache.
+
+    The export and the quantization are written in a temporary directory
+    which is then renamed, so that an interrupted export is not reused. The
+    exports are keyed by the revision of the model, see
+    ``get_onnx_export_dir``.
+
+    Args:
+        source (str): The name or the path of the model.
+        quantize (bool): Whether to apply the dynamic int8 quantization.
+        cache_dir (str, optional): The directory of the exported models.
+            Defaults to ``ONNX_CACHE_DIR``.
+
+    Returns:
+        tuple: The directory of the exported model, with its config and its
+            tokenizer, and the name of its ONNX file.
+    """
+    # optimum is an optional dependency of the ONNX backends.
+    import platform
+
+    from optimum.onnxruntime import (
+        ORTModelForTokenClassification,
+        ORTQuantizer,
+    )
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    export_dir = get_onnx_export_dir(source, cache_dir)
+    if not os.path.exists(os.path.join(export_dir, "model.onnx")):
+        tmp_dir = f"{export_dir}.tmp-{os.getpid()}"
+        model = ORTModelForTokenClassification.from_pretrained(
+            source, export=True
+        )
+        model.save_pretrained(tmp_dir)
+        AutoTokenizer.from_pretrained(source).save_pretrained(tmp_dir)
+        # The revision of a model of the hub is only known once it is
+        # downloaded.
+        export_dir = get_onnx_export_dir(source, cache_dir)
+        os.replace(tmp_dir, export_dir)
+    if not quantize:
+        return export_dir, "model.onnx"
+
+    quantized_dir = os.path.join(export_dir, "int8")
+    if not os.path.exists(os.path.join(quantized_dir, "model_quantized.onnx")):
+        tmp_dir = f"{quantized_dir}.tmp-{os.getpid()}"
+        if platform.machine().lower() in ("arm64", "aarch64"):
+            config = AutoQuantizationConfig.arm64(is_static=False)
+        else:
+            config = AutoQuantizationConfig.avx2(is_static=False)
+        quantizer = ORTQuantizer.from_pretrained(export_dir)
+        quantizer.quantize(save_dir=tmp_dir, quantization_config=config)
+        AutoTokenizer.from_pretrained(export_dir).save_pretrained(tmp_dir)
+        os.replace(tmp_dir, quantized_dir)
+    return quantized_dir, "model_quantized.onnx"
+
+
+def load_onnx_ner_pipeline(
+    source: str,
+    device: str = "cpu",
+    quantize: bool = False,
+    cache_dir: str = None,
+):
+    """
+    Loads a token classification model exported to ONNX, exporting it first
+    if needed, and wraps it in a NER ``transformers.pipeline``.
+
+    The pipeline returns the same aggregated entities as the one of
+    ``load_ner_pipeline``, computed by ONNX Runtime.
+
+    Args:
+        source (str): The name or the path of the model.
+        device (str): "cpu", or "cuda" to run ONNX Runtime on the GPU.
+        quantize (bool): Whether to use the int8 quantized model.
+        cache_dir (str, optional): The directory of the exported models.
+            Defaults to ``ONNX_CACHE_DIR``.
+
+    Returns:
+        transformers.Pipeline: The NER pipeline, whose entities are grouped
+            with the "simple" aggregation strategy.
+    """
+    from optimum.onnxruntime import ORTModelForTokenClassification
+    from transformers import AutoTokenizer, pipeline
+
+    model_dir, file_name = export_onnx_model(source, quantize, cache_dir)
+    provider = (
+        "CPUExecutionProvider" if device == "cpu" else "CUDAExecutionProvider"
+    )
+    model = ORTModelForTokenClassification.from_pretrained(
+        model_dir, file_name=file_name, provider=provider
+    )
+    return pipeline(
+        "ner",
+        model=model,
+        tokenizer=AutoTokenizer.from_pretrained(model_dir),
+        aggregation_strategy="simple",
+    )
+
+
+def load_ner_pipeline(
+    source: str, device: str = "cpu", dtype: str = None, backend: str = "torch"
+):
+    """
+    Loads the tokenizer and the model of a token classification source and
+    wraps them in a NER ``transformers.pipeline``.
+
+    Args:
+        source (str): The name or the path of the model.
+        device (str): The device of the model.
+        dtype (str, optional): The name of the torch dtype of the weights, such
+            as "float32" or "bfloat16". Defaults to float32. The ONNX backends
+            run the float32 model.
+        backend (str): "torch", or "onnx" and "onnx-int8" to run the model
+            with ONNX Runtime, see ``load_onnx_ner_pipeline``.
+
+    Returns:
+        transformers.Pipeline: The NER pipeline, whose entities are grouped
+            with the "simple" aggregation strategy.
+    """
+    _check_backend(backend)
+    if backend != "torch":
+        return load_onnx_ner_pipeline(
+            source, device, quantize=backend == "onnx-int8"
+        )
+
+    # transformers and torch are only imported when a model is loaded.
+    import torch
+    from transformers import (
+        AutoModelForTokenClassification,
+        AutoTokenizer,
+        pipeline,
+    )
+
+    tokenizer = AutoTokenizer.from_pretrained(source)
+    model = AutoModelForTokenClassification.from_pretrained(
+        source, torch_dtype=getattr(torch, _get_dtype_name(dtype))
+    )
+    return pipeline(
+        "ner",
+        model=model,
+        tokenizer=tokenizer,
+        aggregation_strategy="simple",
+        device=device,
+    )
+
+
+class ModelRegistry:
+    r"""
+    Cache of the NER pipelines, keyed by (source, device, dtype, backend).
+
+    A pipeline is loaded the first time it is requested and is then shared by
+    all the calls, so that a whole run loads each model once. When more than
+    ``max_size`` pipelines are loaded, the least recently used one is evicted.
+
+    The registry can be shared by threads, such as the stages of a
+    ``vroom.NERPipeline``: a model requested by several threads at once is
+    loaded once, and the loading of a model does not block the threads
+    getting the other models.
+
+    Example:
+    registry = ModelRegistry(max_size=1)
+    registry.warmup("Jean-Baptiste/camembert-ner", device="cuda")
+    nlp = registry.get("Jean-Baptiste/camembert-ner", device="cuda")
+    entities = get_entities(text, nlp=nlp)
+
+    Args:
+        max_size : int
+            The maximum number of pipelines kept in memory.
+        loader : callable, optional
+            The function loading a pipeline from (source, device, dtype,
+            backend). Defaults to ``load_ner_pipeline``.
+    """
+
+    def __init__(self, max_size: int = 2, loader=None) -> None:
+        if max_size < 1:
+            raise ValueError("The registry must keep at least one model.")
+        self.max_size = max_size
+        self.loader = loader if loader is not None else load_ner_pipeline
+        self._pipelines = OrderedDict()
+        # The lock of the pipelines, and the lock of the loading of each key.
+        self._lock = threading.Lock()
+        self._loading_locks = {}
+
+    @staticmethod
+    def key(
+        source: str, device: str = "cpu", dtype=None, backend: str = "torch"
+    ) -> tuple:
+        """
+        Returns the key of a pipeline in the registry.
+        """
+        _check_backend(backend)
+        return source, str(device), _get_dtype_name(dtype), backend
+
+    def get(
+        self,
+        source: str = DEFAULT_SOURCE,
+        device: str = "cpu",
+        dtype=None,
+        backend: str = "torch",
+    ):
+        """
+        Returns the pipeline of a model, loading it if needed.
+
+        Args:
+            source (str): The name or the path of the model.
+            device (str): The device of the model.
+            dtype (str or torch.dtype, optional): The dtype of the weights.
+                Defaults to float32.
+            backend (str): "torch", "onnx" or "onnx-int8".
+
+        Returns:
+            transformers.Pipeline: The NER pipeline.
+        """
+        key = self.key(source, device, dtype, backend)
+        with self._lock:
+            if key in self._pipelines:
+                self._pipelines.move_to_end(key)
+                return self._pipelines[key]
+            loading_lock = self._loading_locks.setdefault(key, threading.Lock())
+
+        # The model is loaded outside of the lock of the pipelines, and once
+        # by the threads requesting it at the same time.
+        with loading_lock:
+            with self._lock:
+                if key in self._pipelines:
+                    self._pipelines.move_to_end(key)
+                    return self._pipelines[key]
+            nlp = self.loader(*key)
+            with self._lock:
+                self._pipelines[key] = nlp
+                while len(self._pipelines) > self.max_size:
+                    self._pipelines.popitem(last=False)
+                self._loading_locks.pop(key, None)
+        return nlp
+
+    def warmup(
+        self,
+        source: str = DEFAULT_SOURCE,
+        device: str = "cpu",
+        dtype=None,
+        backend: str = "torch",
+    ):
+        """
+        Loads a model and runs it once, so that the first chunk of a text does
+        not pay for the loading and the initialization of the kernels.
+
+        Args:
+            source (str): The name or the path of the model.
+            device (str): The device of the model.
+            dtype (str or torch.dtype, optional): The dtype of the weights.
+                Defaults to float32.
+            backend (str): "torch", "onnx" or "onnx-int8".
+
+        Returns:
+            transformers.Pipeline: The NER pipeline.
+        """
+        nlp = self.get(source, device, dtype, backend)
+        nlp(WARMUP_TEXT)
+        return nlp
+
+    def clear(self) -> None:
+        """
+        Evicts all the pipelines.
+        """
+        with self._lock:
+            self._pipelines.clear()
+
+    def __contains__(self, key: tuple) -> bool:
+        with self._lock:
+            return key in self._pipelines
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pipelines)
+
+
+# The registry shared by the functions of ``vroom.NER``.
+default_registry = ModelRegistry()
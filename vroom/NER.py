@@ -7,11 +7,13 @@ Authors
  * Gabriel DESBOUIS 2023
 """
 
+import contextlib
+import functools
+import itertools
 import json
 import os
 import re
 
-import nltk
 from flair.data import Sentence
 from flair.models import SequenceTagger
 from transformers import (
@@ -20,6 +22,30 @@ from transformers import (
     pipeline,
 )
 
+from vroom.BatchScheduler import BatchScheduler
+from vroom.chunking import (  # noqa: F401
+    chunk_text,
+    chunk_text_by_sentence,
+    chunk_text_by_tokens,
+    iter_chunk_text,
+    iter_chunk_windows,
+    merge_chunk_entities,
+)
+from vroom.InferenceConfig import InferenceConfig
+from vroom.ModelRegistry import ModelRegistry, default_registry, get_model_id
+from vroom.NERCache import NERCache, default_cache
+from vroom.NERPipeline import NERPipeline, TransformersStages
+from vroom.ParallelRunner import ParallelRunner
+from vroom.tagging import find_named_entities, render_tags
+from vroom.TextReader import TextReader
+from vroom.tokenize import sentence_spans
+
+# Words and punctuation signs, as split by ``separate_words``.
+WORD_PATTERN = r"\b\w+\b|[^\w\s]"
+
+# The flair model of the part-of-speech tags.
+POS_SOURCE = "qanastek/pos-french"
+
 
 def read_file(file_path: str):
     with open(file_path, "r", encoding="utf-8") as f:
@@ -37,9 +63,10 @@ def write_json_file(file_path: str, data: list):
 
 def get_entities(
     text: str,
-    model: AutoTokenizer,
-    tokenizer: AutoModelForTokenClassification,
+    model: AutoTokenizer = None,
+    tokenizer: AutoModelForTokenClassification = None,
     device="cpu",
+    nlp=None,
 ):
     """ Extracts named entities from the given text.
 
@@ -48,20 +75,30 @@ def get_entities(
         model: The model to use for the NER task.
         tokenizer: The tokenizer to use for the NER task.
         device: The device to use for the NER task.
+        nlp (optional): A NER pipeline, such as one of a ``ModelRegistry``.
+            When given, the model and the tokenizer are not used.
 
     Returns:
         list: A list of dictionaries representing the named entities. Each dictionary contains the keys 'entity_group',
               'word', 'start', and 'end'.
     """
-    nlp = pipeline(
-        "ner",
-        model=model,
-        tokenizer=tokenizer,
-        aggregation_strategy="simple",
-        device=device,
-    )
+    if nlp is None:
+        nlp = pipeline(
+            "ner",
+            model=model,
+            tokenizer=tokenizer,
+            aggregation_strategy="simple",
+            device=device,
+        )
+
+    return _filter_entities(nlp(text))
+
 
-    raw_result = nlp(text)
+def _filter_entities(raw_result):
+    """
+    Keeps the persons of the output of a NER pipeline, with the keys
+    'entity_group', 'word', 'start', and 'end'.
+    """
     raw_result = [
         {
             "entity_group": entity["entity_group"],
@@ -81,6 +118,51 @@ def get_entities(
     return filtered_results
 
 
+def get_token_lengths(texts: list, nlp) -> list:
+    """
+    Returns the number of tokens of each text for the tokenizer of a NER
+    pipeline, or its number of characters when the pipeline has none.
+    """
+    tokenizer = getattr(nlp, "tokenizer", None)
+    if tokenizer is None or not texts:
+        return [len(text) for text in texts]
+    return [len(input_ids) for input_ids in tokenizer(texts)["input_ids"]]
+
+
+def get_entities_batched(
+    texts: list, nlp, batch_size: int = 8, scheduler: BatchScheduler = None
+):
+    """
+    Extracts named entities from several texts, sent to the model in batches.
+
+    The texts are sorted by number of tokens so that the texts of a batch
+    have close lengths and little padding, and the entities are returned in
+    the order of the texts.
+
+    Args:
+        texts (list): The input texts, such as the chunks of one or several
+            files.
+        nlp: A NER pipeline, such as one of a ``ModelRegistry``.
+        batch_size (int): The number of texts per forward pass, when no
+            scheduler is given.
+        scheduler (BatchScheduler, optional): The scheduler forming the
+            batches, such as one with a budget of tokens per batch, which
+            keeps the padding efficiency of the runs.
+
+    Returns:
+        list: The list of entities of each text, as returned by
+              ``get_entities``.
+    """
+    if scheduler is None:
+        scheduler = BatchScheduler(max_batch_size=batch_size)
+    entities = [None] * len(texts)
+    for indices in scheduler.schedule(get_token_lengths(texts, nlp)):
+        raw_results = nlp([texts[i] for i in indices], batch_size=len(indices))
+        for i, raw_result in zip(indices, raw_results):
+            entities[i] = _filter_entities(raw_result)
+    return entities
+
+
 def add_bio_tags(entities):
     """
     Adds BIO tags to the named entities.
@@ -104,30 +186,6 @@ def add_bio_tags(entities):
     return entities
 
 
-def chunk_text(text, chunk_size=500):
-    """
-    Chunk the text into a list of subtexts of a size of chunk_size words.
-
-    Args:
-        text (str): The input text.
-        chunk_size (int): The size of the chunks.
-
-    Returns:
-        list: A list of subtexts.
-    """
-    chunked_text = []
-    chunk = []
-    words = text.split()
-    for word in words:
-        if len(" ".join(chunk)) + len(word) > chunk_size:
-            chunked_text.append(" ".join(chunk))
-            chunk = []
-        chunk.append(word)
-    if chunk:
-        chunked_text.append(" ".join(chunk))
-    return chunked_text
-
-
 def tag_text(text: str, entities: list):
     """
     Tags the text with BIO tags based on the given entities.
@@ -139,90 +197,452 @@ def tag_text(text: str, entities: list):
     Returns:
         str: The tagged text.
     """
-    tagged_text = ""
+    pieces = []
     start = 0
     for entity in entities:
-        tagged_text += text[start : entity["start"] + 1] + entity["bio_tag"]
+        pieces.append(text[start : entity["start"] + 1])
+        pieces.append(entity["bio_tag"])
         # warning : having + 1 may cause issues when you have a word that ends with a punctuation
         start = entity["end"]
-    tagged_text += text[start:]
+    pieces.append(text[start:])
 
-    return tagged_text
+    return "".join(pieces)
 
 
-def tag_file(input_file_path: str, source: str = "Jean-Baptiste/camembert-ner"):
+def iter_tag_file(
+    input_file_path: str,
+    source: str = "Jean-Baptiste/camembert-ner",
+    device="cpu",
+    dtype=None,
+    registry: ModelRegistry = None,
+    backend: str = "torch",
+    cache: NERCache = None,
+    inference_config: InferenceConfig = None,
+):
+    """
+    Tags the text in the given file with BIO tags, one chunk at a time.
+
+    Args:
+        input_file_path (str): The path to the input file.
+        source (str): The source of the model to use for the NER task.
+        device: The device to use for the NER task.
+        dtype (optional): The dtype of the weights of the model.
+        registry (ModelRegistry, optional): The registry of the models.
+            Defaults to the registry shared by the module.
+        backend (str): "torch", or "onnx" and "onnx-int8" to run the model
+            exported to ONNX with ONNX Runtime.
+        cache (NERCache, optional): The on-disk cache of the entities.
+            Defaults to the cache shared by the module.
+        inference_config (InferenceConfig, optional): The settings of
+            PyTorch for the inference. Defaults to those of torch.
+
+    Yields:
+        str: The tagged text of each chunk, as soon as its entities are known.
+    """
+    for chunk, entities in iter_entities_from_file(
+        input_file_path,
+        source,
+        device,
+        dtype,
+        registry,
+        backend,
+        cache,
+        inference_config=inference_config,
+    ):
+        yield tag_text(chunk, add_bio_tags(entities))
+
+
+def tag_file(
+    input_file_path: str,
+    source: str = "Jean-Baptiste/camembert-ner",
+    device="cpu",
+    dtype=None,
+    registry: ModelRegistry = None,
+    backend: str = "torch",
+    cache: NERCache = None,
+    inference_config: InferenceConfig = None,
+):
     """
     Tags the text in the given file with BIO tags.
 
     Args:
         input_file_path (str): The path to the input file.
         source (str): The source of the model to use for the NER task.
+        device: The device to use for the NER task.
+        dtype (optional): The dtype of the weights of the model.
+        registry (ModelRegistry, optional): The registry of the models.
+            Defaults to the registry shared by the module.
+        backend (str): "torch", or "onnx" and "onnx-int8" to run the model
+            exported to ONNX with ONNX Runtime.
+        cache (NERCache, optional): The on-disk cache of the entities.
+            Defaults to the cache shared by the module.
+        inference_config (InferenceConfig, optional): The settings of
+            PyTorch for the inference. Defaults to those of torch.
 
     Returns:
         str: The tagged text.
     """
-    text = read_file(input_file_path)
-    tokenizer = AutoTokenizer.from_pretrained(source)
-    model = AutoModelForTokenClassification.from_pretrained(source)
-
-    chunks = chunk_text(text)
-    tagged_chunks = []
-    for chunk in chunks:
-        entities = add_bio_tags(get_entities(chunk, model, tokenizer))
-        tagged_chunks.append(tag_text(chunk, entities))
-
-    return " ".join(tagged_chunks)
+    return " ".join(
+        iter_tag_file(
+            input_file_path,
+            source,
+            device,
+            dtype,
+            registry,
+            backend,
+            cache,
+            inference_config,
+        )
+    )
 
 
-def write_bio_tag_file(input_file_path: str, output_file_path: str):
+@contextlib.contextmanager
+def _open_output(output_file_path: str, atomic: bool = True):
+    """
+    Opens an output file, creating its directory. When atomic, the file is
+    written to a temporary file of the same directory, renamed to the output
+    file once it is closed, so that an interrupted run never leaves a
+    half-written file.
+    """
+    directory = os.path.dirname(output_file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if not atomic:
+        with open(output_file_path, "w", encoding="utf-8") as f:
+            yield f
+        return
+
+    tmp_path = f"{output_file_path}.tmp-{os.getpid()}"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            yield f
+        os.replace(tmp_path, output_file_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def write_bio_tag_file(
+    input_file_path: str,
+    output_file_path: str,
+    source: str = "Jean-Baptiste/camembert-ner",
+    device="cpu",
+    dtype=None,
+    registry: ModelRegistry = None,
+    backend: str = "torch",
+    cache: NERCache = None,
+    atomic: bool = True,
+    inference_config: InferenceConfig = None,
+):
     """
     Tags the text in the given file with BIO tags and writes the tagged text to the output file.
 
+    Each chunk is written as soon as it is tagged.
+
     Args:
         input_file_path (str): The path to the input file.
         output_file_path (str): The path to the output file.
+        source (str): The source of the model to use for the NER task.
+        device: The device to use for the NER task.
+        dtype (optional): The dtype of the weights of the model.
+        registry (ModelRegistry, optional): The registry of the models.
+            Defaults to the registry shared by the module.
+        backend (str): "torch", or "onnx" and "onnx-int8" to run the model
+            exported to ONNX with ONNX Runtime.
+        cache (NERCache, optional): The on-disk cache of the entities.
+            Defaults to the cache shared by the module.
+        atomic (bool): Whether to write a temporary file, renamed to the
+            output file once it is complete.
+        inference_config (InferenceConfig, optional): The settings of
+            PyTorch for the inference. Defaults to those of torch.
     """
-    tagged_text = tag_file(input_file_path)
+    tagged_chunks = iter_tag_file(
+        input_file_path,
+        source,
+        device,
+        dtype,
+        registry,
+        backend,
+        cache,
+        inference_config,
+    )
+    with _open_output(output_file_path, atomic) as f:
+        for i, tagged_chunk in enumerate(tagged_chunks):
+            if i > 0:
+                f.write(" ")
+            f.write(tagged_chunk)
 
-    if not os.path.exists(os.path.dirname(output_file_path)):
-        os.makedirs(os.path.dirname(output_file_path))
 
-    with open(output_file_path, "w") as f:
-        f.write(tagged_text)
+@functools.lru_cache(maxsize=None)
+def get_pos_tagger(source: str = POS_SOURCE):
+    """
+    Loads the flair part-of-speech tagger, once per process.
 
+    Args:
+        source (str): The name of the flair model.
 
-def write_pos_tag_file(input_file_path: str, output_file_path: str):
+    Returns:
+        SequenceTagger: The tagger.
+    """
+    return SequenceTagger.load(source)
+
+
+def _iter_sentences(windows, tokenizer: str = "regex"):
+    """
+    Yields the sentences of the successive windows of a text. The last
+    sentence of a window is held back until the next window, which may
+    complete it.
+    """
+    pending = ""
+    for window in windows:
+        text = pending + window
+        spans = sentence_spans(text, tokenizer)
+        if not spans:
+            pending = text
+            continue
+        for start, end in spans[:-1]:
+            yield text[start:end]
+        pending = text[spans[-1][0] :]
+    for start, end in sentence_spans(pending, tokenizer):
+        yield pending[start:end]
+
+
+def iter_pos_tags(text, tagger, batch_size: int = 32, tokenizer: str = "regex"):
+    """
+    Tags the sentences of the text with part-of-speech tags, by mini-batches
+    of sentences, so that the memory does not grow with the text.
+
+    Args:
+        text (str or iterable): The input text, or its successive windows,
+            such as those of a ``vroom.TextReader``.
+        tagger (SequenceTagger): The flair tagger.
+        batch_size (int): The number of sentences given at once to the tagger.
+        tokenizer (str): The sentence tokenizer of ``vroom.tokenize``.
+
+    Yields:
+        tuple: The text and the tag of each token, in text order.
+    """
+    windows = [text] if isinstance(text, str) else text
+    sentences = (
+        Sentence(sentence)
+        for sentence in _iter_sentences(windows, tokenizer)
+        if sentence.strip()
+    )
+    while True:
+        batch = list(itertools.islice(sentences, batch_size))
+        if not batch:
+            return
+        tagger.predict(batch, mini_batch_size=batch_size)
+        for sentence in batch:
+            for token in sentence.tokens:
+                yield token.text, token.labels[0].value
+
+
+def write_pos_tag_file(
+    input_file_path: str,
+    output_file_path: str,
+    batch_size: int = 32,
+    source: str = POS_SOURCE,
+    tagger=None,
+    window_size: int = 2**20,
+    atomic: bool = True,
+):
     """
     Tags the text in the given file with pos tags and writes the tagged text to the output file.
 
+    The file is read by windows, and its sentences are tagged by mini-batches
+    and written as soon as they are tagged, so that the memory does not grow
+    with the size of the book. The tagger is loaded once per process.
+
     Args:
         input_file_path (str): The path to the input file.
         output_file_path (str): The path to the output file.
+        batch_size (int): The number of sentences given at once to the tagger.
+        source (str): The name of the flair model.
+        tagger (SequenceTagger, optional): The tagger. Defaults to the one of
+            ``get_pos_tagger``.
+        window_size (int): The number of chars read at once. See
+            ``vroom.TextReader``.
+        atomic (bool): Whether to write a temporary file, renamed to the
+            output file once it is complete.
+    """
+    tagger = tagger if tagger is not None else get_pos_tagger(source)
+    windows = (window for _, window in TextReader(input_file_path, window_size))
+    with _open_output(output_file_path, atomic) as f:
+        separator = ""
+        for token, pos_tag in iter_pos_tags(windows, tagger, batch_size):
+            f.write(f"{separator}{token} <{pos_tag}>")
+            separator = " "
+
+
+def _get_cache_key(
+    text: str,
+    source: str,
+    dtype,
+    backend: str,
+    chunking: str = "characters",
+    max_tokens: int = None,
+    stride: int = 32,
+    inference_config: InferenceConfig = None,
+    device="cpu",
+) -> str:
+    """
+    Returns the key of the entities of a text in the ``NERCache``.
+    """
+    autocast_dtype = (
+        inference_config.get_autocast_dtype(device)
+        if inference_config is not None
+        else None
+    )
+    model_id = get_model_id(source, dtype, backend, autocast_dtype)
+    if chunking == "tokens":
+        return NERCache.key(
+            text,
+            model_id,
+            chunking=chunking,
+            max_tokens=max_tokens,
+            stride=stride,
+        )
+    return NERCache.key(text, model_id, chunking=chunking, chunk_size=500)
+
+
+def _inference_context(inference_config, device):
+    """
+    Returns the context of a forward pass with the given settings.
+    """
+    if inference_config is None:
+        return contextlib.nullcontext()
+    return inference_config.context(device)
+
+
+def iter_entities_from_file(
+    input_file_path: str,
+    source: str = "Jean-Baptiste/camembert-ner",
+    device="cpu",
+    dtype=None,
+    registry: ModelRegistry = None,
+    backend: str = "torch",
+    cache: NERCache = None,
+    inference_config: InferenceConfig = None,
+):
+    """
+    Extracts named entities from the given file, one chunk at a time.
+
+    Args:
+        input_file_path (str): The path to the input file.
+        source (str): The source of the model to use for the NER task.
+        device: The device to use for the NER task.
+        dtype (optional): The dtype of the weights of the model.
+        registry (ModelRegistry, optional): The registry of the models.
+            Defaults to the registry shared by the module.
+        backend (str): "torch", or "onnx" and "onnx-int8" to run the model
+            exported to ONNX with ONNX Runtime.
+        cache (NERCache, optional): The on-disk cache of the entities, which
+            is written once all the chunks are yielded. Defaults to the cache
+            shared by the module.
+        inference_config (InferenceConfig, optional): The settings of
+            PyTorch for the inference. Defaults to those of torch.
+
+    Yields:
+        tuple: A chunk of the text and the list of dictionaries representing
+               its named entities. Each dictionary contains the keys 'entity_group',
+               'word', 'start', and 'end'.
     """
     text = read_file(input_file_path)
+    cache = cache if cache is not None else default_cache
+    key = _get_cache_key(
+        text,
+        source,
+        dtype,
+        backend,
+        inference_config=inference_config,
+        device=device,
+    )
+    cached = cache.get(key, text)
+    if cached is not None:
+        entities, chunks = cached
+        yield from zip(chunks, entities)
+        return
 
-    model = SequenceTagger.load("qanastek/pos-french")
-    sentence = Sentence(text)
-    model.predict(sentence)
+    if inference_config is not None:
+        inference_config.apply()
+    registry = registry if registry is not None else default_registry
+    nlp = registry.get(source, device, dtype, backend)
 
-    if not os.path.exists(os.path.dirname(output_file_path)):
-        os.makedirs(os.path.dirname(output_file_path))
+    entities = []
+    chunks = []
+    for chunk in iter_chunk_text(text):
+        with _inference_context(inference_config, device):
+            chunk_entities = get_entities(chunk, nlp=nlp)
+        chunks.append(chunk)
+        entities.append(chunk_entities)
+        yield chunk, chunk_entities
+    cache.put(key, text, chunks, entities)
 
-    with open(output_file_path, "w") as file:
-        tokens = [token.text for token in sentence.tokens]
-        pos_tags = [token.labels[0].value for token in sentence.tokens]
 
-        result = " ".join(
-            [f"{token} <{pos_tag}>" for token, pos_tag in zip(tokens, pos_tags)]
-        )
+def iter_entities_from_stream(
+    input_file_path: str,
+    source: str = "Jean-Baptiste/camembert-ner",
+    device="cpu",
+    dtype=None,
+    registry: ModelRegistry = None,
+    backend: str = "torch",
+    window_size: int = 2**20,
+    use_mmap: bool = False,
+    inference_config: InferenceConfig = None,
+):
+    """
+    Extracts named entities from the given file, one chunk at a time, while
+    reading the file by windows, so that the memory does not grow with the
+    size of the book. The chunks are those of ``iter_entities_from_file``,
+    but the entities are not cached, since the whole text is never read.
+
+    Args:
+        input_file_path (str): The path to the input file.
+        source (str): The source of the model to use for the NER task.
+        device: The device to use for the NER task.
+        dtype (optional): The dtype of the weights of the model.
+        registry (ModelRegistry, optional): The registry of the models.
+            Defaults to the registry shared by the module.
+        backend (str): "torch", or "onnx" and "onnx-int8" to run the model
+            exported to ONNX with ONNX Runtime.
+        window_size (int): The number of chars read at once. See
+            ``vroom.TextReader``.
+        use_mmap (bool): Whether to map the file in memory.
+        inference_config (InferenceConfig, optional): The settings of
+            PyTorch for the inference. Defaults to those of torch.
+
+    Yields:
+        tuple: A chunk of the text and the list of dictionaries representing
+               its named entities. Each dictionary contains the keys 'entity_group',
+               'word', 'start', and 'end'.
+    """
+    if inference_config is not None:
+        inference_config.apply()
+    registry = registry if registry is not None else default_registry
+    nlp = registry.get(source, device, dtype, backend)
 
-        file.write(result)
+    reader = TextReader(input_file_path, window_size, use_mmap)
+    for _, chunk in iter_chunk_windows(reader):
+        with _inference_context(inference_config, device):
+            chunk_entities = get_entities(chunk, nlp=nlp)
+        yield chunk, chunk_entities
 
 
 def get_entities_from_file(
     input_file_path: str,
     source: str = "Jean-Baptiste/camembert-ner",
     device="cpu",
+    dtype=None,
+    registry: ModelRegistry = None,
+    backend: str = "torch",
+    batch_size: int = 8,
+    chunking: str = "characters",
+    max_tokens: int = None,
+    stride: int = 32,
+    scheduler: BatchScheduler = None,
+    cache: NERCache = None,
+    inference_config: InferenceConfig = None,
 ):
     """
     Extracts named entities from the given file.
@@ -230,23 +650,334 @@ def get_entities_from_file(
     Args:
         input_file_path (str): The path to the input file.
         source (str): The source of the model to use for the NER task.
+        device: The device to use for the NER task.
+        dtype (optional): The dtype of the weights of the model.
+        registry (ModelRegistry, optional): The registry of the models.
+            Defaults to the registry shared by the module.
+        backend (str): "torch", or "onnx" and "onnx-int8" to run the model
+            exported to ONNX with ONNX Runtime.
+        batch_size (int): The number of chunks per forward pass.
+        chunking (str): "characters" to chunk the text with ``chunk_text``,
+            or "tokens" to chunk it with ``chunk_text_by_tokens``.
+        max_tokens (int, optional): The maximum number of subwords of a chunk
+            with the "tokens" chunking. Defaults to the input size of the
+            model, with a margin for the re-tokenization of the chunks.
+        stride (int): The number of subwords shared by two consecutive chunks
+            with the "tokens" chunking.
+        scheduler (BatchScheduler, optional): The scheduler forming the
+            batches under a budget of tokens. Defaults to batches of
+            ``batch_size`` chunks.
+        cache (NERCache, optional): The on-disk cache of the entities, which
+            are only computed for the texts which are not cached. Defaults to
+            the cache shared by the module.
+        inference_config (InferenceConfig, optional): The settings of
+            PyTorch for the inference. Defaults to those of torch.
 
     Returns:
         list: A list of list dictionaries representing the named entities for each text chunk. Each dictionary contains the keys 'entity_group',
               'word', 'start', and 'end'.
         list: A list of chunks of the text.
     """
-    text = read_file(input_file_path)
+    return get_entities_from_files(
+        [input_file_path],
+        source,
+        device,
+        dtype,
+        registry,
+        backend,
+        batch_size,
+        chunking,
+        max_tokens,
+        stride,
+        scheduler,
+        cache,
+        inference_config,
+    )[0]
+
+
+def get_entities_from_files(
+    input_file_paths: list,
+    source: str = "Jean-Baptiste/camembert-ner",
+    device="cpu",
+    dtype=None,
+    registry: ModelRegistry = None,
+    backend: str = "torch",
+    batch_size: int = 8,
+    chunking: str = "characters",
+    max_tokens: int = None,
+    stride: int = 32,
+    scheduler: BatchScheduler = None,
+    cache: NERCache = None,
+    inference_config: InferenceConfig = None,
+):
+    """
+    Extracts named entities from several files, with the chunks of all the
+    files sent to the model in batches.
 
-    tokenizer = AutoTokenizer.from_pretrained(source, device=device)
-    model = AutoModelForTokenClassification.from_pretrained(source)
+    With the "tokens" chunking, the chunks of a file overlap: their entities
+    are merged by char span and each file is returned as a single chunk, the
+    whole text, with the entities of the text.
 
-    chunks = chunk_text(text)
-    entities = []
-    for chunk in chunks:
-        entities.append(get_entities(chunk, model, tokenizer))
+    Args:
+        input_file_paths (list): The paths to the input files.
+        source (str): The source of the model to use for the NER task.
+        device: The device to use for the NER task.
+        dtype (optional): The dtype of the weights of the model.
+        registry (ModelRegistry, optional): The registry of the models.
+            Defaults to the registry shared by the module.
+        backend (str): "torch", or "onnx" and "onnx-int8" to run the model
+            exported to ONNX with ONNX Runtime.
+        batch_size (int): The number of chunks per forward pass.
+        chunking (str): "characters" or "tokens", see
+            ``get_entities_from_file``.
+        max_tokens (int, optional): The maximum number of subwords of a chunk
+            with the "tokens" chunking.
+        stride (int): The number of subwords shared by two consecutive chunks
+            with the "tokens" chunking.
+        scheduler (BatchScheduler, optional): The scheduler forming the
+            batches, see ``get_entities_batched``.
+        cache (NERCache, optional): The on-disk cache of the entities. The
+            model is not loaded when all the files are cached.
+        inference_config (InferenceConfig, optional): The settings of
+            PyTorch for the inference. Defaults to those of torch.
+
+    Returns:
+        list: The (entities, chunks) tuple of each file, as returned by
+              ``get_entities_from_file``.
+    """
+    if chunking not in ("characters", "tokens"):
+        raise ValueError(f"Unknown chunking: {chunking}")
+    cache = cache if cache is not None else default_cache
+    texts = [read_file(input_file_path) for input_file_path in input_file_paths]
+    keys = [
+        _get_cache_key(
+            text,
+            source,
+            dtype,
+            backend,
+            chunking,
+            max_tokens,
+            stride,
+            inference_config,
+            device,
+        )
+        for text in texts
+    ]
+    results = [cache.get(key, text) for key, text in zip(keys, texts)]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if not missing:
+        return results
+
+    if inference_config is not None:
+        inference_config.apply()
+    registry = registry if registry is not None else default_registry
+    nlp = registry.get(source, device, dtype, backend)
+    texts = [texts[i] for i in missing]
+    if chunking == "tokens":
+        files_chunks, files_offsets = [], []
+        for text in texts:
+            chunks, offsets = chunk_text_by_tokens(
+                text, nlp.tokenizer, max_tokens, stride
+            )
+            files_chunks.append(chunks)
+            files_offsets.append(offsets)
+    else:
+        files_chunks = [chunk_text(text) for text in texts]
+    all_chunks = [chunk for chunks in files_chunks for chunk in chunks]
+    with _inference_context(inference_config, device):
+        all_entities = get_entities_batched(
+            all_chunks, nlp, batch_size, scheduler
+        )
+
+    start = 0
+    for i, chunks in enumerate(files_chunks):
+        entities = all_entities[start : start + len(chunks)]
+        start += len(chunks)
+        if chunking == "tokens":
+            entities = [merge_chunk_entities(entities, files_offsets[i])]
+            chunks = [texts[i]]
+        cache.put(keys[missing[i]], texts[i], chunks, entities)
+        results[missing[i]] = (entities, chunks)
+    return results
+
+
+def iter_entities_from_files(
+    input_file_paths: list,
+    source: str = "Jean-Baptiste/camembert-ner",
+    device="cpu",
+    dtype=None,
+    registry: ModelRegistry = None,
+    backend: str = "torch",
+    batch_size: int = 8,
+    chunking: str = "characters",
+    max_tokens: int = None,
+    stride: int = 32,
+    scheduler: BatchScheduler = None,
+    cache: NERCache = None,
+    queue_size: int = 4,
+    inference_config: InferenceConfig = None,
+    overlap: bool = True,
+):
+    """
+    Extracts named entities from several files, with the stages of the NER
+    overlapped by a ``NERPipeline``: the next files are read, chunked,
+    tokenized and batched while the model runs on the current batch, and the
+    entities of the previous batch are aggregated from the scores of their
+    tokens, filtered and cached.
 
-    return entities, chunks
+    The entities are the same as those of ``get_entities_from_files``, but
+    the chunks are batched file by file, so that the first files are
+    returned before the last ones are read.
+
+    Args:
+        input_file_paths (list): The paths to the input files.
+        source (str): The source of the model to use for the NER task.
+        device: The device to use for the NER task.
+        dtype (optional): The dtype of the weights of the model.
+        registry (ModelRegistry, optional): The registry of the models.
+            Defaults to the registry shared by the module.
+        backend (str): "torch", or "onnx" and "onnx-int8" to run the model
+            exported to ONNX with ONNX Runtime.
+        batch_size (int): The number of chunks per forward pass.
+        chunking (str): "characters" or "tokens", see
+            ``get_entities_from_file``.
+        max_tokens (int, optional): The maximum number of subwords of a chunk
+            with the "tokens" chunking.
+        stride (int): The number of subwords shared by two consecutive chunks
+            with the "tokens" chunking.
+        scheduler (BatchScheduler, optional): The scheduler forming the
+            batches of each file, see ``get_entities_batched``.
+        cache (NERCache, optional): The on-disk cache of the entities. The
+            model is not loaded when all the files are cached.
+        queue_size (int): The maximum number of batches waiting between two
+            stages.
+        inference_config (InferenceConfig, optional): The settings of
+            PyTorch for the inference. Defaults to those of torch.
+        overlap (bool): Whether to run the stages in threads, or one after
+            the other, as measured by ``benchmarks.ner_pipeline``.
+
+    Yields:
+        tuple: The (entities, chunks) tuple of each file, as returned by
+               ``get_entities_from_file``, in the order of the files.
+    """
+    if chunking not in ("characters", "tokens"):
+        raise ValueError(f"Unknown chunking: {chunking}")
+    cache = cache if cache is not None else default_cache
+    registry = registry if registry is not None else default_registry
+
+    if inference_config is not None:
+        inference_config.apply()
+
+    def get_nlp():
+        # The model is only loaded for the first file which is not cached.
+        return registry.get(source, device, dtype, backend)
+
+    def prepare(input_file_path):
+        text = read_file(input_file_path)
+        key = _get_cache_key(
+            text,
+            source,
+            dtype,
+            backend,
+            chunking,
+            max_tokens,
+            stride,
+            inference_config,
+            device,
+        )
+        cached = cache.get(key, text)
+        if cached is not None:
+            return (key, text, None, None, cached), []
+        if chunking == "tokens":
+            chunks, offsets = chunk_text_by_tokens(
+                text, get_nlp().tokenizer, max_tokens, stride
+            )
+        else:
+            chunks, offsets = chunk_text(text), None
+        return (key, text, chunks, offsets, None), chunks
+
+    # The inference mode is local to the model thread.
+    stages = TransformersStages(
+        get_nlp,
+        postprocess=_filter_entities,
+        context=lambda: _inference_context(inference_config, device),
+    )
+    pipeline = NERPipeline(
+        stages.forward,
+        postprocess=stages.postprocess,
+        get_lengths=stages.get_lengths,
+        batch_size=batch_size,
+        scheduler=scheduler,
+        queue_size=queue_size,
+        preprocess=stages.preprocess,
+        collate=stages.collate,
+        overlap=overlap,
+    )
+    documents = map(prepare, input_file_paths)
+    for item, entities in pipeline.imap(documents):
+        key, text, chunks, offsets, cached = item
+        if cached is not None:
+            yield cached
+            continue
+        if chunking == "tokens":
+            entities = [merge_chunk_entities(entities, offsets)]
+            chunks = [text]
+        cache.put(key, text, chunks, entities)
+        yield entities, chunks
+
+
+def iter_entities_from_files_parallel(
+    input_file_paths: list,
+    n_workers: int = None,
+    n_threads: int = None,
+    source: str = "Jean-Baptiste/camembert-ner",
+    device="cpu",
+    dtype=None,
+    backend: str = "torch",
+    batch_size: int = 8,
+    cache: NERCache = None,
+    inference_config: InferenceConfig = None,
+):
+    """
+    Extracts named entities from several files, such as the chapters of a
+    book, in parallel worker processes which each load the model once.
+
+    Args:
+        input_file_paths (list): The paths to the input files.
+        n_workers (int, optional): The number of worker processes, see
+            ``ParallelRunner``.
+        n_threads (int, optional): The number of torch threads of each
+            worker. Defaults to the number of cores divided by the number of
+            workers.
+        source (str): The source of the model to use for the NER task.
+        device: The device to use for the NER task.
+        dtype (optional): The dtype of the weights of the model.
+        backend (str): "torch", "onnx" or "onnx-int8".
+        batch_size (int): The number of chunks per forward pass.
+        cache (NERCache, optional): The on-disk cache of the entities.
+            Defaults to the cache shared by the module.
+        inference_config (InferenceConfig, optional): The settings of
+            PyTorch for the inference. Defaults to those of torch.
+
+    Yields:
+        tuple: The (entities, chunks) tuple of each file, as returned by
+               ``get_entities_from_file``, in the order of the files.
+    """
+    # The cache of the parent process is given to the workers, whose own
+    # shared cache is disabled.
+    cache = cache if cache is not None else default_cache
+    function = functools.partial(
+        get_entities_from_file,
+        source=source,
+        device=device,
+        dtype=dtype,
+        backend=backend,
+        batch_size=batch_size,
+        cache=cache,
+        inference_config=inference_config,
+    )
+    runner = ParallelRunner(n_workers, n_threads)
+    yield from runner.imap(function, input_file_paths)
 
 
 def tag_named_entities(text, named_entities):
@@ -258,30 +989,15 @@ def tag_named_entities(text, named_entities):
     Returns:
         str: The tagged text.
     """
-    # Sort named entities by length in descending order
-    sorted_entities = sorted(named_entities, key=len, reverse=True)
-
-    tagged_text = text
-
-    for entity in sorted_entities:
-        # Handling multi-word entities
-        entity_words = entity.split()
-        if len(entity_words) > 1:
-            entity_pattern = r"\b{}\b".format(re.escape(" ".join(entity_words)))
-        else:
-            entity_pattern = r"\b{}\b".format(re.escape(entity))
-
-        # Tagging the entity in the text
-        tagged_text = re.sub(
-            entity_pattern, " <PER> {} </PER> ".format(entity), tagged_text
-        )
-
-    return tagged_text
+    # All the names are matched in a single scan, the longest first, so the
+    # tags are never nested.
+    return render_tags(text, find_named_entities(text, named_entities))
 
 
 def remove_nested_tags(text):
     """
-    Removes nested tags in the text.
+    Removes nested tags in the text. The tags of ``tag_named_entities`` are
+    never nested, this is kept for the texts tagged by other means.
     Args:
         text (str): The input text.
     Returns:
@@ -318,23 +1034,6 @@ def remove_nested_tags(text):
     return " ".join(text)
 
 
-def chunk_text_by_sentence(text, batch_size=5):
-    # Download the punkt tokenizer if not already present
-    nltk.download("punkt")
-
-    # Use nltk to tokenize the text into sentences
-    sentences = nltk.sent_tokenize(text)
-
-    # Batch the sentences into 5 sentences per item
-    batched_sentences = [
-        " ".join(sentences[i : i + batch_size])
-        for i in range(0, len(sentences), batch_size)
-    ]
-
-    # Return the list of batches of sentences
-    return batched_sentences
-
-
 def merge_special_words(word_list):
     merged_list = []
     current_word = ""
@@ -355,12 +1054,21 @@ def merge_special_words(word_list):
 
 
 def separate_words(text):
-    words = re.findall(r"\b\w+\b|[^\w\s]", text)
+    words = re.findall(WORD_PATTERN, text)
 
     return merge_special_words(words)
 
 
 def get_positions_of_entities(text):
+    """
+    Returns the entities tagged with <PER> in the text with their positions.
+
+    Args:
+        text (str): The tagged text.
+
+    Returns:
+        list: A list of dictionaries with the keys 'word', 'start' and 'end'.
+    """
     words = separate_words(text)
     words = merge_special_words(words)
     positions = []
@@ -401,7 +1109,4 @@ def tag_text_with_entities(input_file_path, entities):
     """
     text = read_file(input_file_path)
 
-    output = tag_named_entities(text, entities)
-    output = remove_nested_tags(output)
-
-    return output
+    return tag_named_entities(text, entities)
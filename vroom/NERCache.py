@@ -0,0 +1,277 @@
+r"""
+Package for the on-disk cache of the NER results.
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import hashlib
+import json
+import os
+
+# The directory of the cached NER results.
+NER_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "vroom", "ner")
+
+# The cache is disabled when this environment variable is set to 1.
+NO_CACHE_VARIABLE = "VROOM_NO_CACHE"
+
+# The cache shared by the functions of ``vroom.NER`` is only enabled when
+# this environment variable is set to 1, or by the scripts.
+CACHE_VARIABLE = "VROOM_CACHE"
+
+_FORMAT_VERSION = 1
+
+
+class NERCache:
+    r"""
+    Content-addressed cache of the entities of the chunks of a text.
+
+    An entry is keyed by the hash of the normalized text, of the chunking
+    parameters and of the model, so that a text is only tagged again when one
+    of them changes. Each entry is a small JSON file holding the span of each
+    chunk in the text and the [start, end] span of each of its entities. When
+    the files exceed ``max_bytes``, the least recently used ones are evicted.
+
+    The size of the cache is kept up to date by the writes, so that the
+    directory is only walked when the cache is full, and every
+    ``sync_interval`` writes to account for the writes of the other
+    processes.
+
+    Example:
+    cache = NERCache(max_bytes=64 * 2**20)
+    key = cache.key(text, "Jean-Baptiste/camembert-ner@main", chunk_size=500)
+    if cache.get(key, text) is None:
+        cache.put(key, text, chunks, entities)
+
+    Args:
+        cache_dir : str, optional
+            The directory of the cache. Defaults to ``NER_CACHE_DIR``.
+        max_bytes : int
+            The maximum size of the cache on disk.
+        enabled : bool, optional
+            Whether the cache is read and written. Defaults to True, unless
+            the ``VROOM_NO_CACHE`` environment variable is set to 1.
+        sync_interval : int
+            The number of writes after which the size of the cache is read
+            again from the disk.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = None,
+        max_bytes: int = 256 * 2**20,
+        enabled: bool = None,
+        sync_interval: int = 64,
+    ) -> None:
+        self.cache_dir = cache_dir if cache_dir is not None else NER_CACHE_DIR
+        self.max_bytes = max_bytes
+        if enabled is None:
+            enabled = os.environ.get(NO_CACHE_VARIABLE, "0") != "1"
+        self.enabled = enabled
+        self.sync_interval = sync_interval
+        # The size of the cache on disk, unknown until the first walk.
+        self._size = None
+        self._n_writes = 0
+
+    @staticmethod
+    def key(text: str, model_id: str, **params) -> str:
+        """
+        Returns the key of the entities of a text.
+
+        Args:
+            text (str): The text, with its whitespaces normalized as by
+                ``vroom.NER.read_file``.
+            model_id (str): The identifier of the model, with its revision.
+            **params: The chunking parameters.
+
+        Returns:
+            str: The hexadecimal SHA-256 of the text, the model and the
+                parameters.
+        """
+        content = json.dumps(
+            {
+                "version": _FORMAT_VERSION,
+                "text": text,
+                "model": model_id,
+                "params": params,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str, text: str):
+        """
+        Returns the cached chunks and entities of a text.
+
+        Args:
+            key (str): The key of the text.
+            text (str): The text whose chunks were cached.
+
+        Returns:
+            tuple: The list of entities of each chunk and the list of chunks,
+                as returned by ``vroom.NER.get_entities_from_file``, or None
+                when the text is not cached.
+        """
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # The access time of the entry is used by the eviction.
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+        chunks = []
+        entities = []
+        for chunk_span, spans in zip(entry["chunks"], entry["entities"]):
+            chunk = text[chunk_span[0] : chunk_span[1]]
+            chunk_entities = []
+            for span in spans:
+                start, end = span[:2]
+                word = span[2] if len(span) > 2 else chunk[start:end]
+                chunk_entities.append(
+                    {
+                        "entity_group": "PER",
+                        "word": word,
+                        "start": start,
+                        "end": end,
+                    }
+                )
+            chunks.append(chunk)
+            entities.append(chunk_entities)
+        return entities, chunks
+
+    def put(self, key: str, text: str, chunks: list, entities: list) -> None:
+        """
+        Caches the chunks and the entities of a text.
+
+        Args:
+            key (str): The key of the text.
+            text (str): The text which was chunked.
+            chunks (list): The chunks of the text, in the text order.
+            entities (list): The list of PER entities of each chunk.
+        """
+        if not self.enabled:
+            return
+        chunk_spans = []
+        position = 0
+        for i, chunk in enumerate(chunks):
+            start = text.find(chunk, position)
+            if start == -1:
+                raise ValueError(
+                    f"The chunk {i} is not a substring of the text after the "
+                    "previous chunks, its span can not be cached."
+                )
+            position = start + len(chunk)
+            chunk_spans.append([start, position])
+
+        entity_spans = []
+        for chunk, chunk_entities in zip(chunks, entities):
+            spans = []
+            for entity in chunk_entities:
+                span = [entity["start"], entity["end"]]
+                # The word of the model is only kept when it is not the text
+                # of its span.
+                if entity["word"] != chunk[entity["start"] : entity["end"]]:
+                    span.append(entity["word"])
+                spans.append(span)
+            entity_spans.append(spans)
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"chunks": chunk_spans, "entities": entity_spans},
+                f,
+                separators=(",", ":"),
+                ensure_ascii=False,
+            )
+        try:
+            previous_size = os.path.getsize(path)
+        except FileNotFoundError:
+            previous_size = 0
+        os.replace(tmp_path, path)
+        self._add_size(os.path.getsize(path) - previous_size)
+
+    def _add_size(self, size: int) -> None:
+        """
+        Accounts for a write, and evicts the entries when the cache is full.
+        """
+        self._n_writes += 1
+        if self._size is None or self._n_writes % self.sync_interval == 0:
+            self.evict()
+            return
+        self._size += size
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def _entries(self) -> list:
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    # The entry may be evicted by another process since the
+                    # walk.
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def size(self) -> int:
+        """
+        Returns the size of the cache on disk, in bytes.
+        """
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used entries until the cache fits in
+        ``max_bytes``.
+        """
+        entries = sorted(self._entries())
+        size = sum(size for _, size, _ in entries)
+        for _, entry_size, path in entries:
+            if size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+        self._size = size
+
+    def clear(self) -> None:
+        """
+        Removes all the entries of the cache.
+        """
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._size = 0
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+
+# The cache shared by the functions of ``vroom.NER``. It is disabled by
+# default, so that the NER has no side effect on the disk unless asked.
+default_cache = NERCache(
+    enabled=os.environ.get(CACHE_VARIABLE, "0") == "1"
+    and os.environ.get(NO_CACHE_VARIABLE, "0") != "1"
+)
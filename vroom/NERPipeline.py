@@ -0,0 +1,433 @@
+r"""
+Package for the overlapped stages of the NER.
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import contextlib
+import queue
+import threading
+from collections import deque
+
+from vroom.BatchScheduler import BatchScheduler
+
+# The kinds of the messages passed between the stages.
+_DOCUMENT = "document"
+_BATCH = "batch"
+_ERROR = "error"
+_END = "end"
+
+
+class NERPipeline:
+    r"""
+    Runs the stages of the NER of several documents, such as the chapters of
+    a book, in threads connected by bounded queues:
+
+    - a producer thread prepares the documents, encodes their texts, such
+      as by tokenizing them, and forms and pads the batches of the next
+      documents;
+    - a model thread runs the forward pass of each batch;
+    - a post-processing thread turns the raw output of each text into
+      entities, such as by aggregating the scores of its tokens, and gathers
+      the entities of each document.
+
+    The forward pass of torch or ONNX Runtime releases the GIL, so that the
+    Python work of the other stages is hidden behind it. The documents are
+    yielded in their order, as soon as all their texts are processed.
+    ``TransformersStages`` splits a NER pipeline of transformers into these
+    stages.
+
+    Example:
+    stages = TransformersStages(lambda: nlp, postprocess=_filter_entities)
+    pipeline = NERPipeline(
+        stages.forward,
+        postprocess=stages.postprocess,
+        get_lengths=stages.get_lengths,
+        preprocess=stages.preprocess,
+        collate=stages.collate,
+    )
+    for item, entities in pipeline.imap((path, chunks) for ...):
+        ...
+
+    Args:
+        forward : callable
+            Returns the raw outputs of a batch, one per text, such as the
+            logits of a model.
+        postprocess : callable, optional
+            Returns the entities of a text from its input and its raw output.
+            Defaults to the raw output.
+        get_lengths : callable, optional
+            Returns the lengths of a list of inputs, such as their number of
+            tokens. Defaults to their ``len``.
+        batch_size : int
+            The number of texts per forward pass, when no scheduler is given.
+        scheduler : BatchScheduler, optional
+            The scheduler forming the batches of each document.
+        queue_size : int
+            The maximum number of batches waiting between two stages.
+        preprocess : callable, optional
+            Returns the inputs of a list of texts, one per text, such as
+            their encodings. Defaults to the texts.
+        collate : callable, optional
+            Returns the batch of a list of inputs given to ``forward``, such
+            as their padded tensors. Defaults to the list of inputs.
+        overlap : bool
+            Whether to run the stages in threads. Otherwise, they run one
+            after the other in the calling thread, as a reference for the
+            benchmarks.
+    """
+
+    def __init__(
+        self,
+        forward,
+        postprocess=None,
+        get_lengths=None,
+        batch_size: int = 8,
+        scheduler: BatchScheduler = None,
+        queue_size: int = 4,
+        preprocess=None,
+        collate=None,
+        overlap: bool = True,
+    ) -> None:
+        if queue_size < 1:
+            raise ValueError("The queues must hold at least one batch.")
+        self.forward = forward
+        self.postprocess = postprocess
+        self.get_lengths = get_lengths
+        self.preprocess = preprocess
+        self.collate = collate
+        self.overlap = overlap
+        self.scheduler = (
+            scheduler
+            if scheduler is not None
+            else BatchScheduler(max_batch_size=batch_size)
+        )
+        self.queue_size = queue_size
+
+    def _put(self, output: queue.Queue, message: tuple, stop) -> bool:
+        """
+        Puts a message in a queue, unless the pipeline is stopped.
+        """
+        while not stop.is_set():
+            try:
+                output.put(message, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _get(self, inputs: queue.Queue, stop) -> tuple:
+        """
+        Gets the next message of a queue, or an end message when the pipeline
+        is stopped.
+        """
+        while not stop.is_set():
+            try:
+                return inputs.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return _END, None, None
+
+    def _iter_batches(self, texts: list):
+        """
+        Yields the indices of the texts of each batch of a document, their
+        inputs and the batch given to ``forward``.
+        """
+        if not texts:
+            return
+        inputs = (
+            self.preprocess(texts) if self.preprocess is not None else texts
+        )
+        lengths = (
+            self.get_lengths(inputs)
+            if self.get_lengths is not None
+            else [len(x) for x in inputs]
+        )
+        for indices in self.scheduler.schedule(lengths):
+            batch_inputs = [inputs[i] for i in indices]
+            batch = (
+                self.collate(batch_inputs)
+                if self.collate is not None
+                else batch_inputs
+            )
+            yield indices, batch_inputs, batch
+
+    def _get_entities(self, inputs: list, raw_outputs) -> list:
+        """
+        Returns the entities of each input of a batch.
+        """
+        if self.postprocess is None:
+            return [raw_outputs[k] for k in range(len(inputs))]
+        return [
+            self.postprocess(x, raw_outputs[k]) for k, x in enumerate(inputs)
+        ]
+
+    def _produce(self, documents, output: queue.Queue, stop) -> None:
+        try:
+            for item, texts in documents:
+                if not self._put(output, (_DOCUMENT, item, len(texts)), stop):
+                    return
+                for indices, inputs, batch in self._iter_batches(texts):
+                    message = (_BATCH, indices, (inputs, batch))
+                    if not self._put(output, message, stop):
+                        return
+        except Exception as error:
+            self._put(output, (_ERROR, error, None), stop)
+            return
+        self._put(output, (_END, None, None), stop)
+
+    def _run_model(self, inputs: queue.Queue, output: queue.Queue, stop):
+        while True:
+            kind, first, second = self._get(inputs, stop)
+            if kind == _BATCH:
+                try:
+                    batch_inputs, batch = second
+                    second = batch_inputs, self.forward(batch)
+                except Exception as error:
+                    kind, first, second = _ERROR, error, None
+            if not self._put(output, (kind, first, second), stop):
+                return
+            if kind in (_END, _ERROR):
+                return
+
+    def _postprocess(self, inputs: queue.Queue, output: queue.Queue, stop):
+        # The documents whose entities are not all known, in order.
+        pending = deque()
+        while True:
+            kind, first, second = self._get(inputs, stop)
+            try:
+                if kind == _DOCUMENT:
+                    pending.append([first, [None] * second, second])
+                elif kind == _BATCH:
+                    document = pending[-1]
+                    for i, entities in zip(first, self._get_entities(*second)):
+                        document[1][i] = entities
+                    document[2] -= len(first)
+            except Exception as error:
+                kind, first = _ERROR, error
+            if kind == _ERROR:
+                self._put(output, (kind, first, None), stop)
+                return
+            # The batches come in the order of the documents, so that the
+            # documents are completed in order.
+            while pending and pending[0][2] == 0:
+                item, entities, _ = pending.popleft()
+                if not self._put(output, (_DOCUMENT, item, entities), stop):
+                    return
+            if kind == _END:
+                self._put(output, (_END, None, None), stop)
+                return
+
+    def imap(self, documents):
+        """
+        Extracts the entities of the texts of each document.
+
+        Args:
+            documents (iterable): The (item, texts) pair of each document,
+                where the item is passed through, such as a path. It is
+                consumed in the producer thread, so that the reading and the
+                chunking of the documents can be done lazily in it.
+
+        Yields:
+            tuple: The item and the list of entities of each text of each
+                document, in the order of the documents.
+        """
+        if not self.overlap:
+            yield from self._imap_sequential(documents)
+            return
+        stop = threading.Event()
+        batches = queue.Queue(self.queue_size)
+        outputs = queue.Queue(self.queue_size)
+        results = queue.Queue(self.queue_size)
+        threads = [
+            threading.Thread(
+                target=self._produce, args=(documents, batches, stop)
+            ),
+            threading.Thread(
+                target=self._run_model, args=(batches, outputs, stop)
+            ),
+            threading.Thread(
+                target=self._postprocess, args=(outputs, results, stop)
+            ),
+        ]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        try:
+            while True:
+                kind, first, second = results.get()
+                if kind == _END:
+                    return
+                if kind == _ERROR:
+                    raise first
+                yield first, second
+        finally:
+            # The threads blocked on a full queue stop within 0.1 second.
+            stop.set()
+
+    def _imap_sequential(self, documents):
+        for item, texts in documents:
+            entities = [None] * len(texts)
+            for indices, inputs, batch in self._iter_batches(texts):
+                raw_outputs = self.forward(batch)
+                for i, x in zip(
+                    indices, self._get_entities(inputs, raw_outputs)
+                ):
+                    entities[i] = x
+            yield item, entities
+
+
+class TransformersStages:
+    r"""
+    Splits a token classification pipeline of transformers into the stages of
+    a ``NERPipeline``.
+
+    Each text is tokenized once, in the producer, with the offset mapping and
+    the special tokens mask of its tokens, and its length is read from its
+    encoding. The batches are padded in the producer, only the model runs on
+    the model thread, and the aggregation of the scores of the tokens into
+    entities, by the ``postprocess`` of the pipeline, runs on the
+    post-processing thread. The entities are those of the pipeline called on
+    the texts.
+
+    A pipeline without a fast tokenizer, or which is not a torch pipeline of
+    transformers, is called whole on the model thread.
+
+    Args:
+        get_nlp : callable
+            Returns the pipeline. It is called on the first encoded texts, so
+            that the model is only loaded when a text is not cached.
+        postprocess : callable, optional
+            Returns the entities kept of the entities of the pipeline for a
+            text, such as the persons.
+        context : callable, optional
+            Returns the context entered around each forward pass, such as the
+            settings of an ``InferenceConfig``.
+    """
+
+    def __init__(self, get_nlp, postprocess=None, context=None) -> None:
+        self.get_nlp = get_nlp
+        self.filter_entities = postprocess
+        self.context = context
+        self._nlp = None
+        self._split = False
+
+    def _get_nlp(self):
+        # The producer calls it first, and the other threads only receive
+        # its batches afterwards.
+        if self._nlp is None:
+            nlp = self.get_nlp()
+            self._split = (
+                getattr(getattr(nlp, "tokenizer", None), "is_fast", False)
+                and getattr(nlp, "framework", None) == "pt"
+                and hasattr(nlp, "_postprocess_params")
+            )
+            self._nlp = nlp
+        return self._nlp
+
+    def preprocess(self, texts: list) -> list:
+        """
+        Returns the encoding of each text, with its length in tokens.
+        """
+        nlp = self._get_nlp()
+        tokenizer = getattr(nlp, "tokenizer", None)
+        if not self._split:
+            lengths = (
+                [len(ids) for ids in tokenizer(texts)["input_ids"]]
+                if tokenizer is not None
+                else [len(text) for text in texts]
+            )
+            return [
+                {"sentence": text, "length": length}
+                for text, length in zip(texts, lengths)
+            ]
+
+        # The texts are truncated as by the pipeline.
+        max_length = tokenizer.model_max_length
+        encodings = tokenizer(
+            texts,
+            truncation=bool(max_length and max_length > 0),
+            return_special_tokens_mask=True,
+            return_offsets_mapping=True,
+        )
+        return [
+            {
+                "sentence": text,
+                "length": len(encodings["input_ids"][i]),
+                **{name: values[i] for name, values in encodings.items()},
+            }
+            for i, text in enumerate(texts)
+        ]
+
+    def get_lengths(self, encodings: list) -> list:
+        """
+        Returns the number of tokens of each encoded text.
+        """
+        return [encoding["length"] for encoding in encodings]
+
+    def collate(self, encodings: list):
+        """
+        Returns the padded tensors of the model inputs of a batch.
+        """
+        nlp = self._get_nlp()
+        if not self._split:
+            return [encoding["sentence"] for encoding in encodings]
+        tokenizer = nlp.tokenizer
+        return tokenizer.pad(
+            {
+                name: [encoding[name] for encoding in encodings]
+                for name in tokenizer.model_input_names
+                if name in encodings[0]
+            },
+            return_tensors="pt",
+        )
+
+    def forward(self, batch):
+        """
+        Returns the logits of each text of a batch, on CPU.
+        """
+        nlp = self._get_nlp()
+        context = (
+            self.context()
+            if self.context is not None
+            else contextlib.nullcontext()
+        )
+        with context:
+            if not self._split:
+                return nlp(batch, batch_size=len(batch))
+            with nlp.get_inference_context()():
+                output = nlp.model(**batch.to(nlp.device))
+        logits = output["logits"] if isinstance(output, dict) else output[0]
+        # The pipeline reads the scores as float32 arrays.
+        return logits.float().cpu()
+
+    def postprocess(self, encoding: dict, raw_output) -> list:
+        """
+        Returns the entities of a text from its encoding and its logits.
+        """
+        nlp = self._get_nlp()
+        if self._split:
+            n_tokens = encoding["length"]
+            if nlp.tokenizer.padding_side == "left":
+                logits = raw_output[None, len(raw_output) - n_tokens :]
+            else:
+                logits = raw_output[None, :n_tokens]
+            model_outputs = {
+                "logits": logits,
+                "input_ids": [encoding["input_ids"]],
+                "offset_mapping": [encoding["offset_mapping"]],
+                # A tensor, as the other outputs of the model.
+                "special_tokens_mask": logits.new_tensor(
+                    [encoding["special_tokens_mask"]]
+                ),
+                "sentence": encoding["sentence"],
+                "is_last": True,
+            }
+            raw_output = nlp.postprocess(
+                [model_outputs], **nlp._postprocess_params
+            )
+        if self.filter_entities is not None:
+            return self.filter_entities(raw_output)
+        return raw_output
@@ -0,0 +1,138 @@
+r"""
+Package for the parallel processing of the chapters of a book.
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import multiprocessing
+import os
+
+# The environment variables read by the OpenMP and BLAS thread pools when
+# torch is imported.
+_THREAD_VARIABLES = (
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+)
+
+
+def _init_worker(n_threads: int) -> None:
+    """
+    Pins the number of threads of a worker before any model is loaded.
+    """
+    for variable in _THREAD_VARIABLES:
+        os.environ[variable] = str(n_threads)
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(n_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # The inter-op pool can not be resized once it has been used.
+        pass
+
+
+class ParallelRunner:
+    r"""
+    Runs a function on the items of a list, such as the chapters of a book,
+    in a pool of worker processes, and yields the results in the order of the
+    items as soon as they are ready.
+
+    Each worker uses ``n_threads`` threads for torch, so that the workers
+    share the cores instead of oversubscribing them, and keeps its own
+    ``vroom.ModelRegistry.default_registry``: a model is loaded once per
+    worker and reused for all the items of the worker.
+
+    Example:
+    with ParallelRunner(n_workers=4) as runner:
+        for entities, chunks in runner.imap(get_entities_from_file, paths):
+            ...
+
+    Args:
+        n_workers : int, optional
+            The number of worker processes. Defaults to one worker per four
+            cores.
+        n_threads : int, optional
+            The number of threads of each worker. Defaults to the number of
+            cores divided by the number of workers.
+        start_method : str
+            The start method of the processes. "spawn" does not copy the
+            threads of a parent which already used torch.
+    """
+
+    def __init__(
+        self,
+        n_workers: int = None,
+        n_threads: int = None,
+        start_method: str = "spawn",
+    ) -> None:
+        n_cores = os.cpu_count() or 1
+        if n_workers is None:
+            n_workers = max(1, n_cores // 4)
+        if n_workers < 1:
+            raise ValueError("The runner needs at least one worker.")
+        if n_threads is None:
+            n_threads = max(1, n_cores // n_workers)
+        if n_threads < 1:
+            raise ValueError("A worker needs at least one thread.")
+        self.n_workers = n_workers
+        self.n_threads = n_threads
+        self.start_method = start_method
+        self._pool = None
+
+    def start(self) -> None:
+        """
+        Starts the worker processes, which are kept until ``close``.
+        """
+        if self._pool is None:
+            context = multiprocessing.get_context(self.start_method)
+            self._pool = context.Pool(
+                self.n_workers,
+                initializer=_init_worker,
+                initargs=(self.n_threads,),
+            )
+
+    def close(self) -> None:
+        """
+        Stops the worker processes.
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def imap(self, function, items: list):
+        """
+        Applies a function to the items in the workers.
+
+        Args:
+            function (callable): A picklable function, such as a function of
+                a module or a ``functools.partial`` of one.
+            items (list): The items, such as the paths of the chapters.
+
+        Yields:
+            The result of each item, in the order of the items.
+        """
+        started = self._pool is None
+        self.start()
+        finished = False
+        try:
+            yield from self._pool.imap(function, items)
+            finished = True
+        finally:
+            if started and not finished:
+                # The remaining items are not waited for.
+                self._pool.terminate()
+            if started:
+                self.close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
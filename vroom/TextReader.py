@@ -0,0 +1,121 @@
+r"""
+Package for the streaming of the texts of the books.
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import codecs
+import mmap
+import os
+import re
+
+_WHITESPACES = re.compile(r"\s+")
+
+
+class TextReader:
+    r"""
+    Reads a text file by windows of its whitespace-normalized text, so that a
+    whole book is never held in memory.
+
+    The windows are cut at a space, so that no word is split between two of
+    them, and joined together they give the text of ``vroom.NER.read_file``.
+    Each window is given with its char offset in that text.
+
+    Example:
+    for offset, window in TextReader("book.txt", window_size=2**16):
+        for chunk in iter_chunk_text(window):
+            ...
+
+    Args:
+        file_path : str
+            The path of the UTF-8 text file.
+        window_size : int
+            The number of chars from which a window is cut, at its last
+            space. A window is longer only when a word is longer.
+        use_mmap : bool
+            Whether to map the file in memory instead of reading it by
+            blocks.
+        block_size : int
+            The number of bytes decoded at once.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        window_size: int = 2**20,
+        use_mmap: bool = False,
+        block_size: int = 2**16,
+    ) -> None:
+        if window_size < 1 or block_size < 1:
+            raise ValueError("The window and block sizes must be positive.")
+        self.file_path = file_path
+        self.window_size = window_size
+        self.use_mmap = use_mmap
+        self.block_size = block_size
+
+    def _iter_blocks(self):
+        """
+        Yields the bytes of the file by blocks.
+        """
+        with open(self.file_path, "rb") as f:
+            if self.use_mmap and os.fstat(f.fileno()).st_size > 0:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    for i in range(0, len(data), self.block_size):
+                        yield data[i : i + self.block_size]
+            else:
+                yield from iter(lambda: f.read(self.block_size), b"")
+
+    def _iter_normalized(self):
+        """
+        Yields the pieces of the whitespace-normalized text. The whitespaces
+        at the end of a piece are kept for the next one, so that the trailing
+        whitespaces of the file are dropped.
+        """
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        pending_space = False
+        for block in self._iter_blocks():
+            piece = _WHITESPACES.sub(" ", decoder.decode(block))
+            if not piece:
+                continue
+            if pending_space and not piece.startswith(" "):
+                piece = " " + piece
+            pending_space = piece.endswith(" ")
+            piece = piece.rstrip(" ")
+            if piece:
+                yield piece
+        piece = _WHITESPACES.sub(" ", decoder.decode(b"", final=True))
+        if pending_space and piece and not piece.startswith(" "):
+            piece = " " + piece
+        piece = piece.rstrip(" ")
+        if piece:
+            yield piece
+
+    def __iter__(self):
+        """
+        Yields:
+            tuple: The char offset of the window in the normalized text and
+                the text of the window.
+        """
+        offset = 0
+        buffer = ""
+        for piece in self._iter_normalized():
+            buffer += piece
+            if len(buffer) < self.window_size:
+                continue
+            cut = buffer.rfind(" ", 1, len(buffer))
+            if cut <= 0:
+                continue
+            window = buffer[: cut + 1]
+            yield offset, window
+            offset += len(window)
+            buffer = buffer[cut + 1 :]
+        if buffer:
+            yield offset, buffer
+
+    def read(self) -> str:
+        """
+        Returns the whole normalized text.
+        """
+        return "".join(window for _, window in self)
@@ -0,0 +1,189 @@
+r"""
+Package for char to token offset indexes.
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import re
+
+import nltk
+import numpy as np
+
+# ``nltk.word_tokenize`` rewrites double quotes as `` and ''.
+_DOUBLE_QUOTES = re.compile(r"\"|``|''")
+
+
+def nltk_token_spans(text: str):
+    """
+    Tokenizes the text with ``nltk.word_tokenize`` and returns the character
+    span of each token.
+
+    Args:
+        text (str): The input text.
+
+    Returns:
+        list: A list of (start, end) tuples, one per token, in text order.
+    """
+    spans = []
+    offset = 0
+    for token in nltk.word_tokenize(text):
+        if token in ("``", "''"):
+            match = _DOUBLE_QUOTES.search(text, offset)
+            if match is None:
+                continue
+            start, end = match.span()
+        else:
+            start = text.find(token, offset)
+            if start == -1:
+                continue
+            end = start + len(token)
+        spans.append((start, end))
+        offset = end
+    return spans
+
+
+class TokenIndex:
+    r"""
+    Index of the token offsets of a text.
+
+    The start and end character offsets of the tokens are stored in two
+    sorted integer arrays, so that every lookup is a binary search. The index
+    is built once per text, and can be given to the co-occurence functions
+    and to a ``TokenWindow`` instead of tokenizing the text again.
+
+    Example:
+    index = TokenIndex.from_nltk("Hari Seldon rencontra Cléon.")
+    index.token_at(5)  # 1
+    index.distance((0, 4), (22, 27))  # 2
+    index.char_span(0, 2)  # (0, 11)
+
+    Args:
+        text : str
+            The indexed text.
+        spans : list
+            The (start, end) character offsets of the tokens, in text order.
+    """
+
+    def __init__(self, text: str, spans: list) -> None:
+        self.text = text
+        spans = np.asarray(spans, dtype=np.int32).reshape(-1, 2)
+        self.starts = np.ascontiguousarray(spans[:, 0])
+        self.ends = np.ascontiguousarray(spans[:, 1])
+
+    @classmethod
+    def from_nltk(cls, text: str) -> "TokenIndex":
+        """
+        Builds the index of the tokens of ``nltk.word_tokenize``.
+
+        Args:
+            text (str): The text to index.
+
+        Returns:
+            TokenIndex: The index of the text.
+        """
+        return cls(text, nltk_token_spans(text))
+
+    @classmethod
+    def from_regex(cls, text: str, pattern: str = r"\S+") -> "TokenIndex":
+        """
+        Builds the index of the matches of a regular expression.
+
+        Args:
+            text (str): The text to index.
+            pattern (str): The regular expression matching a token. Defaults
+                to whitespace separated words.
+
+        Returns:
+            TokenIndex: The index of the text.
+        """
+        return cls(text, [match.span() for match in re.finditer(pattern, text)])
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def token(self, i: int) -> str:
+        """
+        Returns the i-th token of the text.
+        """
+        return self.text[self.starts[i] : self.ends[i]]
+
+    def tokens(self) -> list:
+        """
+        Returns the list of the tokens of the text.
+        """
+        text = self.text
+        return [
+            text[start:end]
+            for start, end in zip(self.starts.tolist(), self.ends.tolist())
+        ]
+
+    def token_at(self, offset):
+        """
+        Returns the index of the token containing the given char offset, or of
+        the next token if the offset falls between two tokens.
+
+        Args:
+            offset (int or array): One or several char offsets.
+
+        Returns:
+            int or array: The token indexes. ``len(self)`` is returned for
+            offsets after the last token.
+        """
+        return np.searchsorted(self.ends, offset, side="right")
+
+    def tokens_before(self, offset):
+        """
+        Returns the number of tokens starting before the given char offset.
+
+        Args:
+            offset (int or array): One or several char offsets.
+
+        Returns:
+            int or array: The number of tokens.
+        """
+        return np.searchsorted(self.starts, offset, side="left")
+
+    def tokens_until(self, offset):
+        """
+        Returns the number of tokens ending at or before the given char offset.
+
+        Args:
+            offset (int or array): One or several char offsets.
+
+        Returns:
+            int or array: The number of tokens.
+        """
+        return np.searchsorted(self.ends, offset, side="right")
+
+    def distance(self, span_a: tuple, span_b: tuple) -> int:
+        """
+        Returns the number of tokens between the end of ``span_a`` and the
+        start of ``span_b``. A token cut by one of the spans is counted.
+
+        Args:
+            span_a (tuple): The (start, end) char offsets of the first span.
+            span_b (tuple): The (start, end) char offsets of the second span.
+
+        Returns:
+            int: The number of tokens between the two spans, 0 if they overlap.
+        """
+        distance = self.tokens_before(span_b[0]) - self.tokens_until(span_a[1])
+        return max(0, int(distance))
+
+    def char_span(self, i: int, j: int) -> tuple:
+        """
+        Returns the char span covered by the tokens ``i`` to ``j``, ``j``
+        excluded.
+
+        Args:
+            i (int): The index of the first token.
+            j (int): The index after the last token.
+
+        Returns:
+            tuple: The (start, end) char offsets.
+        """
+        if j <= i:
+            raise ValueError(f"Empty token range: {i}..{j}")
+        return int(self.starts[i]), int(self.ends[j - 1])
@@ -11,13 +11,19 @@ import json
 from openai import OpenAI
 
 from vroom.alias import get_aliases_fuzzy_partial_token
-from vroom.cooccurences import get_cooccurences
+from vroom.CooccurrenceMatrix import CooccurrenceMatrix
+from vroom.cooccurences import (
+    CooccurrenceAccumulator,
+    get_cooccurences_sliding_window,
+)
+from vroom.EntitySpans import EntitySpans
+from vroom.InferenceConfig import InferenceConfig
 from vroom.loggers import JSONLogger
 from vroom.NER import (
     chunk_text_by_sentence,
     get_entities_from_file,
-    get_positions_of_entities,
-    tag_text_with_entities,
+    iter_entities_from_file,
+    read_file,
 )
 
 
@@ -33,10 +39,15 @@ def get_cooccurences_from_text(path: str):
     """
 
     entities, chunks = get_entities_from_file(path)
-    return get_cooccurences(chunks, entities)
+    return get_cooccurences_sliding_window(chunks, entities)
 
 
 def find_cooccurences_aliases(cooccurences, aliases):
+    if isinstance(cooccurences, CooccurrenceMatrix):
+        return find_cooccurence_matrix_aliases(cooccurences, aliases)
+    if isinstance(cooccurences, dict):
+        return find_counted_cooccurences_aliases(cooccurences, aliases)
+
     no_alias_1_list = []
     no_alias_2_list = []
     cooccurrences_aliases = []
@@ -82,19 +93,104 @@ def find_cooccurences_aliases(cooccurences, aliases):
     return cooccurrences_aliases
 
 
-def get_cooccurences_with_aliases(path: str, logger: JSONLogger = None):
+def _get_alias_group_finder(aliases: list):
+    """
+    Returns a function giving the group of aliases of a name as a tuple, or
+    None, with a case insensitive lookup.
+    """
+    lowered_aliases = [[a.lower() for a in alias] for alias in aliases]
+
+    def get_group(name):
+        name = name.lower()
+        for alias, lowered_alias in zip(aliases, lowered_aliases):
+            if name in lowered_alias:
+                return tuple(alias)
+        return None
+
+    return get_group
+
+
+def find_counted_cooccurences_aliases(cooccurences: dict, aliases: list):
+    """
+    Replaces the names of counted co-occurences by their group of aliases.
+
+    Each name is looked up once and the counts of the pairs of names mapped to
+    the same pair of groups are summed, so the cost depends on the number of
+    unique pairs and not on the number of interactions.
+
+    Args:
+        cooccurences (dict): The ``{(a, b): count}`` dictionary returned by
+            ``get_cooccurences`` with ``counted=True``.
+        aliases (list): A list of lists of aliases.
+
+    Returns:
+        dict: The ``{(group_a, group_b): count}`` dictionary of the
+              co-occurences between the groups of aliases, given as tuples,
+              with group_a <= group_b.
+    """
+    get_group = _get_alias_group_finder(aliases)
+    groups = {}
+    cooccurrences_aliases = {}
+    for (name_1, name_2), count in cooccurences.items():
+        for name in (name_1, name_2):
+            if name not in groups:
+                groups[name] = get_group(name)
+        group_1 = groups[name_1]
+        group_2 = groups[name_2]
+        if group_1 is None or group_2 is None or group_1 == group_2:
+            continue
+        pair = (group_1, group_2) if group_1 <= group_2 else (group_2, group_1)
+        cooccurrences_aliases[pair] = cooccurrences_aliases.get(pair, 0) + count
+    return cooccurrences_aliases
+
+
+def find_cooccurence_matrix_aliases(matrix: CooccurrenceMatrix, aliases: list):
+    """
+    Replaces the names of a co-occurence matrix by their group of aliases.
+
+    Each name is looked up once, so the cost does not depend on the number of
+    interactions.
+
+    Args:
+        matrix (CooccurrenceMatrix): The co-occurences between the names.
+        aliases (list): A list of lists of aliases.
+
+    Returns:
+        CooccurrenceMatrix: The co-occurences between the groups of aliases,
+                            given as tuples.
+    """
+    return matrix.relabel(_get_alias_group_finder(aliases))
+
+
+def get_cooccurences_with_aliases(
+    path: str,
+    logger: JSONLogger = None,
+    inference_config: InferenceConfig = None,
+):
     """
     Get the aliases of the cooccurences of characters from the given text.
 
     Args:
         path (str): The path of the text file.
         logger (JSONLogger, optional): The logger to save the aliases. Defaults to None.
+        inference_config (InferenceConfig, optional): The settings of PyTorch
+            for the NER, saved by the logger. Defaults to those of torch.
 
     Returns:
-        list: A list of tuples representing the interactions between entities in the text.
+        dict: The number of interactions between each pair of groups of aliases, as a {(group_a, group_b): count} dictionary.
     """
-    entities, chunks = get_entities_from_file(path)
-    cooccurences = get_cooccurences(chunks, entities)
+    # The co-occurences are extracted as soon as the entities of a chunk are
+    # known, instead of waiting for the whole file.
+    accumulator = CooccurrenceAccumulator(counted=True)
+    entities = []
+    chunks = []
+    for chunk, chunk_entities in iter_entities_from_file(
+        path, inference_config=inference_config
+    ):
+        accumulator.feed(chunk, chunk_entities)
+        chunks.append(chunk)
+        entities.append(chunk_entities)
+    cooccurences = accumulator.finalize()
     entities_unfold = [entity for sublist in entities for entity in sublist]
     aliases = get_aliases_fuzzy_partial_token(entities_unfold, 99)
 
@@ -109,22 +205,36 @@ def get_cooccurences_with_aliases(path: str, logger: JSONLogger = None):
             set([entity["word"] for entity in entities_unfold])
         )
         saves["aliases"] = aliases
-        saves["cooccurences"] = cooccurences
+        saves["cooccurences"] = [
+            [name_1, name_2, count]
+            for (name_1, name_2), count in cooccurences.items()
+        ]
+        if inference_config is not None:
+            saves["inference_config"] = inference_config.to_dict()
         logger(saves)
 
     cooccurences_aliases = find_cooccurences_aliases(cooccurences, aliases)
     return cooccurences_aliases
 
 
-def get_cooccurences_with_aliases_and_gpt(path: str, logger: JSONLogger = None):
+def get_cooccurences_with_aliases_and_gpt(
+    path: str,
+    logger: JSONLogger = None,
+    inference_config: InferenceConfig = None,
+    device: str = "cpu",
+):
     """
     Get the aliases of the cooccurences of characters from the given text.
 
     Args:
         path (str): The path of the text file.
+        logger (JSONLogger, optional): The logger to save the aliases. Defaults to None.
+        inference_config (InferenceConfig, optional): The settings of PyTorch
+            for the NER, saved by the logger. Defaults to those of torch.
+        device (str): The device of the NER model.
 
     Returns:
-        list: A list of tuples representing the interactions between entities in the text.
+        dict: The number of interactions between each pair of groups of aliases, as a {(group_a, group_b): count} dictionary.
     """
     system_prompt = r"""
 Tu es un expert dans les livres "La Fondation" de Isaac Asimov.
@@ -175,8 +285,12 @@ Tu as le droit de supprimer des personnes si tu penses qu'ils ne sont pas des pe
 Fais-le pour les personnes suivantes et essaie de trouver les meilleurs regroupements possibles. Je compte sur toi, merci !
     """
 
-    entities, chunks = get_entities_from_file(path, device="cuda")
-    cooccurences = get_cooccurences(chunks, entities)
+    entities, chunks = get_entities_from_file(
+        path, device=device, inference_config=inference_config
+    )
+    cooccurences = get_cooccurences_sliding_window(
+        chunks, entities, counted=True
+    )
     entities = [entity for sublist in entities for entity in sublist]
     word_entities = [entity["word"] for entity in entities]
     print("entities = ", set(word_entities))
@@ -221,13 +335,18 @@ Fais-le pour les personnes suivantes et essaie de trouver les meilleurs regroupe
             }
         saves["entities"] = list(set(word_entities))
         saves["aliases"] = aliases
-        saves["cooccurences"] = cooccurences
+        saves["cooccurences"] = [
+            [name_1, name_2, count]
+            for (name_1, name_2), count in cooccurences.items()
+        ]
         saves["gpt"] = {
             "system_prompt": system_prompt,
             "user_prompt": user_prompt,
             "generated_content": generated_content,
             "params": params,
         }
+        if inference_config is not None:
+            saves["inference_config"] = inference_config.to_dict(device)
         logger(saves)
 
     return find_cooccurences_aliases(cooccurences, aliases)
@@ -243,7 +362,7 @@ def get_cooccurences_with_aliases_and_gpt_NER(
         path (str): The path of the text file.
 
     Returns:
-        list: A list of tuples representing the interactions between entities in the text.
+        dict: The number of interactions between each pair of groups of aliases, as a {(group_a, group_b): count} dictionary.
     """
     system_prompt = r"""
     Tu es un extracteur d'entités.
@@ -336,8 +455,7 @@ def get_cooccurences_with_aliases_and_gpt_NER(
     <start>
     """
     from vroom.alias import get_aliases_fuzzy
-    from vroom.cooccurences import get_cooccurences
-    from vroom.NER import read_file
+    from vroom.cooccurences import get_cooccurences_sliding_window
 
     content = read_file(path)
     chunks = chunk_text_by_sentence(content, batch_size=5)
@@ -380,9 +498,11 @@ def get_cooccurences_with_aliases_and_gpt_NER(
 
     gpt_entities = set(entities)
 
-    tagged_file = tag_text_with_entities(path, gpt_entities)
-    out_entities = get_positions_of_entities(tagged_file)
-    cooccurences = get_cooccurences([tagged_file], [out_entities])
+    text = read_file(path)
+    out_entities = EntitySpans.from_names(text, gpt_entities)
+    cooccurences = get_cooccurences_sliding_window(
+        [text], [out_entities], counted=True
+    )
 
     print("entities = ", entities)
     entities = [{"word": entity} for entity in entities]
@@ -0,0 +1,291 @@
+r"""
+Package for the chunking of the texts given to the NER models.
+
+The chunks are packed up to a number of subwords of the model tokenizer
+instead of a number of characters, so that each forward pass fills the input
+of the model. Consecutive chunks overlap by a few subwords, and the entities
+found twice in an overlap, or cut at the border of a chunk, are merged by
+their char span in the whole text.
+
+The chunkers by characters and by sentences are generators which keep the
+length of the current chunk, so that a text is chunked in linear time.
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import itertools
+
+from vroom.tokenize import sent_tokenize
+
+# The number of subwords kept free in a chunk of the default size. A chunk is
+# tokenized again by the pipeline, alone, and the first word of a substring,
+# or a word merged differently with its leading space, can be split into more
+# subwords than in the whole text.
+TOKEN_MARGIN = 8
+
+
+def _iter_chunk_words(words, chunk_size: int):
+    """
+    Packs the words into subtexts of at most chunk_size characters.
+    """
+    chunk = []
+    # The length of " ".join(chunk).
+    length = 0
+    for word in words:
+        if length + len(word) > chunk_size:
+            yield " ".join(chunk)
+            chunk = []
+            length = 0
+        length += len(word) + (1 if chunk else 0)
+        chunk.append(word)
+    if chunk:
+        yield " ".join(chunk)
+
+
+def iter_chunk_text(text: str, chunk_size: int = 500):
+    """
+    Chunks the text into subtexts of at most chunk_size characters, made of
+    whole words.
+
+    Args:
+        text (str): The input text.
+        chunk_size (int): The size of the chunks.
+
+    Yields:
+        str: A subtext.
+    """
+    yield from _iter_chunk_words(text.split(), chunk_size)
+
+
+def iter_chunk_windows(windows, chunk_size: int = 500):
+    """
+    Chunks a text given by windows, such as those of a
+    ``vroom.TextReader``, into the same subtexts as ``iter_chunk_text`` on
+    the whole text.
+
+    Args:
+        windows (iterable): The (offset, text) windows of a text whose
+            whitespaces are normalized, cut at spaces.
+        chunk_size (int): The size of the chunks.
+
+    Yields:
+        tuple: The char offset of the subtext in the whole text and the
+            subtext.
+    """
+    windows = iter(windows)
+    first = next(windows, None)
+    if first is None:
+        return
+    # The normalized text is its words joined by single spaces, after a
+    # space if it starts with whitespaces.
+    offset = 1 if first[1].startswith(" ") else 0
+    words = (
+        word
+        for _, window in itertools.chain([first], windows)
+        for word in window.split()
+    )
+    for chunk in _iter_chunk_words(words, chunk_size):
+        yield offset, chunk
+        offset += len(chunk) + 1
+
+
+def chunk_text(text: str, chunk_size: int = 500) -> list:
+    """
+    Chunk the text into a list of subtexts of a size of chunk_size words.
+
+    Args:
+        text (str): The input text.
+        chunk_size (int): The size of the chunks.
+
+    Returns:
+        list: A list of subtexts.
+    """
+    return list(iter_chunk_text(text, chunk_size))
+
+
+def iter_chunk_text_by_sentence(
+    text: str, batch_size: int = 5, tokenizer: str = "nltk"
+):
+    """
+    Chunks the text into batches of batch_size sentences.
+
+    Args:
+        text (str): The input text.
+        batch_size (int): The number of sentences per batch.
+        tokenizer (str): The sentence tokenizer of ``vroom.tokenize``, "nltk"
+            or "regex". The punkt tokenizer of nltk is loaded once.
+
+    Yields:
+        str: A batch of sentences.
+    """
+    batch = []
+    for sentence in sent_tokenize(text, tokenizer):
+        batch.append(sentence)
+        if len(batch) == batch_size:
+            yield " ".join(batch)
+            batch = []
+    if batch:
+        yield " ".join(batch)
+
+
+def chunk_text_by_sentence(
+    text: str, batch_size: int = 5, tokenizer: str = "nltk"
+) -> list:
+    """
+    Chunk the text into a list of batches of batch_size sentences.
+
+    Args:
+        text (str): The input text.
+        batch_size (int): The number of sentences per batch.
+        tokenizer (str): The sentence tokenizer of ``vroom.tokenize``, "nltk"
+            or "regex".
+
+    Returns:
+        list: A list of subtexts.
+    """
+    return list(iter_chunk_text_by_sentence(text, batch_size, tokenizer))
+
+
+def _starts_word(text: str, offsets: list, i: int) -> bool:
+    """
+    Returns whether the i-th subword starts a word of the text.
+    """
+    start = offsets[i][0]
+    return (
+        i == 0
+        or offsets[i - 1][1] < start
+        or text[start].isspace()
+        or text[start - 1].isspace()
+    )
+
+
+def get_token_chunk_spans(
+    text: str, offsets: list, max_tokens: int, stride: int = 0
+) -> list:
+    """
+    Packs the subwords of a text into chunks of at most ``max_tokens``
+    subwords, which start and end at a word boundary.
+
+    Args:
+        text (str): The input text.
+        offsets (list): The (start, end) char span of each subword of the
+            text, such as the offset mapping of a fast tokenizer. The empty
+            spans of the special tokens are ignored.
+        max_tokens (int): The maximum number of subwords of a chunk.
+        stride (int): The number of subwords shared by two consecutive
+            chunks. The overlap is moved to the closest start of a word.
+
+    Returns:
+        list: The (start, end) char span of each chunk in the text.
+    """
+    if max_tokens < 1:
+        raise ValueError("A chunk must hold at least one subword.")
+    if not 0 <= stride < max_tokens:
+        raise ValueError("The stride must be smaller than the chunk size.")
+
+    offsets = [(start, end) for start, end in offsets if end > start]
+    n_tokens = len(offsets)
+    spans = []
+    begin = 0
+    while begin < n_tokens:
+        end = min(begin + max_tokens, n_tokens)
+        if end < n_tokens:
+            # Cut before the last word, unless it is longer than a chunk.
+            cut = end
+            while cut > begin and not _starts_word(text, offsets, cut):
+                cut -= 1
+            if cut > begin:
+                end = cut
+
+        start = offsets[begin][0]
+        while text[start].isspace():
+            start += 1
+        spans.append((start, offsets[end - 1][1]))
+        if end == n_tokens:
+            break
+
+        # The next chunk starts at the word of the chunk which is the
+        # closest to ``stride`` subwords before its end.
+        words = [
+            i for i in range(begin + 1, end) if _starts_word(text, offsets, i)
+        ]
+        if stride and words:
+            begin = min(words, key=lambda i: (abs(end - stride - i), i))
+        else:
+            begin = end
+    return spans
+
+
+def chunk_text_by_tokens(
+    text: str, tokenizer, max_tokens: int = None, stride: int = 32
+) -> tuple:
+    """
+    Chunks a text into subtexts of at most ``max_tokens`` subwords of the
+    tokenizer of a model, which overlap by ``stride`` subwords.
+
+    Args:
+        text (str): The input text.
+        tokenizer (transformers.PreTrainedTokenizerFast): The tokenizer of
+            the model, which must return the offset mapping of the subwords.
+        max_tokens (int, optional): The maximum number of subwords of a
+            chunk. Defaults to the input size of the model, without its
+            special tokens and ``TOKEN_MARGIN`` subwords, so that the chunk
+            still fits the model when it is tokenized again.
+        stride (int): The number of subwords shared by two consecutive
+            chunks.
+
+    Returns:
+        list: A list of subtexts.
+        list: The char offset of each subtext in the text.
+    """
+    if max_tokens is None:
+        max_tokens = max(
+            tokenizer.model_max_length
+            - tokenizer.num_special_tokens_to_add()
+            - TOKEN_MARGIN,
+            1,
+        )
+    offsets = tokenizer(
+        text, add_special_tokens=False, return_offsets_mapping=True
+    )["offset_mapping"]
+
+    spans = get_token_chunk_spans(text, offsets, max_tokens, stride)
+    chunks = [text[start:end] for start, end in spans]
+    return chunks, [start for start, _ in spans]
+
+
+def merge_chunk_entities(chunks_entities: list, offsets: list) -> list:
+    """
+    Merges the entities of overlapping chunks into the entities of the whole
+    text.
+
+    The entities are moved to their char span in the text. When two entities
+    overlap, such as an entity found in two chunks or a name cut at the
+    border of a chunk and found whole in the next one, the longest is kept.
+
+    Args:
+        chunks_entities (list): The list of entities of each chunk, as
+            returned by ``vroom.NER.get_entities``.
+        offsets (list): The char offset of each chunk in the text.
+
+    Returns:
+        list: The entities of the text, sorted by their start.
+    """
+    entities = [
+        dict(entity, start=entity["start"] + offset, end=entity["end"] + offset)
+        for chunk_entities, offset in zip(chunks_entities, offsets)
+        for entity in chunk_entities
+    ]
+    entities.sort(key=lambda entity: (entity["start"], -entity["end"]))
+
+    merged = []
+    for entity in entities:
+        if merged and entity["start"] < merged[-1]["end"]:
+            last = merged[-1]
+            if entity["end"] - entity["start"] > last["end"] - last["start"]:
+                merged[-1] = entity
+            continue
+        merged.append(entity)
+    return merged
@@ -1,17 +1,50 @@
-r"""  Package for co-occurences tasks.
+r"""Package for co-occurences tasks.
 
 Authors
 --------
  * Nicolas Bataille 2023
+ * Adel Moumen 2024
 """
 
-import nltk
+import bisect
+import re
+from collections import Counter, deque
+
+import numpy as np
+
+from vroom.CooccurrenceMatrix import CooccurrenceMatrix
+from vroom.EntitySpans import EntitySpans
+from vroom.TokenIndex import TokenIndex
+from vroom.tokenize import count_tokens, sentence_spans, token_spans
+
+# Token distances computed on the whole text can differ from the token count
+# of the tokenizer on the substring between two entities. Pairs whose distance
+# falls within this margin of the window size are checked on the substring.
+#
+# nltk only tokenizes the substring differently at its edges, and each of the
+# three following cases changes the count by one token at most:
+# - the word cut by the end of the first entity, such as the "K." of "YORK."
+#   when the entity is "YOR", is one token in the substring and two in the
+#   whole text, "YORK" and ".";
+# - the word cut by the start of the second entity, such as the "l'" of
+#   "l'Encyclopaedia", is one token in the whole text and two in the
+#   substring, "l" and "'";
+# - punkt takes the end of the substring for the end of a sentence, and
+#   splits the period of its last word, such as "M." before "Seldon", into
+#   "M" and ".".
+# Inside the substring, punkt places the sentence ends from the neighbouring
+# tokens only, as in the whole text. On the chapters of data/kaggle, the two
+# counts differ by one token at most.
+_VERIFICATION_MARGIN = 3
 
 
 def set_entities_indexes(text_chunks: list, entities: list):
     """
     Sets the start and end indexes of the entities in the joined text.
 
+    The entities are modified in place, so calling it twice on the same
+    entities corrupts their offsets. See ``get_entities_offsets``.
+
     Args:
         text_chunks (list): A list of text chunks.
         entities (list): A list of dictionaries representing the named entities. Each dictionary contains the keys 'entity_group',
@@ -31,31 +64,751 @@ def set_entities_indexes(text_chunks: list, entities: list):
     return entities
 
 
-def get_cooccurences(text_chunks: list, entities: list):
+def get_entities_offsets(chunk_lengths: list, entity_spans: list):
+    """
+    Computes the start and end indexes of the entities in the joined text,
+    without modifying them.
+
+    The chunks are considered joined by a space, as in ``get_cooccurences``.
+
+    Example:
+    get_entities_offsets([10, 5], [[(0, 4)], [(1, 3), (2, 5)]])
+    # (array([ 0, 12, 13]), array([ 4, 14, 16]))
+
+    Args:
+        chunk_lengths (list): The length of each text chunk.
+        entity_spans (list): The list of list of (start, end) offsets of the
+            entities in their given chunk text.
+
+    Returns:
+        tuple: The start and end offsets of all the entities in the joined
+            text, as two NumPy integer arrays.
+    """
+    chunk_lengths = np.asarray(chunk_lengths, dtype=np.int64)
+    chunk_offsets = np.cumsum(chunk_lengths + 1) - (chunk_lengths + 1)
+    counts = [len(spans) for spans in entity_spans]
+    spans = np.array(
+        [span for spans in entity_spans for span in spans], dtype=np.int64
+    ).reshape(-1, 2)
+    offsets = np.repeat(chunk_offsets[: len(counts)], counts)
+    return spans[:, 0] + offsets, spans[:, 1] + offsets
+
+
+def _flatten_entities(text_chunks: list, entities: list):
+    """
+    Returns the words of the entities and their offsets in the joined text.
+    """
+    if entities and all(isinstance(spans, EntitySpans) for spans in entities):
+        # The offsets are already stored in arrays.
+        chunk_lengths = np.array([len(chunk) for chunk in text_chunks])
+        chunk_offsets = np.cumsum(chunk_lengths + 1) - (chunk_lengths + 1)
+        offsets = np.repeat(
+            chunk_offsets[: len(entities)], [len(spans) for spans in entities]
+        )
+        return (
+            [word for spans in entities for word in spans.words],
+            np.concatenate([spans.starts for spans in entities]) + offsets,
+            np.concatenate([spans.ends for spans in entities]) + offsets,
+        )
+    words = [entity["word"] for sublist in entities for entity in sublist]
+    starts, ends = get_entities_offsets(
+        [len(chunk) for chunk in text_chunks],
+        [
+            [(entity["start"], entity["end"]) for entity in sublist]
+            for sublist in entities
+        ],
+    )
+    return words, starts, ends
+
+
+def _is_within_window(
+    substring: str, distance: int, window_size: int, tokenizer: str = "nltk"
+):
+    """
+    Checks if two entities are within the window of each other.
+
+    Args:
+        substring (str): The text between the two entities.
+        distance (int): The number of tokens between the two entities, as
+            given by a ``TokenIndex``.
+        window_size (int): The maximum number of tokens between two entities.
+        tokenizer (str): The tokenizer of ``vroom.tokenize``, "nltk" or
+            "regex".
+
+    Returns:
+        bool: True if the two entities co-occur.
+    """
+    if distance > window_size + _VERIFICATION_MARGIN:
+        return False
+    if distance <= window_size - _VERIFICATION_MARGIN:
+        return True
+    return count_tokens(substring, tokenizer) <= window_size
+
+
+def _get_pairwise_cooccurences(
+    text: str, words: list, starts, ends, window_size: int, tokenizer="nltk"
+):
+    """
+    Compares every pair of entities by tokenizing the text between them.
+
+    Args:
+        text (str): The joined text.
+        words (list): The words of the entities.
+        starts (array): The start offsets of the entities in the joined text.
+        ends (array): The end offsets of the entities in the joined text.
+        window_size (int): The maximum number of tokens between two entities.
+        tokenizer (str): The tokenizer of ``vroom.tokenize``.
+
+    Returns:
+        list: A list of tuples of entities.
+    """
+    starts = starts.tolist()
+    ends = ends.tolist()
+    interactions = []
+    for i in range(len(words)):
+        for j in range(i + 1, len(words)):
+            if words[i] != words[j]:
+                substring = text[ends[i] : starts[j]]
+                if count_tokens(substring, tokenizer) <= window_size:
+                    interactions.append((words[i], words[j]))
+    return interactions
+
+
+def count_cooccurences(interactions) -> dict:
+    """
+    Counts the interactions between each pair of entities.
+
+    Args:
+        interactions (list): A list of tuples of entities.
+
+    Returns:
+        dict: The number of interactions of each pair, as a
+              ``{(a, b): count}`` dictionary where a <= b.
+    """
+    counts = {}
+    for a, b in interactions:
+        pair = (a, b) if a <= b else (b, a)
+        counts[pair] = counts.get(pair, 0) + 1
+    return counts
+
+
+def get_cooccurences(
+    text_chunks: list,
+    entities: list,
+    token_index: TokenIndex = None,
+    tokenizer: str = "nltk",
+    counted: bool = False,
+):
     """
     Extracts co-occurences from the given text.
 
     Args:
         chunks_text(list)): The list of subtexts
         entities (list): The list of list of dictionnaries of entities in their given chunk text.
+        token_index (TokenIndex, optional): A prebuilt ``TokenIndex`` of the
+            joined text, with the tokens of ``tokenizer``. When given, the
+            text is not tokenized again.
+        tokenizer (str): The tokenizer of ``vroom.tokenize`` counting the
+            tokens between two entities, "nltk" or "regex".
+        counted (bool): Whether to return the number of interactions of each
+            pair instead of the list of interactions.
 
     Returns:
-        list: A list of tuples of entities.
+        list: A list of tuples of entities, or a ``{(a, b): count}``
+              dictionary with a <= b if ``counted`` is True.
     """
-    interactions = []
+    if token_index is not None or tokenizer != "nltk":
+        return get_cooccurences_sliding_window(
+            text_chunks,
+            entities,
+            token_index=token_index,
+            tokenizer=tokenizer,
+            counted=counted,
+        )
+
     text = " ".join(text_chunks)
+    words, starts, ends = _flatten_entities(text_chunks, entities)
+
+    interactions = _get_pairwise_cooccurences(text, words, starts, ends, 25)
+    return count_cooccurences(interactions) if counted else interactions
+
+
+def _get_unit_positions(unit_index: TokenIndex, starts, ends):
+    """
+    Returns the index of the units (sentences, paragraphs) containing the
+    start and the last character of each entity. An offset between two units
+    belongs to the previous one.
+    """
+    return (
+        np.maximum(unit_index.tokens_before(np.asarray(starts) + 1) - 1, 0),
+        np.maximum(unit_index.tokens_before(np.asarray(ends)) - 1, 0),
+    )
+
+
+class Window:
+    r"""
+    Definition of the distance between two entities of a text.
+
+    The text is cut into units (tokens, characters, sentences...) and each
+    entity gets a position in units for its start and for its end. The
+    distance between two entities is the difference between the start
+    position of the second one and the end position of the first one, and
+    two entities co-occur if it is at most ``size``. Sub-classes define the
+    units with the ``positions`` method.
+
+    Args:
+        size : int
+            The maximum distance between two entities.
+    """
+
+    # Distances computed by ``positions`` which are above the size by at most
+    # this margin are checked with ``is_within``.
+    margin = 0
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+
+    def positions(self, text: str, starts, ends):
+        """
+        Returns the positions of the entities in units.
+
+        Args:
+            text (str): The text of the entities.
+            starts (np.ndarray): The char offsets of the starts of the entities.
+            ends (np.ndarray): The char offsets of the ends of the entities.
+
+        Returns:
+            np.ndarray: The position of the start of each entity.
+            np.ndarray: The position of the end of each entity.
+        """
+        raise NotImplementedError
+
+    def is_within(self, substring: str, distance: int) -> bool:
+        """
+        Checks if two entities at the given distance co-occur.
+
+        Args:
+            substring (str): The text between the two entities.
+            distance (int): The distance given by ``positions``.
+
+        Returns:
+            bool: True if the two entities co-occur.
+        """
+        return distance <= self.size
+
+    def exact_distance(self, substring: str, distance: int) -> int:
+        """
+        Returns the exact distance between two entities, for the pairs whose
+        distance given by ``positions`` is within ``margin`` of the size.
+
+        Args:
+            substring (str): The text between the two entities.
+            distance (int): The distance given by ``positions``.
+
+        Returns:
+            int: The exact distance.
+        """
+        return distance
+
+
+class TokenWindow(Window):
+    r"""
+    Window of tokens, ``nltk.word_tokenize`` ones by default.
+
+    With ``exact=True`` the pairs close to the limit are checked by tokenizing
+    the text between them, so that the result is the same as tokenizing every
+    substring, like ``get_cooccurences`` does.
+
+    Args:
+        size : int
+            The maximum number of tokens between two entities.
+        token_index : TokenIndex, optional
+            A prebuilt ``TokenIndex`` of the text, with the tokens of
+            ``tokenizer``.
+        exact : bool
+            Whether to check the pairs close to the limit on the substring.
+        tokenizer : str
+            The tokenizer of ``vroom.tokenize``, "nltk" or "regex".
+    """
+
+    def __init__(
+        self,
+        size: int = 25,
+        token_index: TokenIndex = None,
+        exact=True,
+        tokenizer: str = "nltk",
+    ) -> None:
+        super().__init__(size)
+        self.token_index = token_index
+        self.exact = exact
+        self.tokenizer = tokenizer
+        self.margin = _VERIFICATION_MARGIN if exact else 0
+
+    def positions(self, text: str, starts, ends):
+        token_index = self.token_index
+        if token_index is None:
+            token_index = TokenIndex(text, token_spans(text, self.tokenizer))
+        return token_index.tokens_before(starts), token_index.tokens_until(ends)
+
+    def is_within(self, substring: str, distance: int) -> bool:
+        if self.exact:
+            return _is_within_window(
+                substring, distance, self.size, self.tokenizer
+            )
+        return distance <= self.size
+
+    def exact_distance(self, substring: str, distance: int) -> int:
+        if self.exact:
+            return count_tokens(substring, self.tokenizer)
+        return distance
+
+
+class CharacterWindow(Window):
+    r"""
+    Window of characters.
 
-    entities = set_entities_indexes(text_chunks, entities)
-    entities = [entity for sublist in entities for entity in sublist]
+    Args:
+        size : int
+            The maximum number of characters between two entities.
+    """
+
+    def positions(self, text: str, starts, ends):
+        return np.asarray(starts), np.asarray(ends)
+
+
+class SentenceWindow(Window):
+    r"""
+    Window of sentences, ``nltk.sent_tokenize`` ones by default.
+
+    The distance is the number of sentence boundaries between the two
+    entities, so a size of 0 pairs the entities of a same sentence and a size
+    of 1 also pairs the entities of two consecutive sentences.
+
+    Args:
+        size : int
+            The maximum number of sentence boundaries between two entities.
+        language : str
+            The language of the punkt sentence tokenizer.
+        tokenizer : str
+            The sentence tokenizer of ``vroom.tokenize``, "nltk" or "regex".
+    """
+
+    def __init__(
+        self, size: int = 0, language: str = "english", tokenizer="nltk"
+    ) -> None:
+        super().__init__(size)
+        self.language = language
+        self.tokenizer = tokenizer
+
+    def positions(self, text: str, starts, ends):
+        spans = sentence_spans(text, self.tokenizer, self.language)
+        return _get_unit_positions(TokenIndex(text, spans), starts, ends)
 
-    for i in range(len(entities)):
-        for j in range(i + 1, len(entities)):
-            if entities[i]["word"] != entities[j]["word"]:
-                substring = text[entities[i]["end"] : entities[j]["start"]]
-                chunked_substring = nltk.word_tokenize(substring)
-                if len(chunked_substring) <= 25:
-                    interactions.append(
-                        (entities[i]["word"], entities[j]["word"])
-                    )
+
+class ParagraphWindow(Window):
+    r"""
+    Window of paragraphs.
+
+    The paragraphs are separated by blank lines or by an indented line, so the
+    offsets of the entities must refer to the raw text and not to the text
+    returned by ``NER.read_file``, whose whitespaces are normalized. As for
+    ``SentenceWindow``, a size of 0 pairs the entities of a same paragraph.
+
+    Args:
+        size : int
+            The maximum number of paragraph boundaries between two entities.
+        separator : str
+            The regular expression matching the separation between two
+            paragraphs.
+    """
+
+    def __init__(
+        self, size: int = 0, separator: str = r"\n\s*\n|\n[ \t]+"
+    ) -> None:
+        super().__init__(size)
+        self.separator = re.compile(separator)
+
+    def positions(self, text: str, starts, ends):
+        spans = []
+        start = 0
+        for match in self.separator.finditer(text):
+            spans.append((start, match.start()))
+            start = match.end()
+        spans.append((start, len(text)))
+        return _get_unit_positions(TokenIndex(text, spans), starts, ends)
+
+
+def get_cooccurences_in_window(text: str, entities: list, window: Window):
+    """
+    Extracts co-occurences from the entities of a text in a single pass.
+
+    Args:
+        text (str): The text.
+        entities (list): The list of dictionnaries of entities, sorted by
+            position, with 'word', 'start' and 'end' offsets in the text.
+        window (Window): The definition of the distance between two entities.
+
+    Returns:
+        list: A list of tuples of entities, in the same order as
+              ``get_cooccurences``.
+    """
+    return _get_cooccurences_in_window(
+        text,
+        [entity["word"] for entity in entities],
+        np.array([entity["start"] for entity in entities], dtype=np.int64),
+        np.array([entity["end"] for entity in entities], dtype=np.int64),
+        window,
+    )
+
+
+def _get_cooccurences_in_window(
+    text: str, words: list, starts, ends, window: Window
+):
+    """
+    Extracts co-occurences from the offsets of the entities of a text, sorted
+    by position.
+    """
+    if np.any(starts[1:] < starts[:-1]):
+        raise ValueError("The entities must be sorted by position.")
+
+    start_positions, end_positions = window.positions(text, starts, ends)
+    # Since the entities are sorted, the positions of their start are sorted
+    # too and the last entity which may co-occur with each one is found by
+    # binary search.
+    limits = end_positions + window.size + window.margin
+    lasts = np.searchsorted(start_positions, limits, side="right").tolist()
+    start_positions = start_positions.tolist()
+    end_positions = end_positions.tolist()
+    starts = starts.tolist()
+    ends = ends.tolist()
+
+    interactions = []
+    for i, word in enumerate(words):
+        for j in range(i + 1, lasts[i]):
+            if word == words[j]:
+                continue
+            distance = start_positions[j] - end_positions[i]
+            substring = text[ends[i] : starts[j]]
+            if window.is_within(substring, distance):
+                interactions.append((word, words[j]))
 
     return interactions
+
+
+def get_cooccurences_sliding_window(
+    text_chunks: list,
+    entities: list,
+    window_size: int = 25,
+    token_index: TokenIndex = None,
+    window: Window = None,
+    tokenizer: str = "nltk",
+    counted: bool = False,
+):
+    """
+    Extracts co-occurences from the given text in a single pass.
+
+    The joined text is tokenized once and each entity is mapped to a token
+    position, so that only the entities within the window of each other are
+    compared. The output is the same as ``get_cooccurences``.
+
+    Args:
+        text_chunks (list): The list of subtexts.
+        entities (list): The list of list of dictionnaries of entities in their given chunk text.
+        window_size (int): The maximum number of tokens between two entities.
+        token_index (TokenIndex, optional): A prebuilt ``TokenIndex`` of the
+            joined text, with the tokens of ``tokenizer``. Defaults to None,
+            in which case it is built.
+        window (Window, optional): Another definition of the window, such as a
+            ``SentenceWindow``. Defaults to a ``TokenWindow`` of
+            ``window_size`` tokens.
+        tokenizer (str): The tokenizer of ``vroom.tokenize`` of the default
+            ``TokenWindow``, "nltk" or "regex".
+        counted (bool): Whether to return the number of interactions of each
+            pair instead of the list of interactions.
+
+    Returns:
+        list: A list of tuples of entities, or a ``{(a, b): count}``
+              dictionary with a <= b if ``counted`` is True.
+    """
+    if window is None:
+        window = TokenWindow(window_size, token_index, tokenizer=tokenizer)
+
+    text = " ".join(text_chunks)
+    words, starts, ends = _flatten_entities(text_chunks, entities)
+
+    if isinstance(window, TokenWindow) and np.any(starts[1:] < starts[:-1]):
+        # The sweep relies on entities sorted by position.
+        interactions = _get_pairwise_cooccurences(
+            text, words, starts, ends, window.size, window.tokenizer
+        )
+    else:
+        interactions = _get_cooccurences_in_window(
+            text, words, starts, ends, window
+        )
+    return count_cooccurences(interactions) if counted else interactions
+
+
+def get_cooccurences_sweep(
+    text_chunks: list,
+    entities: list,
+    window_sizes: list,
+    window: Window = None,
+    tokenizer: str = "nltk",
+):
+    """
+    Extracts co-occurences for several window sizes in a single pass.
+
+    The distance of every pair of entities within the largest window is
+    computed once and bucketed by the smallest window size containing it, then
+    the counts are summed over the buckets. The result for each size is the
+    same as ``get_cooccurences_sliding_window`` with this window size, counted
+    in a ``CooccurrenceMatrix``.
+
+    Args:
+        text_chunks (list): The list of subtexts.
+        entities (list): The list of list of dictionnaries of entities in their given chunk text.
+        window_sizes (list): The window sizes to compute.
+        window (Window, optional): The definition of the distance, whose size
+            is ignored. Defaults to a ``TokenWindow``.
+        tokenizer (str): The tokenizer of ``vroom.tokenize`` of the default
+            ``TokenWindow``, "nltk" or "regex".
+
+    Returns:
+        dict: The ``CooccurrenceMatrix`` of each window size.
+    """
+    if window is None:
+        window = TokenWindow(tokenizer=tokenizer)
+    sizes = np.unique(np.asarray(window_sizes, dtype=np.int64))
+    size_list = sizes.tolist()
+
+    text = " ".join(text_chunks)
+    words, starts, ends = _flatten_entities(text_chunks, entities)
+    if np.any(starts[1:] < starts[:-1]):
+        raise ValueError("The entities must be sorted by position.")
+
+    start_positions, end_positions = window.positions(text, starts, ends)
+    limits = end_positions + sizes[-1] + window.margin
+    lasts = np.searchsorted(start_positions, limits, side="right").tolist()
+    start_positions = start_positions.tolist()
+    end_positions = end_positions.tolist()
+    starts = starts.tolist()
+    ends = ends.tolist()
+
+    pair_rows = {}
+    rows = []
+    buckets = []
+    for i, word in enumerate(words):
+        for j in range(i + 1, lasts[i]):
+            if word == words[j]:
+                continue
+            distance = start_positions[j] - end_positions[i]
+            # The distance only needs to be exact when it is close to one of
+            # the sizes.
+            closest = bisect.bisect_left(size_list, distance - window.margin)
+            if (
+                window.margin
+                and closest < len(size_list)
+                and size_list[closest] < distance + window.margin
+            ):
+                substring = text[ends[i] : starts[j]]
+                distance = window.exact_distance(substring, distance)
+            bucket = bisect.bisect_left(size_list, distance)
+            if bucket == len(size_list):
+                continue
+            pair = (word, words[j])
+            rows.append(pair_rows.setdefault(pair, len(pair_rows)))
+            buckets.append(bucket)
+
+    counts = np.zeros((len(pair_rows), len(size_list)), dtype=np.int64)
+    np.add.at(
+        counts,
+        (np.array(rows, dtype=np.intp), np.array(buckets, dtype=np.intp)),
+        1,
+    )
+    counts = np.cumsum(counts, axis=1)
+
+    pairs = list(pair_rows)
+    matrices = {}
+    for k, size in enumerate(size_list):
+        matrix = CooccurrenceMatrix()
+        non_zero = np.flatnonzero(counts[:, k])
+        matrix.add([pairs[row] for row in non_zero], counts[non_zero, k])
+        matrices[size] = matrix
+    return matrices
+
+
+class CooccurrenceAccumulator:
+    r"""
+    Extracts co-occurences from text chunks as they are produced.
+
+    The chunks are considered joined by a space, as in ``get_cooccurences``,
+    and the result of ``finalize`` is the same. Only the entities that can
+    still co-occur with the next ones are kept between two calls to ``feed``,
+    along with the end of the text that follows them, so that the memory used
+    is bounded by the window size and not by the size of the text.
+
+    The interactions are only kept in a list when neither ``counted`` nor
+    ``sink`` is given. Otherwise, each interaction is counted, or passed to
+    the sink, as soon as it is known, and the accumulator only holds the
+    count of each pair.
+
+    Example:
+    accumulator = CooccurrenceAccumulator(counted=True)
+    for chunk in chunks:
+        accumulator.feed(chunk, get_entities(chunk, nlp=nlp))
+    cooccurences = accumulator.finalize()
+
+    Args:
+        window_size : int
+            The maximum number of tokens between two entities.
+        tokenizer : str
+            The tokenizer of ``vroom.tokenize``, "nltk" or "regex".
+        counted : bool
+            Whether to count the interactions of each pair instead of keeping
+            the list of interactions.
+        sink : callable, optional
+            A function called with each interaction, as a tuple of entities,
+            in the order of the list of interactions.
+    """
+
+    def __init__(
+        self,
+        window_size: int = 25,
+        tokenizer: str = "nltk",
+        counted: bool = False,
+        sink=None,
+    ) -> None:
+        self.window_size = window_size
+        self.tokenizer = tokenizer
+        self.counted = counted
+        self.sink = sink
+        self.interactions = []
+        self.counts = Counter()
+        # Entities which may still co-occur with the next ones, in order. Each
+        # one is a list [word, end, tokens before its end, partners].
+        self._pending = deque()
+        # Char offset of the next chunk and number of tokens before it.
+        self._offset = 0
+        self._n_tokens = 0
+        # End of the joined text, starting at the char offset _text_offset.
+        self._text = ""
+        self._text_offset = 0
+
+    def feed(self, chunk_text: str, chunk_entities: list) -> None:
+        """
+        Adds the entities of the next chunk of text.
+
+        Args:
+            chunk_text (str): The text of the chunk.
+            chunk_entities (list): The list of dictionnaries of entities in the
+                chunk, sorted by position, with offsets in the chunk text. The
+                dictionnaries are left untouched.
+        """
+        if self._offset > 0:
+            self._text += " "
+        chunk_offset = self._offset
+        self._text += chunk_text
+
+        index = TokenIndex(chunk_text, token_spans(chunk_text, self.tokenizer))
+        starts = np.array([e["start"] for e in chunk_entities], dtype=np.int64)
+        ends = np.array([e["end"] for e in chunk_entities], dtype=np.int64)
+        if np.any(starts[1:] < starts[:-1]):
+            raise ValueError("The entities must be sorted by position.")
+        tokens_before_start = (
+            index.tokens_before(starts) + self._n_tokens
+        ).tolist()
+        tokens_before_end = (index.tokens_until(ends) + self._n_tokens).tolist()
+
+        for k, entity in enumerate(chunk_entities):
+            start = int(starts[k]) + chunk_offset
+            self._evict(tokens_before_start[k])
+            for word, end, tokens_before, partners in self._pending:
+                if word == entity["word"]:
+                    continue
+                substring = self._text[
+                    end - self._text_offset : max(0, start - self._text_offset)
+                ]
+                distance = tokens_before_start[k] - tokens_before
+                if _is_within_window(
+                    substring, distance, self.window_size, self.tokenizer
+                ):
+                    partners.append(entity["word"])
+            self._pending.append(
+                [
+                    entity["word"],
+                    int(ends[k]) + chunk_offset,
+                    tokens_before_end[k],
+                    [],
+                ]
+            )
+
+        self._offset += len(chunk_text) + 1
+        self._n_tokens += len(index)
+        self._evict(self._n_tokens)
+        self._trim_text()
+
+    def finalize(self, counted: bool = None):
+        """
+        Returns the co-occurences of all the chunks fed so far.
+
+        Args:
+            counted (bool, optional): Whether to return the number of
+                interactions of each pair instead of the list of
+                interactions. Defaults to the ``counted`` of the accumulator.
+
+        Returns:
+            list: A list of tuples of entities, or a ``{(a, b): count}``
+                  dictionary with a <= b if ``counted`` is True. The list is
+                  empty when the interactions were passed to the sink.
+        """
+        self._evict(None)
+        self._trim_text()
+        if counted is None:
+            counted = self.counted
+        if self.counted:
+            if not counted:
+                raise ValueError(
+                    "The interactions are not kept by a counting accumulator."
+                )
+            return dict(self.counts)
+        if counted:
+            return count_cooccurences(self.interactions)
+        return self.interactions
+
+    def _evict(self, tokens_before_start) -> None:
+        """
+        Moves the pending entities which cannot co-occur with an entity
+        starting after ``tokens_before_start`` tokens to the interactions. All
+        of them are moved if ``tokens_before_start`` is None.
+        """
+        limit = self.window_size + _VERIFICATION_MARGIN
+        while self._pending and (
+            tokens_before_start is None
+            or tokens_before_start - self._pending[0][2] > limit
+        ):
+            word, _, _, partners = self._pending.popleft()
+            for partner in partners:
+                self._add((word, partner))
+
+    def _add(self, interaction: tuple) -> None:
+        """
+        Counts an interaction, passes it to the sink, or keeps it.
+        """
+        if self.counted:
+            a, b = interaction
+            self.counts[(a, b) if a <= b else (b, a)] += 1
+        if self.sink is not None:
+            self.sink(interaction)
+        elif not self.counted:
+            self.interactions.append(interaction)
+
+    def _trim_text(self) -> None:
+        """
+        Drops the text which is before all the pending entities.
+        """
+        if self._pending:
+            offset = min(pending[1] for pending in self._pending)
+        else:
+            offset = self._text_offset + len(self._text)
+        self._text = self._text[offset - self._text_offset :]
+        self._text_offset = offset
@@ -0,0 +1,88 @@
+r"""
+Package for the tagging of named entities in a text.
+
+All the names are matched in a single scan of the text by one compiled
+alternation, ordered from the longest name to the shortest, so that a name is
+never matched inside a longer one and the tags are never nested.
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import re
+
+
+def compile_entities_pattern(named_entities) -> tuple:
+    """
+    Compiles the names of the entities into a single regular expression.
+
+    Args:
+        named_entities (iterable): The names of the entities.
+
+    Returns:
+        tuple: The compiled pattern, or None when there is no name, and a
+            dictionary mapping the text matched by the pattern to the name
+            it comes from.
+    """
+    names = {}
+    # The longest names are tried first at each position of the text.
+    for entity in sorted(named_entities, key=len, reverse=True):
+        normalized = " ".join(entity.split())
+        if normalized and normalized not in names:
+            names[normalized] = entity
+    if not names:
+        return None, names
+
+    alternatives = sorted(names, key=len, reverse=True)
+    pattern = r"\b(?:{})\b".format("|".join(map(re.escape, alternatives)))
+    return re.compile(pattern), names
+
+
+def find_named_entities(text: str, named_entities) -> list:
+    """
+    Finds the non-overlapping occurences of the named entities in the text,
+    in a single scan.
+
+    Args:
+        text (str): The input text.
+        named_entities (iterable): The names of the entities.
+
+    Returns:
+        list: A list of dictionaries with the keys 'word', 'start' and 'end',
+            in text order, where 'word' is the name as given.
+    """
+    pattern, names = compile_entities_pattern(named_entities)
+    if pattern is None:
+        return []
+    return [
+        {
+            "word": names[match.group()],
+            "start": match.start(),
+            "end": match.end(),
+        }
+        for match in pattern.finditer(text)
+    ]
+
+
+def render_tags(text: str, entities: list) -> str:
+    """
+    Renders the text with each entity surrounded by <PER> tags.
+
+    Args:
+        text (str): The input text.
+        entities (list): The non-overlapping entities, in text order, with
+            the keys 'word', 'start' and 'end'.
+
+    Returns:
+        str: The tagged text, where each entity is replaced by
+            " <PER> word </PER> ".
+    """
+    pieces = []
+    position = 0
+    for entity in entities:
+        pieces.append(text[position : entity["start"]])
+        pieces.append(f" <PER> {entity['word']} </PER> ")
+        position = entity["end"]
+    pieces.append(text[position:])
+    return "".join(pieces)
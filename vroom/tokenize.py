@@ -0,0 +1,199 @@
+r"""
+Package for tokenization tasks.
+
+The regex tokenizer approximates ``nltk.word_tokenize`` on French text with a
+single precompiled regular expression, and returns the char offsets of the
+tokens without aligning them afterwards. Every function takes a
+``tokenizer`` argument to switch between the two.
+
+Authors
+-------
+ * Adel Moumen 2024
+"""
+
+import functools
+import re
+import warnings
+
+import nltk
+
+from vroom.TokenIndex import nltk_token_spans
+
+TOKENIZERS = ("nltk", "regex")
+
+# Abbreviations and initials keep their period when followed by a capitalized
+# word ("M. Seldon", "R. Daneel"). Numbers keep their decimal separator, words
+# their inner hyphens, apostrophes and slashes ("auriez-vous", "C'est",
+# "C/Fe") and a trailing hyphen ("peut- être"). The typographic apostrophe is
+# a token on its own ("l", "’", "ignorait"), as with ``nltk.word_tokenize``.
+TOKEN_PATTERN = re.compile(
+    r"(?:M|Mme|Mlle|Mgr|Dr|Mr|Mrs|St|Ste|[A-Z])\.(?=\s+[A-Z])"
+    r"|\d+(?:[.,]\d+)+"
+    r"|\w+(?:[-'&/]\w+)*(?:-(?!\w))?"
+    r"|\.\.\.+"
+    r"|--+"
+    r"|[^\w\s]"
+)
+
+# A sentence ends with a punctuation sign, possibly followed by closing quotes
+# and brackets, and the next one starts with a capital letter, a digit, a
+# dash or an opening quote.
+SENTENCE_END_PATTERN = re.compile(
+    r"(?<!\b[A-Z])(?<!\b(?:Dr|Mr|St))(?<!\b(?:Mme|Mgr|Mrs|Ste))(?<!\bMlle)"
+    r"[.!?…]+[»\"')\]]*\s+(?=[«\"'(\[—–\-\dA-ZÀ-Ý])"
+)
+
+
+# The recent versions of nltk read the punkt parameters from "punkt_tab"
+# instead of the pickled "punkt" models.
+PUNKT_RESOURCE = (
+    "punkt_tab" if hasattr(nltk.tokenize, "PunktTokenizer") else "punkt"
+)
+
+
+def _load_punkt(language: str):
+    if PUNKT_RESOURCE == "punkt_tab":
+        return nltk.tokenize.PunktTokenizer(language).tokenize
+    return nltk.data.load(f"tokenizers/punkt/{language}.pickle").tokenize
+
+
+@functools.lru_cache(maxsize=None)
+def get_sentence_tokenizer(language: str = "english"):
+    """
+    Returns the punkt sentence tokenizer of nltk for a language, loaded once
+    per process.
+
+    The punkt data is only downloaded when it is not installed. When it can
+    not be downloaded either, such as offline, the regex sentence tokenizer
+    is returned with a warning.
+
+    Args:
+        language (str): The language of the punkt sentence tokenizer.
+
+    Returns:
+        callable: A function returning the list of sentences of a text.
+    """
+    try:
+        return _load_punkt(language)
+    except LookupError:
+        pass
+    try:
+        nltk.download(PUNKT_RESOURCE, quiet=True, raise_on_error=True)
+        return _load_punkt(language)
+    except (LookupError, OSError, ValueError):
+        warnings.warn(
+            f"The nltk {PUNKT_RESOURCE} data is missing and can not be "
+            "downloaded, the regex sentence tokenizer is used instead."
+        )
+        return functools.partial(sent_tokenize, tokenizer="regex")
+
+
+def _check_tokenizer(tokenizer: str) -> None:
+    if tokenizer not in TOKENIZERS:
+        raise ValueError(
+            f"Unknown tokenizer: {tokenizer}, expected one of {TOKENIZERS}"
+        )
+
+
+def token_spans(text: str, tokenizer: str = "regex") -> list:
+    """
+    Returns the char span of each token of the text.
+
+    Args:
+        text (str): The input text.
+        tokenizer (str): "regex" or "nltk".
+
+    Returns:
+        list: A list of (start, end) tuples, one per token, in text order.
+    """
+    _check_tokenizer(tokenizer)
+    if tokenizer == "nltk":
+        return nltk_token_spans(text)
+    return [match.span() for match in TOKEN_PATTERN.finditer(text)]
+
+
+def word_tokenize(text: str, tokenizer: str = "regex") -> list:
+    """
+    Returns the tokens of the text.
+
+    Args:
+        text (str): The input text.
+        tokenizer (str): "regex" or "nltk".
+
+    Returns:
+        list: The list of tokens.
+    """
+    _check_tokenizer(tokenizer)
+    if tokenizer == "nltk":
+        return nltk.word_tokenize(text)
+    return TOKEN_PATTERN.findall(text)
+
+
+def count_tokens(text: str, tokenizer: str = "regex") -> int:
+    """
+    Returns the number of tokens of the text.
+
+    Args:
+        text (str): The input text.
+        tokenizer (str): "regex" or "nltk".
+
+    Returns:
+        int: The number of tokens.
+    """
+    return len(word_tokenize(text, tokenizer))
+
+
+def sentence_spans(
+    text: str, tokenizer: str = "regex", language: str = "english"
+) -> list:
+    """
+    Returns the char span of each sentence of the text.
+
+    Args:
+        text (str): The input text.
+        tokenizer (str): "regex" or "nltk".
+        language (str): The language of the punkt sentence tokenizer of nltk.
+
+    Returns:
+        list: A list of (start, end) tuples, one per sentence, in text order.
+    """
+    _check_tokenizer(tokenizer)
+    spans = []
+    if tokenizer == "nltk":
+        offset = 0
+        for sentence in get_sentence_tokenizer(language)(text):
+            start = text.find(sentence, offset)
+            if start == -1:
+                continue
+            offset = start + len(sentence)
+            spans.append((start, offset))
+        return spans
+
+    start = 0
+    for match in SENTENCE_END_PATTERN.finditer(text):
+        end = match.start() + len(match.group().rstrip())
+        spans.append((start, end))
+        start = match.end()
+    if text[start:].strip():
+        spans.append((start, len(text.rstrip())))
+    return spans
+
+
+def sent_tokenize(
+    text: str, tokenizer: str = "regex", language: str = "english"
+) -> list:
+    """
+    Returns the sentences of the text.
+
+    Args:
+        text (str): The input text.
+        tokenizer (str): "regex" or "nltk".
+        language (str): The language of the punkt sentence tokenizer of nltk.
+
+    Returns:
+        list: The list of sentences.
+    """
+    _check_tokenizer(tokenizer)
+    if tokenizer == "nltk":
+        return get_sentence_tokenizer(language)(text)
+    return [text[start:end] for start, end in sentence_spans(text)]